@@ -10,12 +10,20 @@ from alembic import context
 from src.app.core.config import settings
 from src.app.models import (
     Base,
+    DiaryDay,
+    DiaryEntry,
+    HouseholdMeasure,
     Nutrient,
     PendingProduct,
     Product,
+    ProductAlias,
     ProductGroup,
     ProductNutrient,
+    Recipe,
+    RecipeIngredient,
+    SearchQueryStat,
     User,
+    UserTarget,
 )
 
 # this is the Alembic Config object, which provides
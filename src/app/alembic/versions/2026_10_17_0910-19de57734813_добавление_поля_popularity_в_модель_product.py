@@ -0,0 +1,37 @@
+"""Добавление поля popularity в модель Product
+
+Revision ID: 19de57734813
+Revises: c1354cf1145d
+Create Date: 2026-10-17 09:10:42.118304
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "19de57734813"
+down_revision: Union[str, None] = "c1354cf1145d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "products",
+        sa.Column("popularity", sa.Float(), nullable=False, server_default="0"),
+    )
+    op.create_index(
+        op.f("ix_products_popularity"),
+        "products",
+        ["popularity"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_products_popularity"), table_name="products")
+    op.drop_column("products", "popularity")
@@ -0,0 +1,48 @@
+"""Добавление таблицы search_query_stats
+
+Revision ID: df80d9a1d9e5
+Revises: 19de57734813
+Create Date: 2026-10-17 10:24:05.902143
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = "df80d9a1d9e5"
+down_revision: Union[str, None] = "19de57734813"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "search_query_stats",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("query", sa.String(length=100), nullable=False),
+        sa.Column("frequency", sa.Integer(), nullable=False),
+        sa.Column("zero_results", sa.Integer(), nullable=False),
+        sa.Column("cache_hits", sa.Integer(), nullable=False),
+        sa.Column(
+            "latency_buckets",
+            postgresql.ARRAY(sa.Integer()),
+            nullable=False,
+        ),
+        sa.Column("p95_latency_ms", sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_search_query_stats")),
+        sa.UniqueConstraint(
+            "day",
+            "query",
+            name=op.f("uq_search_query_stats_day_query"),
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("search_query_stats")
@@ -0,0 +1,105 @@
+"""Добавление нормализованных названий продуктов
+
+Revision ID: bc6a9f064cbf
+Revises: df80d9a1d9e5
+Create Date: 2026-10-17 11:50:13.402871
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "bc6a9f064cbf"
+down_revision: Union[str, None] = "df80d9a1d9e5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _normalized(column: str) -> str:
+    # Копия normalize_title_sql: миграция не должна зависеть от кода приложения
+    return (
+        f"btrim(regexp_replace(replace(lower({column}), 'ё', 'е'), "
+        r"'\s+', ' ', 'g'))"
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "products",
+        sa.Column(
+            "normalized_title",
+            sa.String(),
+            sa.Computed(_normalized("title"), persisted=True),
+            nullable=False,
+        ),
+    )
+    op.create_index(
+        op.f("ix_products_normalized_title"),
+        "products",
+        ["normalized_title"],
+        unique=False,
+    )
+    # Поиск подстроки идёт по нормализованному названию
+    op.drop_index(
+        "idx_product_title_trgm",
+        table_name="products",
+        postgresql_using="gin",
+    )
+    op.create_index(
+        "idx_product_normalized_title_trgm",
+        "products",
+        ["normalized_title"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"normalized_title": "gin_trgm_ops"},
+    )
+
+    op.add_column(
+        "pending_products",
+        sa.Column(
+            "normalized_name",
+            sa.String(),
+            sa.Computed(_normalized("name"), persisted=True),
+            nullable=False,
+        ),
+    )
+    # Удаление дубликатов, накопившихся до появления уникального индекса
+    op.execute("""
+        DELETE FROM pending_products duplicate
+        USING pending_products original
+        WHERE duplicate.normalized_name = original.normalized_name
+          AND duplicate.id > original.id
+        """)
+    op.create_unique_constraint(
+        op.f("uq_pending_products_normalized_name"),
+        "pending_products",
+        ["normalized_name"],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint(
+        op.f("uq_pending_products_normalized_name"),
+        "pending_products",
+        type_="unique",
+    )
+    op.drop_column("pending_products", "normalized_name")
+    op.drop_index(
+        "idx_product_normalized_title_trgm",
+        table_name="products",
+        postgresql_using="gin",
+    )
+    op.create_index(
+        "idx_product_title_trgm",
+        "products",
+        ["title"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"title": "gin_trgm_ops"},
+    )
+    op.drop_index(op.f("ix_products_normalized_title"), table_name="products")
+    op.drop_column("products", "normalized_title")
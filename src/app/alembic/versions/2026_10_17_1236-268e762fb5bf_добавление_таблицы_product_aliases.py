@@ -0,0 +1,63 @@
+"""Добавление таблицы product_aliases
+
+Revision ID: 268e762fb5bf
+Revises: bc6a9f064cbf
+Create Date: 2026-10-17 12:36:48.250317
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "268e762fb5bf"
+down_revision: Union[str, None] = "bc6a9f064cbf"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "product_aliases",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.Column("alias", sa.String(length=100), nullable=False),
+        sa.Column(
+            "normalized_alias",
+            sa.String(),
+            sa.Computed(
+                "btrim(regexp_replace(replace(lower(alias), 'ё', 'е'), "
+                r"'\s+', ' ', 'g'))",
+                persisted=True,
+            ),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(
+            ["product_id"],
+            ["products.id"],
+            name=op.f("fk_product_aliases_product_id_products"),
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_product_aliases")),
+        sa.UniqueConstraint(
+            "normalized_alias",
+            name=op.f("uq_product_aliases_normalized_alias"),
+        ),
+    )
+    op.create_index(
+        op.f("ix_product_aliases_product_id"),
+        "product_aliases",
+        ["product_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        op.f("ix_product_aliases_product_id"),
+        table_name="product_aliases",
+    )
+    op.drop_table("product_aliases")
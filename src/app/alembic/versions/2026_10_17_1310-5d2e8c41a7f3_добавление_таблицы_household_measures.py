@@ -0,0 +1,65 @@
+"""Добавление таблицы household_measures
+
+Revision ID: 5d2e8c41a7f3
+Revises: 268e762fb5bf
+Create Date: 2026-10-17 13:10:27.514208
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "5d2e8c41a7f3"
+down_revision: Union[str, None] = "268e762fb5bf"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    household_measures = op.create_table(
+        "household_measures",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("product_id", sa.Integer(), nullable=True),
+        sa.Column("name", sa.String(length=30), nullable=False),
+        sa.Column("grams", sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["product_id"],
+            ["products.id"],
+            name=op.f("fk_household_measures_product_id_products"),
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_household_measures")),
+        sa.UniqueConstraint(
+            "product_id",
+            "name",
+            name=op.f("uq_household_measures_product_id_name"),
+            postgresql_nulls_not_distinct=True,
+        ),
+    )
+    op.create_index(
+        op.f("ix_household_measures_product_id"),
+        "household_measures",
+        ["product_id"],
+        unique=False,
+    )
+    # Общие меры для продуктов с плотностью, близкой к воде
+    op.bulk_insert(
+        household_measures,
+        [
+            {"product_id": None, "name": "чайная ложка", "grams": 5.0},
+            {"product_id": None, "name": "столовая ложка", "grams": 15.0},
+            {"product_id": None, "name": "стакан", "grams": 250.0},
+        ],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        op.f("ix_household_measures_product_id"),
+        table_name="household_measures",
+    )
+    op.drop_table("household_measures")
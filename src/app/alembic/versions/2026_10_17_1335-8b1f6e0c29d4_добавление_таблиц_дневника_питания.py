@@ -0,0 +1,86 @@
+"""Добавление таблиц дневника питания
+
+Revision ID: 8b1f6e0c29d4
+Revises: 5d2e8c41a7f3
+Create Date: 2026-10-17 13:35:12.406581
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = "8b1f6e0c29d4"
+down_revision: Union[str, None] = "5d2e8c41a7f3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "diary_entries",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("product_id", sa.Integer(), nullable=True),
+        sa.Column("grams", sa.Float(), nullable=False),
+        sa.Column("eaten_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column(
+            "amounts",
+            postgresql.JSONB(astext_type=sa.Text()),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["users.id"],
+            name=op.f("fk_diary_entries_user_id_users"),
+            ondelete="CASCADE",
+        ),
+        sa.ForeignKeyConstraint(
+            ["product_id"],
+            ["products.id"],
+            name=op.f("fk_diary_entries_product_id_products"),
+            ondelete="SET NULL",
+        ),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_diary_entries")),
+    )
+    op.create_index(
+        "idx_diary_entries_user_day",
+        "diary_entries",
+        ["user_id", "day"],
+        unique=False,
+    )
+    op.create_table(
+        "diary_days",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("entries", sa.Integer(), nullable=False),
+        sa.Column(
+            "totals",
+            postgresql.JSONB(astext_type=sa.Text()),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["users.id"],
+            name=op.f("fk_diary_days_user_id_users"),
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_diary_days")),
+        sa.UniqueConstraint(
+            "user_id",
+            "day",
+            name=op.f("uq_diary_days_user_id_day"),
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("diary_days")
+    op.drop_index("idx_diary_entries_user_day", table_name="diary_entries")
+    op.drop_table("diary_entries")
@@ -0,0 +1,81 @@
+"""Добавление таблиц рецептов
+
+Revision ID: e47a0c93b5d1
+Revises: 8b1f6e0c29d4
+Create Date: 2026-10-17 14:02:48.731920
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = "e47a0c93b5d1"
+down_revision: Union[str, None] = "8b1f6e0c29d4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "recipes",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("title", sa.String(length=100), nullable=False),
+        sa.Column("servings", sa.Integer(), nullable=False),
+        sa.Column(
+            "totals",
+            postgresql.JSONB(astext_type=sa.Text()),
+            nullable=False,
+        ),
+        sa.Column("total_grams", sa.Float(), nullable=False),
+        sa.Column("catalog_version", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["users.id"],
+            name=op.f("fk_recipes_user_id_users"),
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_recipes")),
+    )
+    op.create_index(
+        op.f("ix_recipes_user_id"),
+        "recipes",
+        ["user_id"],
+        unique=False,
+    )
+    op.create_table(
+        "recipe_ingredients",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("recipe_id", sa.Integer(), nullable=False),
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.Column("grams", sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["recipe_id"],
+            ["recipes.id"],
+            name=op.f("fk_recipe_ingredients_recipe_id_recipes"),
+            ondelete="CASCADE",
+        ),
+        sa.ForeignKeyConstraint(
+            ["product_id"],
+            ["products.id"],
+            name=op.f("fk_recipe_ingredients_product_id_products"),
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_recipe_ingredients")),
+        sa.UniqueConstraint(
+            "recipe_id",
+            "product_id",
+            name=op.f("uq_recipe_ingredients_recipe_id_product_id"),
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("recipe_ingredients")
+    op.drop_index(op.f("ix_recipes_user_id"), table_name="recipes")
+    op.drop_table("recipes")
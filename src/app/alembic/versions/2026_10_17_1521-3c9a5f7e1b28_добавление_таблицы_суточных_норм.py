@@ -0,0 +1,43 @@
+"""Добавление таблицы суточных норм
+
+Revision ID: 3c9a5f7e1b28
+Revises: e47a0c93b5d1
+Create Date: 2026-10-17 15:21:37.518204
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "3c9a5f7e1b28"
+down_revision: Union[str, None] = "e47a0c93b5d1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "user_targets",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("bmr", sa.Float(), nullable=False),
+        sa.Column("tdee", sa.Float(), nullable=False),
+        sa.Column("energy", sa.Float(), nullable=False),
+        sa.Column("proteins", sa.Float(), nullable=False),
+        sa.Column("fats", sa.Float(), nullable=False),
+        sa.Column("carbs", sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["users.id"],
+            name=op.f("fk_user_targets_user_id_users"),
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("user_id", name=op.f("pk_user_targets")),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("user_targets")
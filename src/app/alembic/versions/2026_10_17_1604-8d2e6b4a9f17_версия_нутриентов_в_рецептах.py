@@ -0,0 +1,34 @@
+"""Версия нутриентов в рецептах
+
+Revision ID: 8d2e6b4a9f17
+Revises: 3c9a5f7e1b28
+Create Date: 2026-10-17 16:04:12.730915
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "8d2e6b4a9f17"
+down_revision: Union[str, None] = "3c9a5f7e1b28"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.alter_column(
+        "recipes",
+        "catalog_version",
+        new_column_name="nutrient_version",
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.alter_column(
+        "recipes",
+        "nutrient_version",
+        new_column_name="catalog_version",
+    )
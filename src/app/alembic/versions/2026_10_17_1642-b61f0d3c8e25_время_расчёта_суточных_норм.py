@@ -0,0 +1,35 @@
+"""Время расчёта суточных норм
+
+Revision ID: b61f0d3c8e25
+Revises: 8d2e6b4a9f17
+Create Date: 2026-10-17 16:42:05.184362
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "b61f0d3c8e25"
+down_revision: Union[str, None] = "8d2e6b4a9f17"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "user_targets",
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("user_targets", "updated_at")
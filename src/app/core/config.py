@@ -45,6 +45,21 @@ class RedisConfig(BaseModel):
     password: str
 
 
+class CacheConfig(BaseModel):
+    search_ttl: int = 600  # 10 minutes
+    product_fragments: int = 2000  # отрендеренных страниц продуктов в процессе
+
+
+class TelemetryConfig(BaseModel):
+    search_sample_rate: float = 0.1  # доля поисковых запросов, попадающих в стрим
+    search_stream_maxlen: int = 100_000
+
+
+class DietPlanConfig(BaseModel):
+    workers: int = 2  # процессов подбора рациона
+    time_budget_ms: int = 300  # время поиска на один рацион
+
+
 class LoggingConfig(BaseModel):
     log_level: Literal[
         "debug",
@@ -69,6 +84,8 @@ class RouterPrefix(BaseModel):
     product: str = "/product"
     user: str = "/user"
     security: str = "/security"
+    diary: str = "/diary"
+    recipe: str = "/recipes"
 
 
 class DatabaseConfig(BaseModel):
@@ -121,6 +138,9 @@ class Settings(BaseSettings):
     db: DatabaseConfig
     auth: AuthConfig
     redis: RedisConfig
+    cache: CacheConfig = CacheConfig()
+    telemetry: TelemetryConfig = TelemetryConfig()
+    diet_plan: DietPlanConfig = DietPlanConfig()
     cors: CORSConfig
     mail: SMTPConfig
     taskiq: TaskiqConfig
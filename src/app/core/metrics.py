@@ -0,0 +1,76 @@
+from prometheus_client import Counter, Histogram
+
+# Метрики регистрируются в глобальном реестре prometheus_client и
+# отдаются вместе с метриками Instrumentator на /metrics
+
+SEARCH_CACHE_REQUESTS = Counter(
+    "search_cache_requests_total",
+    "Product search cache lookups by result",
+    ["result"],
+)
+SEARCH_CACHE_LATENCY = Histogram(
+    "search_cache_latency_seconds",
+    "Product search latency by cache result",
+    ["result"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+SEARCH_CACHE_PAYLOAD_BYTES = Histogram(
+    "search_cache_payload_bytes",
+    "Size of product search payloads stored in the cache",
+    buckets=(256, 512, 1024, 2048, 4096, 8192, 16384, 32768),
+)
+SEARCH_BRANCH_LATENCY = Histogram(
+    "product_search_branch_latency_seconds",
+    "Latency of product search branches "
+    "(alias, index, exact, suggestions, pending, page)",
+    ["branch"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+SEARCH_STREAM_QUERIES = Counter(
+    "search_stream_queries_total",
+    "Streaming search queries by outcome (answered, superseded, failed)",
+    ["outcome"],
+)
+PRODUCT_DETAILS_LATENCY = Histogram(
+    "product_details_latency_seconds",
+    "Product details latency by snapshot state (warm, cold)",
+    ["snapshot"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+NUTRIENT_FILTER_LATENCY = Histogram(
+    "nutrient_filter_latency_seconds",
+    "Latency of nutrient range filter queries over the in-memory matrix",
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1),
+)
+SIMILAR_PRODUCTS_LATENCY = Histogram(
+    "similar_products_latency_seconds",
+    "Latency of nearest-neighbour lookups in the similar products index",
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1),
+)
+PORTION_SCALING_LATENCY = Histogram(
+    "portion_scaling_latency_seconds",
+    "Latency of scaling product nutrients to portions",
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1),
+)
+PRODUCT_FRAGMENT_CACHE_REQUESTS = Counter(
+    "product_fragment_cache_requests_total",
+    "Rendered product page body lookups by result",
+    ["result"],
+)
+PRODUCT_DETAILS_BATCH_LATENCY = Histogram(
+    "product_details_batch_latency_seconds",
+    "Latency of bulk product details requests",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+PRODUCT_DETAILS_BATCH_PRODUCTS = Counter(
+    "product_details_batch_products_total",
+    "Products requested in bulk by snapshot state (warm, cold, missing)"
+    " or scaled to portions (portion)",
+    ["snapshot"],
+)
+DIET_PLAN_LATENCY = Histogram(
+    "diet_plan_latency_seconds",
+    "Diet plan optimization latency by outcome (within, outside, timeout)",
+    ["outcome"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
@@ -1,6 +1,7 @@
-from fastapi import Request, Response
+from fastapi import Request, Response, status
 from starlette.middleware.base import BaseHTTPMiddleware
 
+from src.app.core.utils.http_cache import cache_policy_for_path
 from src.app.core.utils.security import generate_csp_nonce
 
 
@@ -12,6 +13,15 @@ class CSPMiddleware(BaseHTTPMiddleware):
 
         response = await call_next(request)
 
+        # Маршруты с собственной политикой кэширования задают Cache-Control сами
+        if "Cache-Control" not in response.headers:
+            response.headers["Cache-Control"] = cache_policy_for_path(request.url.path)
+            response.headers["Pragma"] = "no-cache"
+
+        # Ответ 304 не должен менять CSP страницы из кэша: её nonce остался прежним
+        if response.status_code == status.HTTP_304_NOT_MODIFIED:
+            return response
+
         response.headers["Content-Security-Policy-Report-Only"] = (
             "default-src 'self'; "
             f"script-src 'self' 'nonce-{csp_nonce}' https://cdn.jsdelivr.net https://cdnjs.cloudflare.com; "
@@ -26,9 +36,5 @@ class CSPMiddleware(BaseHTTPMiddleware):
             "upgrade-insecure-requests;"
             "report-uri /api/v1/security/csp-report;"
         )
-        response.headers["Cache-Control"] = (
-            "no-store, no-cache, must-revalidate, max-age=0"
-        )
-        response.headers["Pragma"] = "no-cache"
 
         return response
@@ -14,6 +14,14 @@ redis_client = Redis.from_url(
     socket_connect_timeout=5,
 )
 
+# Клиент без декодирования ответов для готовых сериализованных payload'ов
+redis_cache_client = Redis.from_url(
+    url=str(settings.redis.url),
+    decode_responses=False,
+    socket_timeout=5,
+    socket_connect_timeout=5,
+)
+
 
 async def get_redis() -> AsyncGenerator[Any, Redis]:
     """
@@ -39,4 +47,5 @@ async def close_redis():
     Close Redis connection at application shutdown.
     """
     await redis_client.aclose()
+    await redis_cache_client.aclose()
     # log.info("Redis connection closed")
@@ -0,0 +1,57 @@
+from typing import Iterable
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.app.core.logger import get_logger
+from src.app.core.utils.autocomplete import AutocompleteIndex
+from src.app.models import Product, ProductGroup
+
+log = get_logger("autocomplete_service")
+
+autocomplete_index = AutocompleteIndex()
+
+
+def _select_index_rows():
+    return select(
+        Product.id,
+        Product.title,
+        ProductGroup.name,
+    ).join(ProductGroup, Product.group_id == ProductGroup.id)
+
+
+async def build_autocomplete_index(session: AsyncSession) -> None:
+    """
+    Loads every product title and group name into the autocomplete index.
+
+    :param session: The current database session.
+    :return: None
+    """
+    result = await session.execute(_select_index_rows())
+    autocomplete_index.rebuild(result.tuples())
+    log.info("Autocomplete index built: %s products", len(autocomplete_index))
+
+
+async def refresh_autocomplete_index(
+    session: AsyncSession,
+    product_ids: Iterable[int],
+) -> None:
+    """
+    Re-reads the given products and applies the changes to the autocomplete index.
+
+    Products that no longer exist in the database are removed from the index.
+
+    :param session: The current database session.
+    :param product_ids: The ids of the changed products.
+    :return: None
+    """
+    product_ids = set(product_ids)
+    result = await session.execute(
+        _select_index_rows().where(Product.id.in_(product_ids))
+    )
+    for product_id, title, group_name in result.tuples():
+        autocomplete_index.upsert(product_id, title, group_name)
+        product_ids.discard(product_id)
+
+    for product_id in product_ids:
+        autocomplete_index.remove(product_id)
@@ -0,0 +1,293 @@
+import asyncio
+import json
+from typing import Iterable
+
+from redis.asyncio import RedisError
+
+from src.app.core import db_helper
+from src.app.core.logger import get_logger
+from src.app.core.redis import redis_client
+from src.app.core.services.autocomplete import (
+    build_autocomplete_index,
+    refresh_autocomplete_index,
+)
+from src.app.core.services.household_measure import load_household_measures
+from src.app.core.services.nutrient import build_nutrient_dispatch
+from src.app.core.services.nutrient_matrix import (
+    build_nutrient_matrix,
+    nutrient_matrix,
+    refresh_nutrient_matrix,
+)
+from src.app.core.services.product_alias import load_product_aliases
+from src.app.core.services.similar_products import (
+    build_similar_products_index,
+    similar_products_index,
+)
+from src.app.core.services.product_details import invalidate_product_details
+
+log = get_logger("catalog_service")
+
+CATALOG_CHANNEL = "catalog:changes"
+CATALOG_VERSION_KEY = "catalog:version"
+# Версия нутриентов продуктов: меняется только с изменением их состава
+NUTRIENT_VERSION_KEY = "catalog:nutrients"
+# Поколение ранжирования поиска: меняется только вместе с популярностью
+RANKING_VERSION_KEY = "catalog:ranking"
+
+_catalog_version = 0
+_nutrient_version = 0
+_ranking_version = 0
+
+
+def get_catalog_version() -> int:
+    """
+    Returns the catalog version last seen by this process.
+
+    Every cache derived from products or nutrients includes the version in
+    its key, so bumping the version invalidates all of them at once.
+
+    :return: The current catalog version.
+    """
+    return _catalog_version
+
+
+def get_nutrient_version() -> int:
+    """
+    Returns the product nutrients version last seen by this process.
+
+    The version is bumped together with the catalog version, but only by
+    changes that may touch product nutrients (`details_changed`), so values
+    computed from nutrient amounts are not invalidated by title or alias
+    changes.
+
+    :return: The current nutrients version.
+    """
+    return _nutrient_version
+
+
+def get_ranking_version() -> int:
+    """
+    Returns the search ranking generation last seen by this process.
+
+    Popularity updates change the order of search results but not the
+    catalog itself, so they bump this generation instead of the catalog
+    version; only caches of ranked results include it in their key.
+
+    :return: The current ranking generation.
+    """
+    return _ranking_version
+
+
+async def fetch_catalog_version() -> int:
+    """
+    Reads the catalog version from Redis.
+
+    :return: The current catalog version, 0 if it has never been bumped.
+    """
+    version = await redis_client.get(CATALOG_VERSION_KEY)
+    return int(version) if version else 0
+
+
+async def publish_catalog_changes(
+    product_ids: Iterable[int] = (),
+    details_changed: bool = True,
+) -> int:
+    """
+    Bumps the catalog version and notifies every application process.
+
+    The catalog is written outside of the web application (imports, admin
+    scripts), so writers are expected to call this function after committing
+    changes to products, product aliases, household measures or nutrients.
+    An empty `product_ids` means that the whole catalog has to be reloaded.
+
+    Unless `details_changed` is False (e.g. only titles or aliases changed),
+    the detail snapshots of the products are dropped and queued for a rebuild
+    and the nutrients version is bumped as well.
+
+    :param product_ids: The ids of the inserted, updated or deleted products.
+    :param details_changed: Whether the product details may have changed.
+    :return: The new catalog version.
+    """
+    product_ids = sorted(set(product_ids))
+    if details_changed:
+        await invalidate_product_details(product_ids)
+
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.incr(CATALOG_VERSION_KEY)
+        if details_changed:
+            pipe.incr(NUTRIENT_VERSION_KEY)
+        else:
+            pipe.get(NUTRIENT_VERSION_KEY)
+        version, nutrient_version = await pipe.execute()
+    await redis_client.publish(
+        CATALOG_CHANNEL,
+        json.dumps(
+            {
+                "version": version,
+                "nutrients": int(nutrient_version or 0),
+                "product_ids": product_ids,
+                "details_changed": details_changed,
+            }
+        ),
+    )
+    return version
+
+
+async def publish_ranking_changes() -> int:
+    """
+    Bumps the ranking generation and notifies every application process.
+
+    Search results are ranked in the database, so the processes only switch
+    to the new generation; no index is rebuilt.
+
+    :return: The new ranking generation.
+    """
+    version = await redis_client.incr(RANKING_VERSION_KEY)
+    await redis_client.publish(CATALOG_CHANNEL, json.dumps({"ranking": version}))
+    return version
+
+
+async def warm_catalog_caches() -> bool:
+    """
+    Builds the in-process catalog indexes.
+
+    Called by `listen_catalog_changes` once it has subscribed to the catalog
+    changes, at startup and after every reconnect.
+
+    A failure is logged and swallowed: every index falls back to SQL until the
+    next successful rebuild. The versions seen by the process are only
+    raised once the indexes are built.
+
+    :return: Whether the indexes were built.
+    """
+    global _catalog_version, _nutrient_version, _ranking_version
+    version = await fetch_catalog_version()
+    nutrients = await redis_client.get(NUTRIENT_VERSION_KEY)
+    ranking = await redis_client.get(RANKING_VERSION_KEY)
+    if not await apply_catalog_changes([], version):
+        return False
+    _catalog_version = max(_catalog_version, version)
+    _nutrient_version = max(_nutrient_version, int(nutrients) if nutrients else 0)
+    _ranking_version = max(_ranking_version, int(ranking) if ranking else 0)
+    return True
+
+
+async def apply_catalog_changes(
+    product_ids: list[int],
+    version: int,
+    details_changed: bool = True,
+) -> bool:
+    """
+    Applies a catalog change notification to the in-process indexes.
+
+    Any error is logged and swallowed, so a single failed rebuild never stops
+    the listener; the caller is expected to request a full rebuild next time.
+    The caller raises the catalog version of the process only after the
+    changes are applied: caches shared between processes are keyed on it, so
+    a process must not store results of its old indexes under a new version.
+
+    :param product_ids: The ids of the changed products, or an empty list for
+                        a full rebuild.
+    :param version: The catalog version the changes belong to.
+    :param details_changed: Whether the nutrients of the products may have
+                            changed; the nutrient matrix and the similar
+                            products index are kept otherwise.
+    :return: Whether the changes were applied.
+    """
+    try:
+        async with db_helper.session_factory() as session:
+            if product_ids:
+                await refresh_autocomplete_index(session, product_ids)
+            else:
+                await build_autocomplete_index(session)
+            await load_product_aliases(session)
+            await load_household_measures(session)
+            await build_nutrient_dispatch(session, version)
+            if not nutrient_matrix.ready:
+                await build_nutrient_matrix(session)
+            elif details_changed:
+                if product_ids:
+                    await refresh_nutrient_matrix(session, product_ids)
+                else:
+                    await build_nutrient_matrix(session)
+            if details_changed or not similar_products_index.ready:
+                await build_similar_products_index(session, version)
+            else:
+                # Индекс не менялся, но соответствует новой версии каталога: по
+                # ней страницы продукта сверяют ETag во всех процессах
+                similar_products_index.version = version
+    except Exception:
+        log.exception("Ошибка при обновлении индексов каталога")
+        return False
+    return True
+
+
+async def listen_catalog_changes(ready: asyncio.Event | None = None) -> None:
+    """
+    Consumes catalog change notifications until the task is cancelled.
+
+    The indexes are built only after subscribing, so no notification is lost
+    between the build and the subscription; notifications published while the
+    subscription was down are lost as well, so the indexes are fully rebuilt
+    after every reconnect. Ranking notifications only
+    raise the ranking generation. A malformed notification
+    or a failed rebuild is logged and the listener keeps going; the next
+    notification then rebuilds the indexes fully instead of incrementally.
+
+    :param ready: Set once the first build has been attempted.
+    """
+    global _catalog_version, _nutrient_version, _ranking_version
+    needs_rebuild = True
+    full_rebuild = False
+    while True:
+        pubsub = redis_client.pubsub()
+        try:
+            await pubsub.subscribe(CATALOG_CHANNEL)
+            if needs_rebuild:
+                full_rebuild = not await warm_catalog_caches()
+                needs_rebuild = False
+            if ready is not None:
+                ready.set()
+
+            while True:
+                message = await pubsub.get_message(
+                    ignore_subscribe_messages=True,
+                    timeout=1.0,
+                )
+                if message is None:
+                    continue
+                try:
+                    change = json.loads(message["data"])
+                    if "ranking" in change:
+                        _ranking_version = max(_ranking_version, int(change["ranking"]))
+                        continue
+                    version = int(change["version"])
+                    nutrient_version = int(change.get("nutrients", 0))
+                    product_ids = [
+                        int(product_id) for product_id in change["product_ids"]
+                    ]
+                    details_changed = bool(change.get("details_changed", True))
+                except Exception:
+                    log.exception(
+                        "Некорректное сообщение об изменении каталога: %r", message
+                    )
+                    full_rebuild = True
+                    continue
+
+                if full_rebuild:
+                    product_ids, details_changed = [], True
+                if await apply_catalog_changes(product_ids, version, details_changed):
+                    _catalog_version = max(_catalog_version, version)
+                    _nutrient_version = max(_nutrient_version, nutrient_version)
+                    full_rebuild = False
+                else:
+                    full_rebuild = True
+        except RedisError as e:
+            log.error("Ошибка подписки на изменения каталога: %s", e)
+            needs_rebuild = True
+            await asyncio.sleep(5)
+        finally:
+            await pubsub.aclose()
+            # Без Redis приложение запускается на запасных SQL-запросах
+            if ready is not None:
+                ready.set()
@@ -0,0 +1,64 @@
+from src.app.core.logger import get_logger
+from src.app.core.services.nutrient_matrix import nutrient_matrix
+from src.app.core.utils.daily_value import REFERENCE_VERSION, DailyValueTable
+from src.app.core.utils.nutrient_dispatch import nutrient_dispatch
+from src.app.schemas.user import UserResponse
+
+log = get_logger("daily_value_service")
+
+daily_value_table = DailyValueTable()
+
+
+def build_daily_values() -> None:
+    """
+    Rebuilds the daily value reference vectors from the nutrient dictionary.
+
+    :return: None
+    """
+    daily_value_table.rebuild(nutrient_dispatch.routes)
+    log.info("Daily value table built: %s nutrients", len(daily_value_table))
+
+
+def daily_value_key(user: UserResponse | None) -> str:
+    """
+    Returns what the daily value overlay of a user depends on.
+
+    Users of the same gender, age band and TDEE get the same overlay, so the
+    key is part of the product page ETag instead of the user's profile.
+
+    :param user: The authenticated user, or None.
+    :return: The key; empty if the user gets no overlay.
+    """
+    row = daily_value_table.profile_row(user.gender, user.age) if user else None
+    if row is None:
+        return ""
+    energy = round(user.tdee) if user.tdee is not None else ""
+    return f"{REFERENCE_VERSION}:{row}:{energy}"
+
+
+def product_daily_values(
+    product_id: int,
+    user: UserResponse | None,
+) -> dict[str, float] | None:
+    """
+    Returns the nutrients of a product as percentages of the user's needs.
+
+    The amounts come from the in-memory nutrient matrix and are divided by
+    the reference vector of the user's gender and age band, with the energy
+    dependent values scaled to the user's TDEE, in one vectorized operation;
+    no database query is made. The product page body stays user-independent
+    and cached: the percentages are placed into it by their markup keys.
+
+    :param product_id: The product id.
+    :param user: The authenticated user, or None.
+    :return: The percentages by markup key, or None if there is no user, the
+             profile lacks gender or age, or the tables are not loaded.
+    """
+    if user is None or not daily_value_table.ready or not nutrient_matrix.ready:
+        return None
+    row = daily_value_table.profile_row(user.gender, user.age)
+    if row is None:
+        return None
+
+    nutrient_ids, amounts, _ = nutrient_matrix.product_amounts([product_id])
+    return daily_value_table.overlay(nutrient_ids, amounts[:, 0], row, user.tdee)
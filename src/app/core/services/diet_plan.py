@@ -0,0 +1,237 @@
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.app.core.config import settings
+from src.app.core.logger import get_logger
+from src.app.core.metrics import DIET_PLAN_LATENCY
+from src.app.core.services.nutrient_matrix import nutrient_matrix, slot_nutrient_id
+from src.app.core.services.product import get_product_suggestions
+from src.app.core.services.similar_products import similar_products_index
+from src.app.core.utils.portion import BASE_GRAMS
+from src.app.core.utils.nutrient_dispatch import CARBS, ENERGY_VALUE, FATS, PROTEINS
+from src.app.crud.profile import get_user_profile
+from src.app.schemas.diet_plan import (
+    DietPlanItem,
+    DietPlanRequest,
+    DietPlanResponse,
+    MacroTargets,
+)
+from src.solvers.diet_plan import PlanProblem, solve_diet_plan, warm_up
+
+log = get_logger("diet_plan_service")
+
+# Минимальная граммовка продукта в рационе
+MIN_PLAN_GRAMS = 10.0
+# Запас на передачу задачи в процесс и обратно сверх бюджета поиска
+_POOL_OVERHEAD = 1.0
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn: рабочие процессы не наследуют event loop и соединения
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.diet_plan.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=warm_up,
+        )
+    return _pool
+
+
+async def start_diet_plan_pool() -> None:
+    """
+    Starts the diet plan worker processes and waits until they are ready.
+
+    Every worker is spawned and initialized by `warm_up` at application
+    startup, so the first requests do not spend their time budget on starting
+    a process. A failure is logged and swallowed: the pool is then started
+    again by the first request.
+
+    :return: None
+    """
+    pool = _get_pool()
+    loop = asyncio.get_running_loop()
+    try:
+        # Задач столько же, сколько процессов: пул запускает их все сразу
+        await asyncio.gather(
+            *(
+                loop.run_in_executor(pool, warm_up)
+                for _ in range(settings.diet_plan.workers)
+            )
+        )
+    except BrokenProcessPool as e:
+        log.error("Не удалось запустить процессы подбора рациона: %r", e)
+        shutdown_diet_plan_pool()
+
+
+def shutdown_diet_plan_pool() -> None:
+    """
+    Stops the diet plan worker processes if they were started.
+
+    :return: None
+    """
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _unavailable() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail={
+            "message": "Подбор рациона временно недоступен",
+        },
+    )
+
+
+def _invalid_plan(field: str, message: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail={
+            "message": "Невозможно подобрать рацион",
+            "details": {
+                "field": field,
+                "message": message,
+            },
+        },
+    )
+
+
+def _candidates(data: DietPlanRequest) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    nutrient_ids = [
+        slot_nutrient_id(slot) for slot in (ENERGY_VALUE, PROTEINS, FATS, CARBS)
+    ]
+    if None in nutrient_ids:
+        raise _unavailable()
+
+    product_ids, amounts = nutrient_matrix.nutrient_rows(nutrient_ids)
+    group_ids = similar_products_index.product_groups(product_ids)
+
+    # Продукты без калорийности не влияют на цель и только занимают место
+    mask = amounts[0] > 0
+    if data.include_products:
+        mask &= np.isin(product_ids, data.include_products)
+    if data.exclude_products:
+        mask &= ~np.isin(product_ids, data.exclude_products)
+    if data.include_groups:
+        mask &= np.isin(group_ids, data.include_groups)
+    if data.exclude_groups:
+        mask &= ~np.isin(group_ids, data.exclude_groups)
+
+    # Кандидаты упорядочены по id: план воспроизводим и ищется по id бинарно
+    rows = np.flatnonzero(mask)
+    rows = rows[np.argsort(product_ids[rows], kind="stable")]
+    return product_ids[rows], group_ids[rows], amounts[:, rows].T.copy()
+
+
+def _macro_targets(values: np.ndarray | list[float]) -> MacroTargets:
+    energy, proteins, fats, carbs = np.round(values, 1).tolist()
+    return MacroTargets(energy=energy, proteins=proteins, fats=fats, carbs=carbs)
+
+
+async def handle_diet_plan(
+    session: AsyncSession,
+    user_id: int,
+    data: DietPlanRequest,
+) -> DietPlanResponse:
+    """
+    Builds a day's plan of products and weights for the user's targets.
+
+    The targets are the stored energy value and protein, fat and carbohydrate
+    grams of the user's goal, read with the profile. The candidates are the
+    energy and macronutrient rows of the in-memory nutrient matrix, filtered
+    by the requested products and groups; the search itself runs in a worker
+    process within `settings.diet_plan.time_budget_ms`, so it never blocks the
+    event loop, and returns the best plan found in that time.
+
+    :param session: The current database session.
+    :param user_id: The ID of the user.
+    :param data: The number of products, the filters and the limits.
+    :raises HTTPException: 400 if the profile is incomplete or there are too
+                           few candidates, 503 if the in-memory indexes are
+                           not loaded or the search fails.
+    :return: The plan with its totals against the targets.
+    """
+    targets = (await get_user_profile(session, user_id)).targets
+    if targets is None:
+        raise _invalid_plan("profile", "Profile is not filled in")
+
+    if not nutrient_matrix.ready or not similar_products_index.ready:
+        raise _unavailable()
+
+    product_ids, group_ids, amounts = _candidates(data)
+    if len(product_ids) < data.products:
+        raise _invalid_plan(
+            "products", f"Only {len(product_ids)} products match the filters"
+        )
+
+    target = np.array((targets.energy, targets.proteins, targets.fats, targets.carbs))
+    budget = settings.diet_plan.time_budget_ms / 1000
+    problem = PlanProblem(
+        product_ids=product_ids,
+        group_ids=group_ids,
+        amounts=amounts,
+        target=target,
+        products=data.products,
+        max_per_group=data.max_per_group,
+        min_grams=MIN_PLAN_GRAMS,
+        max_grams=data.max_grams,
+        time_budget=budget,
+        seed=user_id,
+    )
+
+    start = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    try:
+        solution = await asyncio.wait_for(
+            loop.run_in_executor(_get_pool(), solve_diet_plan, problem),
+            budget + _POOL_OVERHEAD,
+        )
+    except (asyncio.TimeoutError, BrokenProcessPool) as e:
+        DIET_PLAN_LATENCY.labels("timeout").observe(time.perf_counter() - start)
+        log.error("Подбор рациона пользователя %s не завершился: %r", user_id, e)
+        if isinstance(e, BrokenProcessPool):
+            shutdown_diet_plan_pool()
+        raise _unavailable()
+    DIET_PLAN_LATENCY.labels(
+        "within" if solution.within_targets else "outside"
+    ).observe(time.perf_counter() - start)
+
+    if not solution.product_ids:
+        raise _invalid_plan(
+            "max_per_group", "Not enough product groups match the filters"
+        )
+
+    products = await get_product_suggestions(session, solution.product_ids)
+    rows = np.searchsorted(product_ids, solution.product_ids)
+    portions = amounts[rows] * (np.array(solution.grams)[:, None] / BASE_GRAMS)
+
+    return DietPlanResponse(
+        target=_macro_targets(target),
+        totals=_macro_targets(solution.totals),
+        within_targets=solution.within_targets,
+        items=[
+            DietPlanItem(
+                **products[product_id].model_dump(),
+                grams=grams,
+                energy=round(energy, 1),
+                proteins=round(proteins, 1),
+                fats=round(fats, 1),
+                carbs=round(carbs, 1),
+            )
+            for product_id, grams, (energy, proteins, fats, carbs) in zip(
+                solution.product_ids, solution.grams, portions.tolist()
+            )
+            if product_id in products
+        ],
+    )
@@ -0,0 +1,57 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.app.core.logger import get_logger
+from src.app.core.utils.text import normalize_title
+from src.app.models import HouseholdMeasure
+
+log = get_logger("household_measure_service")
+
+# (id продукта или None для общей меры, нормализованное название) -> граммы;
+# заменяется целиком при перезагрузке
+_household_measures: dict[tuple[int | None, str], float] = {}
+
+
+def resolve_household_measure(product_id: int, name: str) -> float | None:
+    """
+    Converts a household measure of a product to grams.
+
+    A measure defined for the product (e.g. "штука" of an apple) takes
+    precedence over the generic measure with the same name.
+
+    :param product_id: The product id.
+    :param name: The measure name.
+    :return: The weight of one measure in grams, or None if it is unknown.
+    """
+    key = normalize_title(name)
+    grams = _household_measures.get((product_id, key))
+    if grams is None:
+        grams = _household_measures.get((None, key))
+    return grams
+
+
+async def load_household_measures(session: AsyncSession) -> int:
+    """
+    Reloads the in-memory measure table from the `household_measures` table.
+
+    Like product aliases, the table is small and reloaded as a whole on every
+    catalog change.
+
+    :param session: The current database session.
+    :return: The number of loaded measures.
+    """
+    global _household_measures
+    result = await session.execute(
+        select(
+            HouseholdMeasure.product_id,
+            HouseholdMeasure.name,
+            HouseholdMeasure.grams,
+        )
+    )
+    _household_measures = {
+        (product_id, normalize_title(name)): grams
+        for product_id, name, grams in result.tuples()
+    }
+
+    log.info("Household measures loaded: %s", len(_household_measures))
+    return len(_household_measures)
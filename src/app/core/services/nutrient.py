@@ -0,0 +1,60 @@
+from typing import Iterable
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.app.core.logger import get_logger
+from src.app.core.services.daily_value import build_daily_values
+from src.app.core.utils.nutrient_dispatch import nutrient_dispatch
+from src.app.models import Nutrient
+
+log = get_logger("nutrient_service")
+
+
+async def build_nutrient_dispatch(
+    session: AsyncSession,
+    version: int | None = None,
+) -> None:
+    """
+    Reloads the process-wide nutrient dictionary used by the product mapping.
+
+    The daily value reference vectors, which are matched to the nutrients by
+    name, are rebuilt with it.
+
+    :param session: The current database session.
+    :param version: The current catalog version.
+    :return: None
+    """
+    result = await session.execute(
+        select(Nutrient.id, Nutrient.name, Nutrient.unit, Nutrient.category)
+    )
+    nutrient_dispatch.load(result.tuples(), version)
+    build_daily_values()
+
+    log.info("Nutrient dispatch table built: %s nutrients", len(nutrient_dispatch))
+
+
+async def ensure_nutrient_dispatch(
+    session: AsyncSession,
+    version: int | None = None,
+    nutrient_ids: Iterable[int] = (),
+) -> None:
+    """
+    Reloads the nutrient dictionary if it is stale.
+
+    The dictionary is reloaded when it was loaded at another catalog version
+    (processes that do not listen to catalog changes, like workers, pass the
+    version read from Redis) or when it lacks some of `nutrient_ids`.
+
+    :param session: The current database session.
+    :param version: The current catalog version, None to skip the check.
+    :param nutrient_ids: The nutrient ids that are about to be mapped.
+    :return: None
+    """
+    routes = nutrient_dispatch.routes
+    if (
+        not routes
+        or (version is not None and version != nutrient_dispatch.version)
+        or any(nutrient_id not in routes for nutrient_id in nutrient_ids)
+    ):
+        await build_nutrient_dispatch(session, version)
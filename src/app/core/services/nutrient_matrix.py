@@ -0,0 +1,98 @@
+import time
+from typing import Iterable
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.app.core.logger import get_logger
+from src.app.core.utils.nutrient_dispatch import (
+    ENERGY_VALUE,
+    OP_SET,
+    nutrient_dispatch,
+)
+from src.app.core.utils.nutrient_matrix import NutrientMatrix
+from src.app.models import ProductNutrient
+
+log = get_logger("nutrient_matrix_service")
+
+nutrient_matrix = NutrientMatrix()
+
+
+def slot_nutrient_id(slot: int) -> int | None:
+    """
+    Returns the id of the nutrient filling a scalar slot of the response.
+
+    The energy value is preferably taken in kcal.
+
+    :param slot: The scalar slot, e.g. `PROTEINS` or `ENERGY_VALUE`.
+    :return: The nutrient id, or None if no nutrient fills the slot.
+    """
+    candidates = [
+        (nutrient_id, route.unit)
+        for nutrient_id, route in nutrient_dispatch.routes.items()
+        if route is not None and route.op == OP_SET and route.slot == slot
+    ]
+    if slot == ENERGY_VALUE:
+        for nutrient_id, unit in candidates:
+            if "ккал" in unit.lower():
+                return nutrient_id
+    return candidates[0][0] if candidates else None
+
+
+async def build_nutrient_matrix(session: AsyncSession) -> None:
+    """
+    Loads the amounts of every product nutrient into the nutrient matrix.
+
+    The nutrient dictionary must be loaded first: it defines which nutrient is
+    the energy value used by per-100-kcal queries.
+
+    :param session: The current database session.
+    :return: None
+    """
+    start = time.perf_counter()
+    result = await session.execute(
+        select(
+            ProductNutrient.product_id,
+            ProductNutrient.nutrient_id,
+            ProductNutrient.amount,
+        )
+    )
+    nutrient_matrix.rebuild(result.tuples(), slot_nutrient_id(ENERGY_VALUE))
+    log.info(
+        "Nutrient matrix built: %s products in %.1f ms",
+        len(nutrient_matrix),
+        (time.perf_counter() - start) * 1000,
+    )
+
+
+async def refresh_nutrient_matrix(
+    session: AsyncSession,
+    product_ids: Iterable[int],
+) -> None:
+    """
+    Re-reads the nutrients of the given products into the nutrient matrix.
+
+    Products without nutrients (including deleted ones) are removed.
+
+    :param session: The current database session.
+    :param product_ids: The ids of the changed products.
+    :return: None
+    """
+    product_ids = set(product_ids)
+    result = await session.execute(
+        select(
+            ProductNutrient.product_id,
+            ProductNutrient.nutrient_id,
+            ProductNutrient.amount,
+        ).where(ProductNutrient.product_id.in_(product_ids))
+    )
+    amounts: dict[int, list[tuple[int, float]]] = {}
+    for product_id, nutrient_id, amount in result.tuples():
+        amounts.setdefault(product_id, []).append((nutrient_id, amount))
+
+    for product_id in product_ids:
+        if product_id in amounts:
+            nutrient_matrix.upsert(product_id, amounts[product_id])
+        else:
+            nutrient_matrix.remove(product_id)
+    nutrient_matrix.energy_nutrient_id = slot_nutrient_id(ENERGY_VALUE)
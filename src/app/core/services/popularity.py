@@ -0,0 +1,86 @@
+from redis.asyncio import RedisError
+from sqlalchemy import bindparam, case, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.app.core.logger import get_logger
+from src.app.core.redis import redis_client
+from src.app.core.services.catalog import publish_ranking_changes
+from src.app.models import Product
+
+log = get_logger("popularity_service")
+
+PRODUCT_VIEWS_KEY = "product:views"
+# Просмотры, забранные задачей, до успешного коммита в БД
+PRODUCT_VIEWS_PENDING_KEY = "product:views:pending"
+
+# Доля популярности, сохраняемая при каждом пересчёте
+POPULARITY_DECAY = 0.9
+# Популярность ниже порога обнуляется и больше не затухает
+POPULARITY_EPSILON = 0.01
+
+
+async def record_product_view(product_id: int) -> None:
+    """
+    Counts a view of the product detail page.
+
+    Views are accumulated in a Redis hash and folded into `Product.popularity`
+    by the background job, so the request path does a single HINCRBY. Redis
+    errors are logged and ignored.
+
+    :param product_id: The id of the viewed product.
+    :return: None
+    """
+    try:
+        await redis_client.hincrby(PRODUCT_VIEWS_KEY, str(product_id), 1)
+    except RedisError as e:
+        log.error("Redis error recording product view: %s", e)
+
+
+async def update_product_popularity(session: AsyncSession) -> int:
+    """
+    Folds the accumulated views into the precomputed popularity column.
+
+    The view counters are moved to a pending key and removed only after the
+    database commit, so a failed run leaves them for the next one. Popularity
+    is decayed by `POPULARITY_DECAY` only on the products that still have
+    some: values below `POPULARITY_EPSILON` drop to zero, and the rest of the
+    catalog is never rewritten. The new views are added on top.
+
+    Popularity is part of the search rank but not of the catalog, so the
+    ranking generation is bumped afterwards instead of the catalog version.
+
+    :param session: The current database session.
+    :return: The number of products that received views.
+    """
+    # Если предыдущий запуск не дошёл до коммита, сначала учитываются его
+    # просмотры, а новые ждут следующего запуска
+    if await redis_client.exists(PRODUCT_VIEWS_KEY):
+        await redis_client.renamenx(PRODUCT_VIEWS_KEY, PRODUCT_VIEWS_PENDING_KEY)
+    views = await redis_client.hgetall(PRODUCT_VIEWS_PENDING_KEY)
+
+    table = Product.__table__
+    decayed = table.c.popularity * POPULARITY_DECAY
+    result = await session.execute(
+        update(table)
+        .where(table.c.popularity > 0)
+        .values(popularity=case((decayed < POPULARITY_EPSILON, 0.0), else_=decayed))
+    )
+    changed = result.rowcount > 0
+    if views:
+        await session.execute(
+            update(table)
+            .where(table.c.id == bindparam("product_id"))
+            .values(popularity=table.c.popularity + bindparam("views")),
+            [
+                {"product_id": int(product_id), "views": int(count)}
+                for product_id, count in views.items()
+            ],
+        )
+        changed = True
+
+    await session.commit()
+    await redis_client.delete(PRODUCT_VIEWS_PENDING_KEY)
+    if changed:
+        await publish_ranking_changes()
+
+    return len(views)
@@ -1,19 +1,443 @@
+import time
+from datetime import date
+from typing import NamedTuple
+
+import numpy as np
+import orjson
 from fastapi import HTTPException, status
-from sqlalchemy import select, func, or_
+from markupsafe import Markup
+from sqlalchemy import (
+    ColumnElement,
+    Integer,
+    Select,
+    String,
+    and_,
+    case,
+    func,
+    literal,
+    or_,
+    select,
+    true,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, aggregate_order_by, insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import joinedload, selectinload
 
+from src.app.core.config import settings
 from src.app.core.logger import get_logger
-from src.app.models import Product, PendingProduct, ProductNutrient
+from src.app.core.metrics import (
+    NUTRIENT_FILTER_LATENCY,
+    PORTION_SCALING_LATENCY,
+    PRODUCT_DETAILS_BATCH_LATENCY,
+    PRODUCT_DETAILS_BATCH_PRODUCTS,
+    PRODUCT_DETAILS_LATENCY,
+    PRODUCT_FRAGMENT_CACHE_REQUESTS,
+    SEARCH_BRANCH_LATENCY,
+    SIMILAR_PRODUCTS_LATENCY,
+)
+from src.app.core.services.autocomplete import autocomplete_index
+from src.app.core.services.catalog import (
+    fetch_catalog_version,
+    get_catalog_version,
+    get_ranking_version,
+)
+from src.app.core.services.daily_value import daily_value_key
+from src.app.core.services.household_measure import resolve_household_measure
+from src.app.core.services.nutrient import ensure_nutrient_dispatch
+from src.app.core.services.nutrient_matrix import nutrient_matrix
+from src.app.core.services.product_alias import resolve_product_alias
+from src.app.core.services.similar_products import similar_products_index
+from src.app.core.services.product_details import (
+    ProductDetailsMeta,
+    get_product_details_snapshot,
+    get_product_details_snapshots,
+    product_details_digest,
+    pop_dirty_product_details,
+    get_product_details_generations,
+    store_product_details_snapshots,
+)
+from src.app.models import Product, PendingProduct, ProductGroup, ProductNutrient
 from src.app.schemas.product import (
+    DEFAULT_SIMILAR_PRODUCTS,
+    NutrientFilterItem,
+    NutrientFilterResponse,
+    PortionDetailResponse,
+    PortionSpec,
     ProductDetailResponse,
+    ProductNutrientFilter,
+    ProductSearchPage,
     ProductSuggestion,
+    SimilarProductItem,
     UnifiedProductResponse,
 )
-from src.app.core.utils import map_to_schema
+from src.app.schemas.user import UserResponse
+from src.app.core.utils import map_nutrients_to_schema, templates
+from src.app.core.utils.fragment_cache import FragmentCache
+from src.app.core.utils.http_cache import make_etag, validator_headers
+from src.app.core.utils.nutrient_matrix import NutrientRange
+from src.app.core.utils.portion import (
+    BASE_GRAMS,
+    grams_per_energy,
+    scale_portions,
+)
+from src.app.core.utils.templates import template_version
+from src.app.core.utils.text import normalize_title
+from src.app.core.utils.search_cursor import (
+    SearchCursor,
+    decode_search_cursor,
+    encode_search_cursor,
+)
 
 log = get_logger("product_services")
 
+# Веса гибридного ранжирования поисковых подсказок
+RANK_TS_WEIGHT = 1.0
+RANK_TRGM_WEIGHT = 1.0
+RANK_PREFIX_BONUS = 0.5
+RANK_POPULARITY_WEIGHT = 0.1
+# Точное совпадение в постраничной выдаче всегда идёт первым
+RANK_EXACT_BONUS = 100.0
+
+PRODUCT_BODY_TEMPLATE = "partials/product_body.html"
+SIMILAR_PRODUCTS_TEMPLATE = "partials/similar_products.html"
+
+
+class ProductFragment(NamedTuple):
+    title: str
+    body: Markup
+
+
+product_fragments: FragmentCache[ProductFragment] = FragmentCache(
+    settings.cache.product_fragments
+)
+# Блоки похожих продуктов: зависят от индекса, а не от содержимого продукта
+similar_fragments: FragmentCache[Markup] = FragmentCache(
+    settings.cache.product_fragments
+)
+
+
+def _select_product_details() -> Select:
+    # Нутриенты продукта агрегируются в пары массивов (id, количество):
+    # справочник нутриентов берётся из памяти процесса
+    present = ProductNutrient.nutrient_id.is_not(None)
+    return (
+        select(
+            Product.id,
+            Product.title,
+            ProductGroup.name.label("group_name"),
+            func.array_agg(
+                aggregate_order_by(
+                    ProductNutrient.nutrient_id, ProductNutrient.nutrient_id
+                )
+            )
+            .filter(present)
+            .label("nutrient_ids"),
+            func.array_agg(
+                aggregate_order_by(ProductNutrient.amount, ProductNutrient.nutrient_id)
+            )
+            .filter(present)
+            .label("amounts"),
+        )
+        .join(ProductGroup, Product.group_id == ProductGroup.id)
+        .outerjoin(ProductNutrient, ProductNutrient.product_id == Product.id)
+        .group_by(Product.id, ProductGroup.name)
+        .order_by(Product.id)
+    )
+
+
+async def _load_product_details(
+    session: AsyncSession,
+    condition,
+    catalog_version: int | None = None,
+) -> dict[int, ProductDetailResponse]:
+    """
+    Loads and maps the details of the products matching a condition.
+
+    One query returns the product columns with `(nutrient_id, amount)` arrays;
+    nutrient names, units and categories come from the in-process nutrient
+    dictionary, so no `Nutrient` rows or ORM objects are loaded.
+
+    :param session: The current database session.
+    :param condition: The filter condition selecting the products.
+    :param catalog_version: The catalog version to check the nutrient
+                            dictionary against, None to rely on the listener.
+    :return: The product details by product id, in id order.
+    """
+    result = await session.execute(_select_product_details().where(condition))
+    rows = result.all()
+
+    await ensure_nutrient_dispatch(
+        session,
+        catalog_version,
+        {nutrient_id for row in rows for nutrient_id in row.nutrient_ids or ()},
+    )
+    return {
+        row.id: map_nutrients_to_schema(
+            row.id,
+            row.title,
+            row.group_name,
+            zip(row.nutrient_ids or (), row.amounts or ()),
+        )
+        for row in rows
+    }
+
+
+async def _load_product_detail(
+    session: AsyncSession,
+    condition,
+) -> ProductDetailResponse | None:
+    """
+    Loads and maps the details of a single product.
+
+    :param session: The current database session.
+    :param condition: The filter condition identifying the product.
+    :return: The product details, or None if the product is not found.
+    """
+    details = await _load_product_details(session, condition)
+    return next(iter(details.values()), None)
+
+
+def _search_in_index(query: str) -> tuple[int | None, list[int]]:
+    """
+    Looks the query up in the in-memory autocomplete index.
+
+    :param query: The normalized search query.
+    :return: The id of the exact match, if any, and the ids of every matching
+             product otherwise, to be ranked by `select_index_candidates`.
+             Both are empty when the index is not loaded.
+    """
+    if not autocomplete_index.ready:
+        return None, []
+
+    indexed = autocomplete_index.exact(query)
+    if indexed is not None:
+        return indexed.id, []
+
+    return None, sorted(autocomplete_index.match(query, limit=5))
+
+
+def _search_terms(
+    query: ColumnElement[str],
+) -> tuple[ColumnElement[bool], ColumnElement[float], ColumnElement[bool]]:
+    """
+    Builds the shared expressions of the search statements.
+
+    :param query: The normalized search query as an SQL expression.
+    :return: The exact match flag, the hybrid rank and the match condition.
+    """
+    tsquery = func.websearch_to_tsquery("russian", query)
+    is_exact = Product.normalized_title == query
+    rank = (
+        RANK_TS_WEIGHT * func.ts_rank(Product.search_vector, tsquery)
+        + RANK_TRGM_WEIGHT * func.similarity(Product.normalized_title, query)
+        + case(
+            (func.starts_with(Product.normalized_title, query), RANK_PREFIX_BONUS),
+            else_=0.0,
+        )
+        + RANK_POPULARITY_WEIGHT * func.ln(1 + Product.popularity)
+    )
+    matches = or_(
+        is_exact,
+        Product.search_vector.op("@@")(tsquery),
+        Product.normalized_title.contains(query),
+    )
+    return is_exact, rank, matches
+
+
+def select_search_candidates(
+    query: str | ColumnElement[str],
+    limit: int = 5,
+) -> Select:
+    """
+    Builds the lean search statement returning an exact match and suggestions.
+
+    Only `id`, `title`, `group_name`, an `is_exact` flag and the `rank` are
+    projected, and the exact match, if any, is sorted first. The remaining rows
+    are ordered by a hybrid score combining full-text rank, trigram similarity
+    of the title, a bonus for titles starting with the query and the
+    precomputed product popularity. Nutrients are not loaded. The query may be
+    a column of an outer statement, which lets the batch search run this
+    statement as a LATERAL subquery.
+
+    :param query: The normalized search query or a column holding it.
+    :param limit: The maximum number of rows to return.
+    :return: The select statement.
+    """
+    if isinstance(query, str):
+        query = literal(query)
+    is_exact, rank, matches = _search_terms(query)
+
+    return (
+        select(
+            Product.id,
+            Product.title,
+            ProductGroup.name.label("group_name"),
+            is_exact.label("is_exact"),
+            rank.label("rank"),
+        )
+        .join(ProductGroup, Product.group_id == ProductGroup.id)
+        .where(matches)
+        .order_by(is_exact.desc(), rank.desc(), Product.id)
+        .limit(limit)
+    )
+
+
+def select_search_page(
+    query: str,
+    limit: int,
+    after: tuple[float, int] | None = None,
+) -> Select:
+    """
+    Builds a keyset-paginated search statement.
+
+    Rows are ordered by `(rank DESC, id ASC)`, where the exact match gets
+    `RANK_EXACT_BONUS` on top of the hybrid rank so it still comes first.
+    The rank is computed once per matching row in a materialized CTE, and a
+    page after a cursor is selected with a keyset predicate instead of OFFSET,
+    so deep pages do not sort and discard the preceding rows.
+
+    :param query: The normalized search query.
+    :param limit: The maximum number of rows to return.
+    :param after: The `(rank, id)` of the last row of the previous page.
+    :return: The select statement.
+    """
+    is_exact, rank, matches = _search_terms(literal(query))
+    # Ранг считается один раз на строку в материализованном CTE
+    ranked = (
+        select(
+            Product.id,
+            Product.title,
+            ProductGroup.name.label("group_name"),
+            (rank + case((is_exact, RANK_EXACT_BONUS), else_=0.0)).label("rank"),
+        )
+        .join(ProductGroup, Product.group_id == ProductGroup.id)
+        .where(matches)
+        .cte("ranked")
+        .prefix_with("MATERIALIZED")
+    )
+
+    stmt = select(ranked).order_by(ranked.c.rank.desc(), ranked.c.id).limit(limit)
+    if after is not None:
+        after_rank, after_id = after
+        stmt = stmt.where(
+            or_(
+                ranked.c.rank < after_rank,
+                and_(ranked.c.rank == after_rank, ranked.c.id > after_id),
+            )
+        )
+    return stmt
+
+
+def select_index_candidates(
+    queries: list[str],
+    candidates: list[list[int]],
+    limit: int = 5,
+) -> Select:
+    """
+    Builds one statement ranking the autocomplete index matches of queries.
+
+    The in-memory index only finds the products matching each query; they are
+    ranked here by the same hybrid score as `select_search_candidates`, looked
+    up by primary key instead of the full-text match, and the best `limit` of
+    every query are returned. The candidates of all queries are passed as two
+    flat arrays, so a batch costs a single round trip.
+
+    :param queries: The normalized search queries.
+    :param candidates: The ids of the matching products of every query.
+    :param limit: The maximum number of rows per query.
+    :return: The select statement with an extra `ord` column (1-based position).
+    """
+    ords = [
+        position
+        for position, product_ids in enumerate(candidates, 1)
+        for _ in product_ids
+    ]
+    batch = (
+        func.unnest(literal(queries, ARRAY(String)))
+        .table_valued("query", with_ordinality="ord")
+        .render_derived()
+        .alias("batch")
+    )
+    matches = (
+        func.unnest(
+            literal(ords, ARRAY(Integer)),
+            literal([pid for ids in candidates for pid in ids], ARRAY(Integer)),
+        )
+        .table_valued("ord", "product_id")
+        .render_derived()
+        .alias("matches")
+    )
+    _, rank, _ = _search_terms(batch.c.query)
+
+    # Ранг считается один раз на строку, лучшие строки запроса — по номеру
+    scored = (
+        select(
+            batch.c.ord,
+            Product.id,
+            Product.title,
+            ProductGroup.name.label("group_name"),
+            rank.label("rank"),
+        )
+        .select_from(matches)
+        .join(batch, batch.c.ord == matches.c.ord)
+        .join(Product, Product.id == matches.c.product_id)
+        .join(ProductGroup, Product.group_id == ProductGroup.id)
+        .subquery("scored")
+    )
+    numbered = select(
+        scored,
+        func.row_number()
+        .over(
+            partition_by=scored.c.ord,
+            order_by=(scored.c.rank.desc(), scored.c.id),
+        )
+        .label("position"),
+    ).subquery("numbered")
+
+    return (
+        select(
+            numbered.c.ord,
+            numbered.c.id,
+            numbered.c.title,
+            numbered.c.group_name,
+            numbered.c.rank,
+        )
+        .where(numbered.c.position <= limit)
+        .order_by(numbered.c.ord, numbered.c.rank.desc(), numbered.c.id)
+    )
+
+
+def select_batch_search_candidates(queries: list[str], limit: int = 5) -> Select:
+    """
+    Builds one statement searching for every query of a batch.
+
+    The queries are unnested with their ordinal position and each of them is
+    matched by `select_search_candidates` in a LATERAL subquery, so the whole
+    batch costs a single round trip.
+
+    :param queries: The normalized search queries.
+    :param limit: The maximum number of rows per query.
+    :return: The select statement with an extra `ord` column (1-based position).
+    """
+    batch = (
+        func.unnest(literal(queries, ARRAY(String)))
+        .table_valued("query", with_ordinality="ord")
+        .render_derived()
+        .alias("batch")
+    )
+    candidates = select_search_candidates(batch.c.query, limit).lateral("candidates")
+
+    return (
+        select(batch.c.ord, *candidates.c)
+        .select_from(batch)
+        .join(candidates, true())
+        .order_by(
+            batch.c.ord,
+            candidates.c.is_exact.desc(),
+            candidates.c.rank.desc(),
+            candidates.c.id,
+        )
+    )
+
 
 async def handle_product_search(
     session: AsyncSession,
@@ -27,6 +451,14 @@ async def handle_product_search(
     against the product titles in the database. It returns a `UnifiedProductResponse`
     containing an exact match if found, or suggests similar products.
 
+    Product aliases (colloquial names and abbreviations) are resolved first
+    from an in-memory map and are returned as exact matches. When the
+    in-memory autocomplete index is loaded, it finds the exact match or every
+    matching product, and the matches are ranked by the hybrid score with one
+    primary-key query. The SQL fallback finds the exact match and the
+    suggestions with a single column-projected query; nutrients are loaded
+    only for an exact match.
+
     The function takes a query string and a boolean flag indicating whether to skip
     suggestions.
 
@@ -44,110 +476,273 @@ async def handle_product_search(
     :return: A `UnifiedProductResponse` object with the search results.
     """
     response = UnifiedProductResponse()
-    query = query.strip().lower()
-
-    exact_match = await session.execute(
-        select(Product)
-        .options(
-            selectinload(Product.product_groups),
-            selectinload(Product.nutrient_associations).selectinload(
-                ProductNutrient.nutrients
-            ),
-        )
-        .where(func.lower(Product.title) == query)
-    )
-    product = exact_match.unique().scalar_one_or_none()
+    query = normalize_title(query)
 
-    if product:
-        # log.info("Точное совпадение: %s", product.title)
-        response.exact_match = map_to_schema(product)
-        return response
+    # Синоним сразу даёт точное совпадение без полнотекстового поиска
+    alias_id = resolve_product_alias(query)
+    if alias_id is not None:
+        with SEARCH_BRANCH_LATENCY.labels("alias").time():
+            product = await _load_product_detail(session, Product.id == alias_id)
+        if product:
+            response.exact_match = product
+            return response
 
-    # Поиск предложений
+    # Быстрый путь: in-memory индекс автодополнения, SQL остаётся запасным
     if not confirmed:
-        # log.info("Поиск предложений: %s", query)
-        suggestions = await session.execute(
-            select(Product)
-            .options(
-                selectinload(Product.product_groups),
-                selectinload(Product.nutrient_associations).selectinload(
-                    ProductNutrient.nutrients
-                ),
-            )
-            .where(
-                or_(
-                    Product.search_vector.op("@@")(
-                        func.websearch_to_tsquery("russian", query)
-                    ),
-                    Product.title.ilike(f"%{query}%"),
+        with SEARCH_BRANCH_LATENCY.labels("index").time():
+            exact_id, candidate_ids = _search_in_index(query)
+        if exact_id is not None:
+            with SEARCH_BRANCH_LATENCY.labels("exact").time():
+                product = await _load_product_detail(session, Product.id == exact_id)
+            if product:
+                response.exact_match = product
+                return response
+        elif candidate_ids:
+            with SEARCH_BRANCH_LATENCY.labels("suggestions").time():
+                result = await session.execute(
+                    select_index_candidates([query], [candidate_ids])
                 )
-            )
-            .order_by(
-                func.ts_rank(
-                    Product.search_vector,
-                    func.websearch_to_tsquery("russian", query),
-                )
-            )
-            .limit(5)
-        )
-        suggestions = suggestions.unique().scalars().all()
-
-        if suggestions:
-            # log.info("Загрузка предложений: %s", query)
+                rows = result.all()
             response.suggestions = [
-                ProductSuggestion(
-                    id=p.id, title=p.title, group_name=p.product_groups.name
-                )
-                for p in suggestions
+                ProductSuggestion(id=row.id, title=row.title, group_name=row.group_name)
+                for row in rows
             ]
             return response
 
-    if confirmed:
-        exists = await session.execute(
-            select(PendingProduct).where(func.lower(PendingProduct.name) == query)
+    if not confirmed:
+        # Точное совпадение и предложения одним запросом, только нужные колонки
+        with SEARCH_BRANCH_LATENCY.labels("suggestions").time():
+            candidates = await session.execute(select_search_candidates(query))
+            rows = candidates.all()
+
+        if rows and rows[0].is_exact:
+            with SEARCH_BRANCH_LATENCY.labels("exact").time():
+                product = await _load_product_detail(session, Product.id == rows[0].id)
+            if product:
+                # log.info("Точное совпадение: %s", product.title)
+                response.exact_match = product
+                return response
+
+        # log.info("Загрузка предложений: %s", query)
+        response.suggestions = [
+            ProductSuggestion(id=row.id, title=row.title, group_name=row.group_name)
+            for row in rows
+        ]
+        return response
+
+    with SEARCH_BRANCH_LATENCY.labels("exact").time():
+        product = await _load_product_detail(session, Product.normalized_title == query)
+    if product:
+        response.exact_match = product
+        return response
+
+    # Уникальный индекс по нормализованному названию отсекает дубликаты
+    with SEARCH_BRANCH_LATENCY.labels("pending").time():
+        added = await session.execute(
+            insert(PendingProduct)
+            .values(name=query)
+            .on_conflict_do_nothing(index_elements=[PendingProduct.normalized_name])
+            .returning(PendingProduct.id)
         )
-        if not exists.scalar():
+        if added.scalar() is not None:
             # log.info("Добавление в очередь: %s", query)
-            new_pending = PendingProduct(name=query)
-            session.add(new_pending)
-            await session.commit()
             response.pending_added = True
+        await session.commit()
 
     return response
 
 
-async def handle_product_details(
+async def handle_batch_product_search(
     session: AsyncSession,
-    product_id: int,
-) -> ProductDetailResponse:
+    queries: list[str],
+) -> list[UnifiedProductResponse]:
     """
-    Retrieves the details of a product by its ID.
+    Searches for products for every query of a batch.
 
-    This function queries the database for a product with the given `product_id`.
-    It uses eager loading to fetch related product groups and nutrient associations
-    for efficient data retrieval. If the product is found, it is mapped to a
-    `ProductDetailResponse` schema and returned. If the product is not found, an
-    HTTP 404 exception is raised. In case of other exceptions, an HTTP 500 exception
-    is raised with the error details.
+    Each query is matched the same way as an unconfirmed
+    `handle_product_search` call: aliases and the autocomplete index are
+    consulted first, the index matches of all queries are ranked by one
+    statement, and the remaining queries are resolved together by one LATERAL
+    search statement. Products of all exact matches are then loaded with a
+    single query.
 
     :param session: The current database session.
-    :param product_id: The unique identifier of the product to retrieve.
-    :return: A `ProductDetailResponse` object containing the product details.
+    :param queries: The search query strings.
+    :return: A `UnifiedProductResponse` per query, in the order of `queries`.
     """
-    # log.info("Start product detail handler")
-    product = await session.execute(
-        select(Product)
-        .options(
-            joinedload(Product.product_groups),
-            joinedload(Product.nutrient_associations).joinedload(
-                ProductNutrient.nutrients
-            ),
+    queries = [normalize_title(query) for query in queries]
+    responses = [UnifiedProductResponse() for _ in queries]
+    exact_ids: dict[int, int] = {}
+    indexed: dict[int, list[int]] = {}
+    unresolved: list[int] = []
+
+    for position, query in enumerate(queries):
+        exact_id = resolve_product_alias(query)
+        if exact_id is not None:
+            exact_ids[position] = exact_id
+            continue
+
+        exact_id, candidate_ids = _search_in_index(query)
+        if exact_id is not None:
+            exact_ids[position] = exact_id
+        elif candidate_ids:
+            indexed[position] = candidate_ids
+        else:
+            unresolved.append(position)
+
+    if indexed:
+        positions = list(indexed)
+        ranked = await session.execute(
+            select_index_candidates(
+                [queries[i] for i in positions], list(indexed.values())
+            )
         )
-        .where(Product.id == product_id)
+        for row in ranked:
+            responses[positions[row.ord - 1]].suggestions.append(
+                ProductSuggestion(id=row.id, title=row.title, group_name=row.group_name)
+            )
+
+    if unresolved:
+        candidates = await session.execute(
+            select_batch_search_candidates([queries[i] for i in unresolved])
+        )
+        for row in candidates:
+            position = unresolved[row.ord - 1]
+            if position in exact_ids:
+                continue
+            if row.is_exact:
+                exact_ids[position] = row.id
+                responses[position].suggestions = []
+            else:
+                responses[position].suggestions.append(
+                    ProductSuggestion(
+                        id=row.id, title=row.title, group_name=row.group_name
+                    )
+                )
+
+    if exact_ids:
+        products = await _load_product_details(
+            session, Product.id.in_(set(exact_ids.values()))
+        )
+        for position, product_id in exact_ids.items():
+            responses[position].exact_match = products.get(product_id)
+
+    return responses
+
+
+async def handle_paginated_product_search(
+    session: AsyncSession,
+    query: str,
+    limit: int,
+    cursor: str | None = None,
+) -> ProductSearchPage:
+    """
+    Returns one page of the ranked search results.
+
+    Pages are selected by keyset over `(rank, id)` rather than OFFSET. The
+    cursor carries the catalog version and the ranking generation the first
+    page was ranked against; the version is bumped whenever titles change and
+    the generation whenever popularity is updated, so a cursor from an older
+    version or generation is rejected with 409 and the client restarts from
+    the first page instead of getting skipped or repeated rows.
+
+    :param session: The current database session.
+    :param query: The search query string.
+    :param limit: The page size.
+    :param cursor: The `next_cursor` of the previous page, None for the first one.
+    :return: A `ProductSearchPage` with the products and the next cursor.
+    """
+    query = normalize_title(query)
+    version = get_catalog_version()
+    ranking = get_ranking_version()
+    after = None
+
+    if cursor is not None:
+        try:
+            position = decode_search_cursor(query, cursor)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail={
+                    "message": "Некорректный курсор",
+                    "details": {
+                        "field": "cursor",
+                        "message": str(e),
+                    },
+                },
+            )
+        if position.catalog_version < version or position.ranking_version < ranking:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail={
+                    "message": "Результаты поиска устарели, начните поиск заново",
+                },
+            )
+        # Процесс мог ещё не получить новую версию каталога или ранжирования
+        version = position.catalog_version
+        ranking = position.ranking_version
+        after = (position.rank, position.product_id)
+
+    # Лишняя строка показывает, есть ли следующая страница
+    with SEARCH_BRANCH_LATENCY.labels("page").time():
+        result = await session.execute(select_search_page(query, limit + 1, after))
+        rows = result.all()
+
+    page = ProductSearchPage(
+        items=[
+            ProductSuggestion(id=row.id, title=row.title, group_name=row.group_name)
+            for row in rows[:limit]
+        ]
+    )
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        page.next_cursor = encode_search_cursor(
+            query, SearchCursor(version, ranking, last.rank, last.id)
+        )
+    return page
+
+
+async def _build_product_details(
+    session: AsyncSession,
+    product_ids: list[int],
+    catalog_version: int | None = None,
+) -> dict[int, bytes]:
+    details = await _load_product_details(
+        session, Product.id.in_(product_ids), catalog_version
     )
-    product = product.unique().scalar_one_or_none()
+    return {
+        product_id: orjson.dumps(detail.model_dump())
+        for product_id, detail in details.items()
+    }
+
+
+async def get_product_details_payload(
+    session: AsyncSession,
+    product_id: int,
+) -> bytes:
+    """
+    Returns the serialized details of a product.
+
+    The details are served from the precomputed snapshot, which costs a single
+    HGET. On a miss (a new product, or a snapshot not rebuilt yet) the product
+    is loaded with its nutrients, mapped and the snapshot is stored, unless
+    the product was invalidated while it was being loaded. Latency is
+    reported separately for warm and cold reads.
+
+    :param session: The current database session.
+    :param product_id: The unique identifier of the product to retrieve.
+    :raises HTTPException: If the product is not found.
+    :return: The `ProductDetailResponse` serialized with orjson.
+    """
+    start = time.perf_counter()
+    payload = await get_product_details_snapshot(product_id)
+    if payload is not None:
+        PRODUCT_DETAILS_LATENCY.labels("warm").observe(time.perf_counter() - start)
+        return payload
 
-    if not product:
+    generations = await get_product_details_generations([product_id])
+    snapshots = await _build_product_details(session, [product_id])
+    if product_id not in snapshots:
         log.error(
             "Продукт с id %s не найден",
             product_id,
@@ -160,4 +755,558 @@ async def handle_product_details(
             },
         )
 
-    return map_to_schema(product)
+    await store_product_details_snapshots(snapshots, generations)
+    PRODUCT_DETAILS_LATENCY.labels("cold").observe(time.perf_counter() - start)
+    return snapshots[product_id]
+
+
+async def get_product_details_batch_payload(
+    session: AsyncSession,
+    product_ids: list[int],
+) -> bytes:
+    """
+    Returns the serialized details of several products keyed by id.
+
+    Snapshots of all products are read with one HMGET; products without a
+    snapshot are loaded together with one query (and one pass over the
+    nutrient dictionary) and their snapshots are stored. The stored payloads
+    are spliced into the response as is, without parsing them. Unknown ids
+    are left out of the response.
+
+    :param session: The current database session.
+    :param product_ids: The ids of the products.
+    :return: A JSON object of `ProductDetailResponse` by product id.
+    """
+    start = time.perf_counter()
+    product_ids = list(dict.fromkeys(product_ids))
+    payloads = await get_product_details_snapshots(product_ids)
+    warm = len(payloads)
+
+    missing = [product_id for product_id in product_ids if product_id not in payloads]
+    if missing:
+        generations = await get_product_details_generations(missing)
+        snapshots = await _build_product_details(session, missing)
+        await store_product_details_snapshots(snapshots, generations)
+        payloads.update(snapshots)
+
+    PRODUCT_DETAILS_BATCH_PRODUCTS.labels("warm").inc(warm)
+    PRODUCT_DETAILS_BATCH_PRODUCTS.labels("cold").inc(len(payloads) - warm)
+    PRODUCT_DETAILS_BATCH_PRODUCTS.labels("missing").inc(
+        len(product_ids) - len(payloads)
+    )
+
+    body = b",".join(
+        b'"%d":%s' % (product_id, payloads[product_id])
+        for product_id in product_ids
+        if product_id in payloads
+    )
+    PRODUCT_DETAILS_BATCH_LATENCY.observe(time.perf_counter() - start)
+    return b"{" + body + b"}"
+
+
+async def rebuild_product_details(
+    session: AsyncSession,
+    batch_size: int = 500,
+) -> int:
+    """
+    Rebuilds the detail snapshots queued by catalog changes.
+
+    Products are rebuilt in batches, each loaded with one query. When a full
+    rebuild was requested, the whole catalog is walked in id order.
+
+    :param session: The current database session.
+    :param batch_size: The number of products loaded per query.
+    :return: The number of rebuilt snapshots.
+    """
+    rebuilt = 0
+    # Воркер не слушает изменения каталога, версию справочника сверяем сами
+    version = await fetch_catalog_version()
+    product_ids = await pop_dirty_product_details(batch_size)
+
+    if product_ids is None:
+        result = await session.scalars(select(Product.id).order_by(Product.id))
+        all_ids = result.all()
+        for i in range(0, len(all_ids), batch_size):
+            batch = all_ids[i : i + batch_size]
+            generations = await get_product_details_generations(batch)
+            snapshots = await _build_product_details(session, batch, version)
+            await store_product_details_snapshots(snapshots, generations)
+            rebuilt += len(snapshots)
+        return rebuilt
+
+    while product_ids:
+        generations = await get_product_details_generations(product_ids)
+        snapshots = await _build_product_details(session, product_ids, version)
+        await store_product_details_snapshots(snapshots, generations)
+        rebuilt += len(snapshots)
+        product_ids = await pop_dirty_product_details(batch_size)
+
+    return rebuilt
+
+
+async def load_product_amounts(
+    session: AsyncSession,
+    product_id: int,
+) -> tuple[str, dict[str, float]]:
+    """
+    Reads the title and the nutrient amounts of a product.
+
+    Used by writes that fold a product into stored totals (diary entries,
+    recipe ingredients): they read the catalog in their own transaction
+    rather than the in-memory matrix, which may lag behind it.
+
+    :param session: The current database session.
+    :param product_id: The product id.
+    :raises HTTPException: If the product is not found.
+    :return: The product title and its amounts per 100 g by nutrient id.
+    """
+    result = await session.execute(
+        select(Product.title, ProductNutrient.nutrient_id, ProductNutrient.amount)
+        .outerjoin(ProductNutrient, ProductNutrient.product_id == Product.id)
+        .where(Product.id == product_id)
+    )
+    rows = result.all()
+    if not rows:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={
+                "message": "Продукт не найден",
+                "details": {"product_id": product_id},
+            },
+        )
+
+    return rows[0].title, {
+        str(row.nutrient_id): row.amount for row in rows if row.nutrient_id is not None
+    }
+
+
+def product_page_headers(
+    meta: ProductDetailsMeta,
+    user: UserResponse | None,
+) -> dict[str, str]:
+    """
+    Builds the caching headers of a product page.
+
+    The strong ETag covers everything the page is rendered from: the content
+    version of the detail snapshot, the similar products index, whether and
+    as whom the user is logged in, what the user's daily value overlay
+    depends on, the year in the footer and the templates. The index is
+    represented by the shared catalog version it was last brought up to
+    date with, which every process reaches after applying the same change
+    notification, so the ETag does not depend on the process that answers.
+    The request nonce is not part of it: a 304 keeps the cached page together
+    with its cached CSP header.
+
+    :param meta: The content version of the product details.
+    :param user: The authenticated user, or None.
+    :return: The `ETag`, `Last-Modified` and `Cache-Control` headers.
+    """
+    etag = make_etag(
+        meta.digest,
+        similar_products_index.version,
+        user.id if user is not None else "",
+        daily_value_key(user),
+        date.today().year,
+        template_version("product_detail.html"),
+        template_version(PRODUCT_BODY_TEMPLATE),
+        template_version(SIMILAR_PRODUCTS_TEMPLATE),
+    )
+    return validator_headers(etag, meta.modified)
+
+
+def _product_fragment_key(product_id: int, meta: ProductDetailsMeta) -> tuple:
+    return (product_id, meta.digest, template_version(PRODUCT_BODY_TEMPLATE))
+
+
+async def _similar_products_fragment(session: AsyncSession, product_id: int) -> Markup:
+    key = (
+        product_id,
+        similar_products_index.version,
+        template_version(SIMILAR_PRODUCTS_TEMPLATE),
+    )
+    fragment = similar_fragments.get(key)
+    if fragment is None:
+        similar = await handle_similar_products(
+            session, product_id, DEFAULT_SIMILAR_PRODUCTS
+        )
+        fragment = Markup(
+            templates.get_template(SIMILAR_PRODUCTS_TEMPLATE).render(similar=similar)
+        )
+        similar_fragments.set(key, fragment)
+    return fragment
+
+
+async def get_product_page_fragment(
+    session: AsyncSession,
+    product_id: int,
+    meta: ProductDetailsMeta | None = None,
+) -> tuple[ProductFragment, ProductDetailsMeta]:
+    """
+    Returns the rendered, user-independent body of a product page.
+
+    The nutrient breakdown is rendered once per content version of the
+    product details and kept in the in-process fragment cache, so changes to
+    other products never evict it. The similar products block depends on the
+    whole catalog: it is cached separately under the version of the similar
+    products index, which follows the catalog version, and appended to the
+    breakdown. The page layout with the per-request values (user block, CSP
+    nonce, CSRF token) is rendered around the body.
+
+    :param session: The current database session.
+    :param product_id: The unique identifier of the product.
+    :param meta: The content version of the product details, if known.
+    :raises HTTPException: If the product is not found.
+    :return: The fragment and the content version it was rendered from.
+    """
+    fragment = None
+    if meta is not None:
+        fragment = product_fragments.get(_product_fragment_key(product_id, meta))
+    if fragment is not None:
+        PRODUCT_FRAGMENT_CACHE_REQUESTS.labels("hit").inc()
+    else:
+        payload = await get_product_details_payload(session, product_id)
+        product = ProductDetailResponse.model_validate_json(payload)
+        body = templates.get_template(PRODUCT_BODY_TEMPLATE).render(product=product)
+
+        # Версия совпадает с сохранённой вместе со снимком: digest того же payload
+        meta = meta or ProductDetailsMeta(
+            product_details_digest(payload), int(time.time())
+        )
+        fragment = ProductFragment(product.title, Markup(body))
+        product_fragments.set(_product_fragment_key(product_id, meta), fragment)
+        PRODUCT_FRAGMENT_CACHE_REQUESTS.labels("miss").inc()
+
+    similar = await _similar_products_fragment(session, product_id)
+    return fragment._replace(body=fragment.body + similar), meta
+
+
+async def handle_nutrient_filter(
+    session: AsyncSession,
+    data: ProductNutrientFilter,
+) -> NutrientFilterResponse:
+    """
+    Filters the catalog by nutrient amounts and returns the top products.
+
+    The query runs over the in-memory nutrient matrix instead of joining
+    `product_nutrients` once per filtered nutrient; titles of the returned
+    products come from the autocomplete index, with a primary key lookup for
+    products it does not know.
+
+    :param session: The current database session.
+    :param data: The nutrient ranges, the sort key and the number of products.
+    :raises HTTPException: 503 if the matrix is not loaded, 400 if the query
+                           cannot be answered.
+    :return: A `NutrientFilterResponse` with the number of matching products
+             and the top of them.
+    """
+    if not nutrient_matrix.ready:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail={
+                "message": "Фильтр по нутриентам временно недоступен",
+            },
+        )
+
+    try:
+        with NUTRIENT_FILTER_LATENCY.time():
+            total, matches = nutrient_matrix.query(
+                [NutrientRange(r.nutrient_id, r.min, r.max) for r in data.ranges],
+                sort_by=data.sort_by,
+                per_energy=data.per_energy,
+                descending=data.descending,
+                limit=data.limit,
+            )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "message": "Некорректный фильтр",
+                "details": {
+                    "field": "per_energy",
+                    "message": str(e),
+                },
+            },
+        )
+
+    products = await get_product_suggestions(session, [m.product_id for m in matches])
+
+    return NutrientFilterResponse(
+        total=total,
+        items=[
+            NutrientFilterItem(
+                **products[match.product_id].model_dump(),
+                value=match.value,
+            )
+            for match in matches
+            if match.product_id in products
+        ],
+    )
+
+
+async def handle_similar_products(
+    session: AsyncSession,
+    product_id: int,
+    limit: int,
+    same_group: bool = False,
+) -> list[SimilarProductItem]:
+    """
+    Returns the products closest in nutrient profile to the given one.
+
+    Neighbours come from the in-memory similar products index (cosine over
+    normalized nutrient vectors), so no nutrients are read per request.
+
+    :param session: The current database session.
+    :param product_id: The product id.
+    :param limit: The maximum number of returned products.
+    :param same_group: Whether to return only products of the same group.
+    :return: A list of `SimilarProductItem` objects, most similar first; empty
+             while the index is not loaded or if the product has no nutrients.
+    """
+    if not similar_products_index.ready:
+        return []
+
+    with SIMILAR_PRODUCTS_LATENCY.time():
+        neighbours = similar_products_index.similar(product_id, limit, same_group)
+    products = await get_product_suggestions(
+        session, [n.product_id for n in neighbours]
+    )
+
+    return [
+        SimilarProductItem(
+            **products[neighbour.product_id].model_dump(),
+            similarity=neighbour.similarity,
+        )
+        for neighbour in neighbours
+        if neighbour.product_id in products
+    ]
+
+
+def _invalid_portion(product_id: int, field: str, message: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail={
+            "message": "Некорректная порция",
+            "details": {
+                "product_id": product_id,
+                "field": field,
+                "message": message,
+            },
+        },
+    )
+
+
+def _portion_grams(
+    product_ids: list[int],
+    portions: dict[int, PortionSpec],
+    nutrient_ids: np.ndarray,
+    amounts: np.ndarray,
+) -> np.ndarray:
+    grams = np.empty(len(product_ids))
+    per_energy = np.zeros(len(product_ids), dtype=bool)
+    for i, product_id in enumerate(product_ids):
+        spec = portions[product_id]
+        if (spec.grams is not None) + (spec.measure is not None) + spec.per_energy > 1:
+            raise _invalid_portion(
+                product_id, "portion", "Only one of grams, measure, per_energy"
+            )
+        if spec.measure is not None:
+            measure = resolve_household_measure(product_id, spec.measure)
+            if measure is None:
+                raise _invalid_portion(
+                    product_id, "measure", f"Unknown measure {spec.measure!r}"
+                )
+            grams[i] = measure
+        elif spec.grams is not None:
+            grams[i] = spec.grams
+        else:
+            grams[i] = BASE_GRAMS
+            per_energy[i] = spec.per_energy
+        grams[i] *= spec.count
+
+    if per_energy.any():
+        # Вес порции в 100 ккал по энергетической ценности из той же матрицы
+        rows = np.flatnonzero(nutrient_ids == nutrient_matrix.energy_nutrient_id)
+        energy = amounts[rows[0]] if len(rows) else np.zeros(len(product_ids))
+        grams[per_energy] *= grams_per_energy(energy[per_energy]) / BASE_GRAMS
+        missing = np.flatnonzero(np.isnan(grams))
+        if len(missing):
+            raise _invalid_portion(
+                product_ids[missing[0]], "per_energy", "Product has no energy value"
+            )
+    return grams
+
+
+async def _portion_amounts(
+    session: AsyncSession,
+    product_ids: list[int],
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Reads the amounts per 100 g of products as one nutrients x products block.
+
+    The block is taken from the in-memory nutrient matrix; products the
+    matrix does not have yet (it may lag behind the catalog) are read from
+    the database with one query and merged into it.
+
+    :param session: The current database session.
+    :param product_ids: The product ids.
+    :return: The nutrient ids, the amounts and the mask of stored amounts, as
+             returned by `NutrientMatrix.product_amounts`.
+    """
+    nutrient_ids, amounts, stored = nutrient_matrix.product_amounts(product_ids)
+    missing = {
+        product_id: i
+        for i, product_id in enumerate(product_ids)
+        if product_id not in nutrient_matrix
+    }
+    if not missing:
+        return nutrient_ids, amounts, stored
+
+    result = await session.execute(
+        select(
+            ProductNutrient.product_id,
+            ProductNutrient.nutrient_id,
+            ProductNutrient.amount,
+        ).where(ProductNutrient.product_id.in_(missing))
+    )
+    rows = result.all()
+    index = {nutrient_id: i for i, nutrient_id in enumerate(nutrient_ids.tolist())}
+    extra = sorted({row.nutrient_id for row in rows} - index.keys())
+    if extra:
+        index.update(
+            (nutrient_id, len(index) + i) for i, nutrient_id in enumerate(extra)
+        )
+        nutrient_ids = np.concatenate((nutrient_ids, np.array(extra, dtype=np.int64)))
+        amounts = np.vstack((amounts, np.zeros((len(extra), len(product_ids)))))
+        stored = np.vstack((stored, np.zeros((len(extra), len(product_ids)), bool)))
+    for row in rows:
+        amounts[index[row.nutrient_id], missing[row.product_id]] = row.amount
+        stored[index[row.nutrient_id], missing[row.product_id]] = True
+    return nutrient_ids, amounts, stored
+
+
+async def handle_product_portions(
+    session: AsyncSession,
+    portions: dict[int, PortionSpec],
+) -> dict[int, PortionDetailResponse]:
+    """
+    Scales the details of products to portions.
+
+    A portion is given in grams, in household measures (spoon, cup, piece)
+    from the `household_measures` table or as 100 kcal, times `count`.
+    The amounts per 100 g are taken from the in-memory nutrient matrix as one
+    nutrients x products block (products it does not have yet are read from
+    the database) and scaled with a single vectorized multiply; only then are
+    they mapped to the response schema, with the same nutrients as the
+    product details even where the scaled amount is zero.
+
+    :param session: The current database session.
+    :param portions: The portion of every product by product id.
+    :raises HTTPException: 503 if the nutrient matrix is not loaded, 400 if a
+                           portion cannot be converted to grams.
+    :return: The scaled details by product id; unknown ids are left out.
+    """
+    if not nutrient_matrix.ready:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail={
+                "message": "Расчёт порций временно недоступен",
+            },
+        )
+
+    products = await get_product_suggestions(session, list(portions))
+    product_ids = [product_id for product_id in portions if product_id in products]
+
+    nutrient_ids, amounts, stored = await _portion_amounts(session, product_ids)
+    with PORTION_SCALING_LATENCY.time():
+        grams = _portion_grams(product_ids, portions, nutrient_ids, amounts)
+        scaled = scale_portions(amounts, grams)
+
+    await ensure_nutrient_dispatch(session, None, nutrient_ids.tolist())
+
+    details = {}
+    for i, product_id in enumerate(product_ids):
+        rows = np.flatnonzero(stored[:, i])
+        product = products[product_id]
+        detail = map_nutrients_to_schema(
+            product_id,
+            product.title,
+            product.group_name,
+            zip(nutrient_ids[rows].tolist(), scaled[rows, i].tolist()),
+        )
+        details[product_id] = PortionDetailResponse(
+            **dict(detail),
+            portion_grams=round(float(grams[i]), 2),
+        )
+    return details
+
+
+async def handle_product_portions_batch(
+    session: AsyncSession,
+    product_ids: list[int],
+    portion: PortionSpec | None,
+    portions: dict[int, PortionSpec],
+) -> dict[int, PortionDetailResponse]:
+    """
+    Scales the details of several products to portions.
+
+    The bulk counterpart of `get_product_details_batch_payload` for requests
+    with portions; it records the same bulk request metrics, counting the
+    scaled products as `portion`.
+
+    :param session: The current database session.
+    :param product_ids: The ids of the products.
+    :param portion: The portion of the products missing from `portions`.
+    :param portions: The portions by product id.
+    :raises HTTPException: As `handle_product_portions`.
+    :return: The scaled details by product id; unknown ids are left out.
+    """
+    start = time.perf_counter()
+    default = portion or PortionSpec()
+    details = await handle_product_portions(
+        session,
+        {product_id: portions.get(product_id, default) for product_id in product_ids},
+    )
+
+    requested = len(dict.fromkeys(product_ids))
+    PRODUCT_DETAILS_BATCH_PRODUCTS.labels("portion").inc(len(details))
+    PRODUCT_DETAILS_BATCH_PRODUCTS.labels("missing").inc(requested - len(details))
+    PRODUCT_DETAILS_BATCH_LATENCY.observe(time.perf_counter() - start)
+    return details
+
+
+async def get_product_suggestions(
+    session: AsyncSession,
+    product_ids: list[int],
+) -> dict[int, ProductSuggestion]:
+    """
+    Looks up titles and group names of products by id.
+
+    Products are taken from the autocomplete index; the ones it does not know
+    are read by primary key. Missing products are left out.
+
+    :param session: The current database session.
+    :param product_ids: The product ids.
+    :return: The products by id.
+    """
+    products = {}
+    missing = []
+    for product_id in product_ids:
+        indexed = autocomplete_index.get(product_id)
+        if indexed is None:
+            missing.append(product_id)
+        else:
+            products[product_id] = ProductSuggestion(
+                id=indexed.id, title=indexed.title, group_name=indexed.group_name
+            )
+
+    if missing:
+        result = await session.execute(
+            select(Product.id, Product.title, ProductGroup.name.label("group_name"))
+            .join(ProductGroup, Product.group_id == ProductGroup.id)
+            .where(Product.id.in_(missing))
+        )
+        for row in result:
+            products[row.id] = ProductSuggestion(
+                id=row.id, title=row.title, group_name=row.group_name
+            )
+    return products
@@ -0,0 +1,41 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.app.core.logger import get_logger
+from src.app.core.utils.text import normalize_title
+from src.app.models import ProductAlias
+
+log = get_logger("product_alias_service")
+
+# Нормализованный синоним -> id продукта; заменяется целиком при перезагрузке
+_product_aliases: dict[str, int] = {}
+
+
+def resolve_product_alias(query: str) -> int | None:
+    """
+    Resolves a colloquial name or abbreviation to a product id.
+
+    :param query: The search query.
+    :return: The id of the product the alias points to, or None.
+    """
+    return _product_aliases.get(normalize_title(query))
+
+
+async def load_product_aliases(session: AsyncSession) -> int:
+    """
+    Reloads the in-memory alias map from the `product_aliases` table.
+
+    The table is small, so it is reloaded as a whole on every catalog change;
+    requests keep using the previous map until the new one is swapped in.
+
+    :param session: The current database session.
+    :return: The number of loaded aliases.
+    """
+    global _product_aliases
+    result = await session.execute(
+        select(ProductAlias.normalized_alias, ProductAlias.product_id)
+    )
+    _product_aliases = dict(result.tuples().all())
+
+    log.info("Product aliases loaded: %s", len(_product_aliases))
+    return len(_product_aliases)
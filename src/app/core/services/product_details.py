@@ -0,0 +1,230 @@
+import hashlib
+import time
+from typing import Iterable, NamedTuple
+
+from redis.asyncio import RedisError
+
+from src.app.core.logger import get_logger
+from src.app.core.redis import redis_cache_client, redis_client
+
+log = get_logger("product_details_service")
+
+# Хэш готовых JSON-снимков ProductDetailResponse: поле — id продукта
+PRODUCT_DETAILS_KEY = "product:details"
+# Очередь продуктов, снимки которых нужно пересобрать фоновой задачей
+PRODUCT_DETAILS_DIRTY_KEY = "product:details:dirty"
+PRODUCT_DETAILS_REBUILD_ALL_KEY = "product:details:rebuild_all"
+# Версия содержимого снимков: поле — id продукта, значение — "<digest>:<время>"
+PRODUCT_DETAILS_META_KEY = "product:details:meta"
+# Счётчики инвалидаций: поле — id продукта, "*" — полная инвалидация
+PRODUCT_DETAILS_GENERATION_KEY = "product:details:generation"
+_ALL_PRODUCTS = "*"
+
+# Записывает снимки только тех продуктов, чьё поколение не изменилось с
+# момента чтения из БД. KEYS: снимки, версии, поколения; ARGV: четвёрки
+# (id, поколение, снимок, версия)
+_STORE_SNAPSHOTS_SCRIPT = redis_cache_client.register_script("""
+local all = redis.call("HGET", KEYS[3], "*") or "0"
+local stored = 0
+for i = 1, #ARGV, 4 do
+    local generation = all .. ":" .. (redis.call("HGET", KEYS[3], ARGV[i]) or "0")
+    if generation == ARGV[i + 1] then
+        redis.call("HSET", KEYS[1], ARGV[i], ARGV[i + 2])
+        redis.call("HSET", KEYS[2], ARGV[i], ARGV[i + 3])
+        stored = stored + 1
+    end
+end
+return stored
+""")
+
+
+class ProductDetailsMeta(NamedTuple):
+    digest: str
+    modified: float
+
+
+def product_details_digest(payload: bytes) -> str:
+    """
+    Computes the content version of a detail snapshot.
+
+    :param payload: The serialized `ProductDetailResponse`.
+    :return: The hex digest of the payload.
+    """
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+async def get_product_details_snapshot(product_id: int) -> bytes | None:
+    """
+    Reads the precomputed detail snapshot of a product.
+
+    Redis errors are logged and treated as a missing snapshot.
+
+    :param product_id: The id of the product.
+    :return: The `ProductDetailResponse` serialized with orjson, or None.
+    """
+    try:
+        return await redis_cache_client.hget(PRODUCT_DETAILS_KEY, str(product_id))
+    except RedisError as e:
+        log.error("Redis error reading product details snapshot: %s", e)
+        return None
+
+
+async def get_product_details_snapshots(
+    product_ids: list[int],
+) -> dict[int, bytes]:
+    """
+    Reads the precomputed detail snapshots of several products at once.
+
+    :param product_ids: The ids of the products.
+    :return: The found snapshots by product id.
+    """
+    if not product_ids:
+        return {}
+    try:
+        payloads = await redis_cache_client.hmget(
+            PRODUCT_DETAILS_KEY,
+            [str(product_id) for product_id in product_ids],
+        )
+    except RedisError as e:
+        log.error("Redis error reading product details snapshots: %s", e)
+        return {}
+    return {
+        product_id: payload
+        for product_id, payload in zip(product_ids, payloads)
+        if payload is not None
+    }
+
+
+async def get_product_details_generations(
+    product_ids: list[int],
+) -> dict[int, str] | None:
+    """
+    Reads the invalidation generations of several products.
+
+    A generation is read before the products are loaded from the database
+    and passed to `store_product_details_snapshots`, which skips the
+    snapshots of products invalidated in between.
+
+    :param product_ids: The ids of the products.
+    :return: The generations by product id, or None on a Redis error.
+    """
+    try:
+        values = await redis_client.hmget(
+            PRODUCT_DETAILS_GENERATION_KEY,
+            [_ALL_PRODUCTS, *(str(product_id) for product_id in product_ids)],
+        )
+    except RedisError as e:
+        log.error("Redis error reading product details generations: %s", e)
+        return None
+    everything, *values = (value or "0" for value in values)
+    return {
+        product_id: f"{everything}:{value}"
+        for product_id, value in zip(product_ids, values)
+    }
+
+
+async def store_product_details_snapshots(
+    snapshots: dict[int, bytes],
+    generations: dict[int, str] | None,
+) -> None:
+    """
+    Stores detail snapshots built from the database.
+
+    The snapshots are written by one script, and only for the products whose
+    generation is still the one read before loading them. A snapshot of a
+    product invalidated while it was being loaded would otherwise outlive the
+    invalidation until the next change of the product.
+
+    :param snapshots: The serialized `ProductDetailResponse` by product id.
+    :param generations: The generations from `get_product_details_generations`
+                        read before loading the products; nothing is stored
+                        if they are unknown.
+    :return: None
+    """
+    if not snapshots or generations is None:
+        return
+    now = int(time.time())
+    args = []
+    for product_id, payload in snapshots.items():
+        args += [
+            str(product_id),
+            generations[product_id],
+            payload,
+            f"{product_details_digest(payload)}:{now}",
+        ]
+    try:
+        await _STORE_SNAPSHOTS_SCRIPT(
+            keys=[
+                PRODUCT_DETAILS_KEY,
+                PRODUCT_DETAILS_META_KEY,
+                PRODUCT_DETAILS_GENERATION_KEY,
+            ],
+            args=args,
+        )
+    except RedisError as e:
+        log.error("Redis error writing product details snapshots: %s", e)
+
+
+async def get_product_details_meta(product_id: int) -> ProductDetailsMeta | None:
+    """
+    Reads the content version of the detail snapshot of a product.
+
+    The version is stored next to the snapshot and dropped with it, so it is
+    present only while the snapshot is up to date. Redis errors are logged and
+    treated as a missing version.
+
+    :param product_id: The id of the product.
+    :return: The digest and the build time of the snapshot, or None.
+    """
+    try:
+        meta = await redis_cache_client.hget(PRODUCT_DETAILS_META_KEY, str(product_id))
+    except RedisError as e:
+        log.error("Redis error reading product details meta: %s", e)
+        return None
+    if meta is None:
+        return None
+    digest, modified = meta.decode().split(":")
+    return ProductDetailsMeta(digest, float(modified))
+
+
+async def invalidate_product_details(product_ids: Iterable[int] = ()) -> None:
+    """
+    Drops the snapshots of changed products and queues them for a rebuild.
+
+    An empty `product_ids` drops every snapshot and requests a full rebuild.
+    The generations of the products are bumped in the same transaction, so
+    snapshots loaded before the change are not stored afterwards.
+
+    :param product_ids: The ids of the changed products.
+    :return: None
+    """
+    product_ids = [str(product_id) for product_id in set(product_ids)]
+    async with redis_client.pipeline(transaction=True) as pipe:
+        if product_ids:
+            pipe.hdel(PRODUCT_DETAILS_KEY, *product_ids)
+            pipe.hdel(PRODUCT_DETAILS_META_KEY, *product_ids)
+            pipe.sadd(PRODUCT_DETAILS_DIRTY_KEY, *product_ids)
+            for product_id in product_ids:
+                pipe.hincrby(PRODUCT_DETAILS_GENERATION_KEY, product_id, 1)
+        else:
+            pipe.delete(
+                PRODUCT_DETAILS_KEY,
+                PRODUCT_DETAILS_META_KEY,
+                PRODUCT_DETAILS_DIRTY_KEY,
+            )
+            pipe.set(PRODUCT_DETAILS_REBUILD_ALL_KEY, 1)
+            pipe.hincrby(PRODUCT_DETAILS_GENERATION_KEY, _ALL_PRODUCTS, 1)
+        await pipe.execute()
+
+
+async def pop_dirty_product_details(count: int) -> list[int] | None:
+    """
+    Takes a batch of products whose snapshots have to be rebuilt.
+
+    :param count: The maximum number of products to take.
+    :return: The product ids, or None when the whole catalog has to be rebuilt.
+    """
+    if await redis_client.getdel(PRODUCT_DETAILS_REBUILD_ALL_KEY):
+        return None
+    product_ids = await redis_client.spop(PRODUCT_DETAILS_DIRTY_KEY, count)
+    return [int(product_id) for product_id in product_ids or ()]
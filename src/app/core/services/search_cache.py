@@ -0,0 +1,116 @@
+import hashlib
+import time
+
+import orjson
+from redis.asyncio import RedisError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.app.core.config import settings
+from src.app.core.logger import get_logger
+from src.app.core.metrics import (
+    SEARCH_CACHE_LATENCY,
+    SEARCH_CACHE_PAYLOAD_BYTES,
+    SEARCH_CACHE_REQUESTS,
+)
+from src.app.core.redis import redis_cache_client
+from src.app.core.services.catalog import get_catalog_version, get_ranking_version
+from src.app.core.services.product import handle_product_search
+from src.app.core.services.search_telemetry import (
+    count_search_results,
+    emit_search_event,
+    search_event_sampled,
+)
+from src.app.core.utils.text import normalize_title
+
+log = get_logger("search_cache_service")
+
+
+def search_cache_key(query: str, catalog_version: int, ranking_version: int) -> str:
+    """
+    Builds the Redis key of a cached search result.
+
+    The catalog version and the ranking generation are part of the key, so
+    bumping either makes every entry of the previous version unreachable;
+    stale entries expire by TTL.
+
+    :param query: The search query.
+    :param catalog_version: The current catalog version.
+    :param ranking_version: The current search ranking generation.
+    :return: The cache key.
+    """
+    digest = hashlib.blake2b(
+        normalize_title(query).encode(),
+        digest_size=16,
+    ).hexdigest()
+    return f"search:{catalog_version}.{ranking_version}:{digest}"
+
+
+async def cached_product_search(
+    session: AsyncSession,
+    query: str,
+    confirmed: bool,
+) -> bytes:
+    """
+    Returns a serialized `UnifiedProductResponse` for the query.
+
+    Unconfirmed searches are read-only and are answered from the Redis cache
+    of pre-serialized orjson payloads when possible. Confirmed searches may add
+    a pending product and always go through `handle_product_search`. Redis
+    errors are logged and treated as cache misses. A sample of the searches
+    is reported to the telemetry stream.
+
+    :param session: The current database session.
+    :param query: The search query string.
+    :param confirmed: A boolean flag indicating whether to skip suggestions.
+    :return: The response serialized with orjson.
+    """
+    start = time.perf_counter()
+
+    if confirmed:
+        response = await handle_product_search(session, query, confirmed)
+        payload = orjson.dumps(response.model_dump())
+        await _report_search(query, payload, start, "bypass")
+        return payload
+
+    key = search_cache_key(query, get_catalog_version(), get_ranking_version())
+
+    try:
+        cached = await redis_cache_client.get(key)
+    except RedisError as e:
+        log.error("Redis error reading search cache: %s", e)
+        cached = None
+
+    if cached is not None:
+        SEARCH_CACHE_REQUESTS.labels("hit").inc()
+        SEARCH_CACHE_LATENCY.labels("hit").observe(time.perf_counter() - start)
+        await _report_search(query, cached, start, "hit")
+        return cached
+
+    response = await handle_product_search(session, query, confirmed)
+    payload = orjson.dumps(response.model_dump())
+
+    try:
+        await redis_cache_client.set(key, payload, ex=settings.cache.search_ttl)
+    except RedisError as e:
+        log.error("Redis error writing search cache: %s", e)
+
+    SEARCH_CACHE_REQUESTS.labels("miss").inc()
+    SEARCH_CACHE_LATENCY.labels("miss").observe(time.perf_counter() - start)
+    SEARCH_CACHE_PAYLOAD_BYTES.observe(len(payload))
+    await _report_search(query, payload, start, "miss")
+    return payload
+
+
+async def _report_search(
+    query: str,
+    payload: bytes,
+    start: float,
+    cache: str,
+) -> None:
+    if search_event_sampled():
+        await emit_search_event(
+            query,
+            count_search_results(payload),
+            time.perf_counter() - start,
+            cache,
+        )
@@ -0,0 +1,111 @@
+import asyncio
+
+import orjson
+from fastapi import WebSocket, WebSocketDisconnect, status
+
+from src.app.core import db_helper
+from src.app.core.config import settings
+from src.app.core.logger import get_logger
+from src.app.core.metrics import SEARCH_STREAM_QUERIES
+from src.app.core.services.search_cache import cached_product_search
+
+log = get_logger("search_stream_service")
+
+MIN_QUERY_LENGTH = 2
+MAX_QUERY_LENGTH = 100
+
+
+def _origin_allowed(websocket: WebSocket) -> bool:
+    # Браузеры не применяют CORS к WebSocket, поэтому Origin проверяется вручную
+    # Совпадение только целиком: по префиксу прошёл бы и чужой домен вида
+    # https://app.example.com.evil.net
+    origin = websocket.headers.get("origin")
+    allowed = settings.cors.allow_origins
+    return not origin or "*" in allowed or origin in allowed
+
+
+def _parse_message(message: str) -> tuple[int, str]:
+    data = orjson.loads(message)
+    seq, query = data["seq"], data["query"]
+    if not isinstance(seq, int) or not isinstance(query, str):
+        raise ValueError("Invalid message")
+    return seq, query.strip()
+
+
+async def _search(seq: int, query: str) -> bytes:
+    if not MIN_QUERY_LENGTH <= len(query) <= MAX_QUERY_LENGTH:
+        return orjson.dumps(
+            {
+                "seq": seq,
+                "error": "Запрос должен содержать от 2 до 100 символов",
+            }
+        )
+
+    # Сессия на каждый запрос: отменённый запрос не оставляет её в
+    # неопределённом состоянии, а соединение берётся из пула только при промахе
+    # мимо индекса и кэша
+    try:
+        async with db_helper.session_factory() as session:
+            payload = await cached_product_search(session, query, confirmed=False)
+    except Exception as e:
+        log.error("Search stream query %r failed: %s", query, e)
+        SEARCH_STREAM_QUERIES.labels("failed").inc()
+        return orjson.dumps({"seq": seq, "error": "Ошибка поиска"})
+
+    SEARCH_STREAM_QUERIES.labels("answered").inc()
+    return b'{"seq":%d,"result":%s}' % (seq, payload)
+
+
+async def serve_search_stream(websocket: WebSocket) -> None:
+    """
+    Serves search-as-you-type over a single WebSocket connection.
+
+    The client sends `{"seq": <int>, "query": <str>}` messages and receives
+    `{"seq": <int>, "result": <UnifiedProductResponse>}` (or `"error"`) replies.
+    Only the latest query is worked on: when a new message arrives, the search
+    of the previous one is cancelled, including its in-flight database query,
+    and no reply is sent for it. Searches are read-only, like `/search` without
+    `confirmed`, and go through the same index and Redis cache.
+
+    :param websocket: The WebSocket connection.
+    :return: None
+    """
+    if not _origin_allowed(websocket):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    receiver = asyncio.create_task(websocket.receive_text())
+    search: asyncio.Task | None = None
+
+    try:
+        while True:
+            waiting = {receiver} if search is None else {receiver, search}
+            done, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+
+            # Ответы отправляются только из этого цикла, чтобы отмена поиска не
+            # прерывала запись в сокет
+            if search in done:
+                reply, search = search.result(), None
+                await websocket.send_text(reply.decode())
+
+            if receiver in done:
+                if search is not None:
+                    search.cancel()
+                    SEARCH_STREAM_QUERIES.labels("superseded").inc()
+                    search = None
+
+                try:
+                    seq, query = _parse_message(receiver.result())
+                except (orjson.JSONDecodeError, KeyError, TypeError, ValueError):
+                    await websocket.close(code=status.WS_1003_UNSUPPORTED_DATA)
+                    return
+
+                receiver = asyncio.create_task(websocket.receive_text())
+                search = asyncio.create_task(_search(seq, query))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
+        if search is not None:
+            search.cancel()
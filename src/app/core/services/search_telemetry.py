@@ -0,0 +1,277 @@
+import datetime as dt
+import random
+import time
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import NamedTuple
+
+import orjson
+from redis.asyncio import RedisError
+from redis.exceptions import LockError, ResponseError
+from sqlalchemy import select, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.app.core.config import settings
+from src.app.core.logger import get_logger
+from src.app.core.redis import redis_client
+from src.app.core.utils.text import normalize_title
+from src.app.models import SearchQueryStat
+
+log = get_logger("search_telemetry_service")
+
+SEARCH_EVENTS_STREAM = "search:events"
+SEARCH_EVENTS_GROUP = "search-stats"
+SEARCH_EVENTS_CONSUMER = "aggregator"
+# Одновременно события читает один запуск агрегации: у группы один потребитель,
+# и его незавершённые записи не должны достаться параллельному запуску
+SEARCH_EVENTS_LOCK_KEY = "search:events:aggregate"
+SEARCH_EVENTS_LOCK_TIMEOUT = 300
+
+# Верхние границы корзин гистограммы задержек; последняя корзина — переполнение
+LATENCY_BUCKET_BOUNDS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+MAX_QUERY_LENGTH = 100
+
+
+def search_event_sampled() -> bool:
+    """
+    Decides whether the current search is reported to the telemetry stream.
+
+    :return: True for roughly `telemetry.search_sample_rate` of the calls.
+    """
+    return random.random() < settings.telemetry.search_sample_rate
+
+
+def count_search_results(payload: bytes) -> int:
+    """
+    Counts the products in a serialized `UnifiedProductResponse`.
+
+    :param payload: The response serialized with orjson.
+    :return: 1 for an exact match, otherwise the number of suggestions.
+    """
+    response = orjson.loads(payload)
+    if response["exact_match"] is not None:
+        return 1
+    return len(response["suggestions"])
+
+
+async def emit_search_event(
+    query: str,
+    results: int,
+    latency: float,
+    cache: str,
+) -> None:
+    """
+    Appends a search event to the Redis telemetry stream.
+
+    The stream is capped at `telemetry.search_stream_maxlen` entries. Redis
+    errors are logged and ignored so telemetry never fails a search.
+
+    :param query: The search query.
+    :param results: The number of returned products.
+    :param latency: The search latency in seconds.
+    :param cache: The cache outcome: "hit", "miss" or "bypass".
+    :return: None
+    """
+    try:
+        await redis_client.xadd(
+            SEARCH_EVENTS_STREAM,
+            {
+                "query": normalize_title(query)[:MAX_QUERY_LENGTH],
+                "results": results,
+                "latency_ms": round(latency * 1000, 3),
+                "cache": cache,
+                "ts": int(time.time()),
+            },
+            maxlen=settings.telemetry.search_stream_maxlen,
+            approximate=True,
+        )
+    except RedisError as e:
+        log.error("Redis error emitting search event: %s", e)
+
+
+class _SearchEvent(NamedTuple):
+    day: dt.date
+    query: str
+    zero_results: bool
+    cache_hit: bool
+    latency_ms: float
+
+
+def _parse_search_event(fields: dict[str, str]) -> _SearchEvent | None:
+    try:
+        return _SearchEvent(
+            day=dt.datetime.fromtimestamp(int(fields["ts"]), dt.UTC).date(),
+            query=str(fields["query"])[:MAX_QUERY_LENGTH],
+            zero_results=fields["results"] == "0",
+            cache_hit=fields["cache"] == "hit",
+            latency_ms=float(fields["latency_ms"]),
+        )
+    except (KeyError, TypeError, ValueError, OverflowError, OSError):
+        log.warning("Malformed search event skipped: %r", fields)
+        return None
+
+
+@dataclass(slots=True)
+class _QueryAggregate:
+    frequency: int = 0
+    zero_results: int = 0
+    cache_hits: int = 0
+    latency_buckets: list[int] = field(
+        default_factory=lambda: [0] * (len(LATENCY_BUCKET_BOUNDS_MS) + 1)
+    )
+
+
+def percentile_ms(buckets: list[int], quantile: float = 0.95) -> float:
+    """
+    Estimates a latency percentile from histogram bucket counts.
+
+    :param buckets: The counts per bucket of `LATENCY_BUCKET_BOUNDS_MS`.
+    :param quantile: The quantile to estimate.
+    :return: The upper bound of the bucket containing the quantile.
+    """
+    threshold = quantile * sum(buckets)
+    cumulative = 0
+    for i, count in enumerate(buckets):
+        cumulative += count
+        if count and cumulative >= threshold:
+            return float(
+                LATENCY_BUCKET_BOUNDS_MS[min(i, len(LATENCY_BUCKET_BOUNDS_MS) - 1)]
+            )
+    return 0.0
+
+
+async def _merge_search_events(
+    session: AsyncSession,
+    events: list[_SearchEvent],
+) -> None:
+    aggregates: dict[tuple[dt.date, str], _QueryAggregate] = {}
+    for event in events:
+        aggregate = aggregates.setdefault((event.day, event.query), _QueryAggregate())
+        aggregate.frequency += 1
+        aggregate.zero_results += event.zero_results
+        aggregate.cache_hits += event.cache_hit
+        bucket = bisect_left(LATENCY_BUCKET_BOUNDS_MS, event.latency_ms)
+        aggregate.latency_buckets[bucket] += 1
+
+    # Недостающие строки создаются заранее и блокируются вместе с остальными в
+    # одном порядке, так что параллельная вставка той же строки не падает
+    keys = sorted(aggregates)
+    await session.execute(
+        insert(SearchQueryStat)
+        .values(
+            [
+                {
+                    "day": day,
+                    "query": query,
+                    "latency_buckets": [0] * (len(LATENCY_BUCKET_BOUNDS_MS) + 1),
+                }
+                for day, query in keys
+            ]
+        )
+        .on_conflict_do_nothing(index_elements=["day", "query"])
+    )
+    result = await session.execute(
+        select(SearchQueryStat)
+        .where(tuple_(SearchQueryStat.day, SearchQueryStat.query).in_(keys))
+        .order_by(SearchQueryStat.day, SearchQueryStat.query)
+        .with_for_update()
+    )
+    stats = {(stat.day, stat.query): stat for stat in result.scalars()}
+
+    for key, aggregate in aggregates.items():
+        stat = stats[key]
+        stat.frequency += aggregate.frequency
+        stat.zero_results += aggregate.zero_results
+        stat.cache_hits += aggregate.cache_hits
+        stat.latency_buckets = [
+            old + new
+            for old, new in zip(stat.latency_buckets, aggregate.latency_buckets)
+        ]
+        stat.p95_latency_ms = percentile_ms(stat.latency_buckets)
+
+    await session.commit()
+
+
+async def aggregate_search_events(
+    session: AsyncSession,
+    batch_size: int = 1000,
+    max_batches: int = 50,
+) -> int:
+    """
+    Folds sampled search events from the Redis stream into `search_query_stats`.
+
+    Events are read through a consumer group and acknowledged only after the
+    batch is committed, so a failed run is retried by the next one: entries
+    left pending by a previous run are processed before new ones. Malformed
+    events are logged and acknowledged without being counted, so they never
+    block the stream. Runs are serialized by a Redis lock; a run that finds
+    it taken returns at once.
+
+    :param session: The current database session.
+    :param batch_size: The number of events read per batch.
+    :param max_batches: The maximum number of batches per run.
+    :return: The number of processed events.
+    """
+    try:
+        await redis_client.xgroup_create(
+            SEARCH_EVENTS_STREAM,
+            SEARCH_EVENTS_GROUP,
+            id="0",
+            mkstream=True,
+        )
+    except ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+    lock = redis_client.lock(
+        SEARCH_EVENTS_LOCK_KEY,
+        timeout=SEARCH_EVENTS_LOCK_TIMEOUT,
+    )
+    if not await lock.acquire(blocking=False):
+        log.info("Search events are being aggregated by another run")
+        return 0
+    try:
+        return await _aggregate_pending_and_new(session, batch_size, max_batches)
+    finally:
+        try:
+            await lock.release()
+        except LockError:
+            log.warning("Search events lock expired before the run finished")
+
+
+async def _aggregate_pending_and_new(
+    session: AsyncSession,
+    batch_size: int,
+    max_batches: int,
+) -> int:
+    processed = 0
+    for start_id in ("0", ">"):
+        for _ in range(max_batches):
+            response = await redis_client.xreadgroup(
+                SEARCH_EVENTS_GROUP,
+                SEARCH_EVENTS_CONSUMER,
+                {SEARCH_EVENTS_STREAM: start_id},
+                count=batch_size,
+            )
+            messages = response[0][1] if response else []
+            if not messages:
+                break
+
+            # У вытесненных из стрима записей поля пустые — их просто подтверждаем
+            events = [
+                event
+                for _, fields in messages
+                if fields and (event := _parse_search_event(fields)) is not None
+            ]
+            if events:
+                await _merge_search_events(session, events)
+            await redis_client.xack(
+                SEARCH_EVENTS_STREAM,
+                SEARCH_EVENTS_GROUP,
+                *(message_id for message_id, _ in messages),
+            )
+            processed += len(messages)
+
+    return processed
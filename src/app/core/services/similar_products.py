@@ -0,0 +1,46 @@
+import time
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.app.core.logger import get_logger
+from src.app.core.services.nutrient_matrix import nutrient_matrix
+from src.app.core.utils.similar_products import SimilarProductsIndex
+from src.app.models import Product
+
+log = get_logger("similar_products_service")
+
+similar_products_index = SimilarProductsIndex()
+
+
+async def build_similar_products_index(
+    session: AsyncSession,
+    version: int | None = None,
+) -> None:
+    """
+    Rebuilds the similar products index from the nutrient matrix.
+
+    The nutrient matrix must be up to date: the amounts are taken from it, and
+    only the product groups are read from the database.
+
+    :param session: The current database session.
+    :param version: The current catalog version.
+    :return: None
+    """
+    start = time.perf_counter()
+    product_ids, amounts = nutrient_matrix.product_vectors()
+    result = await session.execute(select(Product.id, Product.group_id))
+    groups = dict(result.tuples().all())
+    # Продукты, удалённые после обновления матрицы, получают несуществующую группу
+    group_ids = np.array(
+        [groups.get(product_id, -1) for product_id in product_ids.tolist()],
+        dtype=np.int64,
+    )
+
+    similar_products_index.rebuild(product_ids, amounts, group_ids, version)
+    log.info(
+        "Similar products index built: %s products in %.1f ms",
+        len(similar_products_index),
+        (time.perf_counter() - start) * 1000,
+    )
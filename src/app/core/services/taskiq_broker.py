@@ -1,9 +1,13 @@
-__all__ = ("broker",)
+__all__ = (
+    "broker",
+    "scheduler",
+)
 
 import logging
 
 import taskiq_fastapi
-from taskiq import TaskiqEvents, TaskiqState
+from taskiq import TaskiqEvents, TaskiqScheduler, TaskiqState
+from taskiq.schedule_sources import LabelScheduleSource
 from taskiq_aio_pika import AioPikaBroker
 
 from src.app.core.config import settings
@@ -14,6 +18,12 @@ broker = AioPikaBroker(
     url=str(settings.taskiq.url),
 )
 
+# Периодические задачи объявляются меткой schedule в @broker.task
+scheduler = TaskiqScheduler(
+    broker=broker,
+    sources=[LabelScheduleSource(broker)],
+)
+
 taskiq_fastapi.init(
     broker,
     "src.app.main:app",
@@ -0,0 +1,150 @@
+from typing import AsyncIterator
+
+import numpy as np
+from sqlalchemy import ColumnElement, delete, func, select
+from sqlalchemy.dialects.postgresql import Insert, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.app.core.logger import get_logger
+from src.app.core.utils.user_profile import (
+    NutritionTargets,
+    NutritionTargetsBatch,
+    calculate_targets_batch,
+    profile_arrays,
+)
+from src.app.models import User, UserTarget
+
+log = get_logger("user_targets_service")
+
+# Пользователей в одной порции чтения
+USER_TARGETS_CHUNK = 10_000
+# Хранимые поля суточных норм, в порядке NutritionTargets
+TARGET_FIELDS = NutritionTargets._fields
+
+
+def _upsert_targets(updated_at: ColumnElement) -> Insert:
+    # Нормы перезаписываются только расчётом по более позднему чтению профиля
+    stmt = insert(UserTarget).values(updated_at=updated_at)
+    return stmt.on_conflict_do_update(
+        index_elements=[UserTarget.user_id],
+        set_={field: stmt.excluded[field] for field in (*TARGET_FIELDS, "updated_at")},
+        where=UserTarget.updated_at < stmt.excluded.updated_at,
+    )
+
+
+async def stream_user_targets(
+    session: AsyncSession,
+    chunk_size: int = USER_TARGETS_CHUNK,
+    active_only: bool = True,
+) -> AsyncIterator[NutritionTargetsBatch]:
+    """
+    Calculates the nutrition targets of every user, chunk by chunk.
+
+    The profile fields are read in pages of `chunk_size` users by keyset on
+    the user id, so memory use is bounded whatever the number of users and
+    the caller may commit between chunks; every chunk is converted to NumPy
+    columns and calculated with `calculate_targets_batch`. Users with an
+    incomplete or invalid profile are included with `valid=False`.
+
+    :param session: The current database session.
+    :param chunk_size: The number of users per yielded batch.
+    :param active_only: Whether to skip deactivated users.
+    :return: An async iterator of target batches, in user id order.
+    """
+    stmt = select(
+        User.id,
+        User.gender,
+        User.age,
+        User.weight,
+        User.height,
+        User.kfa,
+        User.goal,
+    ).order_by(User.id)
+    if active_only:
+        stmt = stmt.where(User.is_active.is_(True))
+
+    total = valid = 0
+    last_id = 0
+    while True:
+        rows = (
+            await session.execute(stmt.where(User.id > last_id).limit(chunk_size))
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        batch = calculate_targets_batch(profile_arrays(rows))
+        total += len(batch.user_ids)
+        valid += int(batch.valid.sum())
+        yield batch
+
+    log.info("User targets calculated: %s users, %s with a valid profile", total, valid)
+
+
+async def save_user_targets(
+    session: AsyncSession,
+    user_id: int,
+    targets: NutritionTargets | None,
+) -> None:
+    """
+    Stores the nutrition targets of a user, or removes them.
+
+    The caller commits, so the targets change in the same transaction as the
+    profile they are calculated from.
+
+    :param session: The current database session.
+    :param user_id: The ID of the user.
+    :param targets: The calculated targets; None if the profile is
+                    incomplete or invalid.
+    :return: None
+    """
+    if targets is None:
+        await session.execute(delete(UserTarget).where(UserTarget.user_id == user_id))
+    else:
+        await session.execute(
+            _upsert_targets(func.clock_timestamp()),
+            {"user_id": user_id, **targets._asdict()},
+        )
+
+
+async def backfill_user_targets(
+    session: AsyncSession,
+    chunk_size: int = USER_TARGETS_CHUNK,
+) -> int:
+    """
+    Recalculates and stores the nutrition targets of every user.
+
+    The users are read and calculated in chunks with `stream_user_targets`;
+    every chunk is written with one batched upsert, the targets of users whose
+    profile is no longer valid are deleted, and the chunk is committed in the
+    transaction it was read in. The writes are stamped with the start of that
+    transaction, so targets saved by a profile update after the chunk was read
+    are neither overwritten nor deleted.
+
+    :param session: The current database session.
+    :param chunk_size: The number of users per chunk.
+    :return: The number of users with stored targets.
+    """
+    stored = 0
+    async for batch in stream_user_targets(session, chunk_size, active_only=False):
+        valid = np.flatnonzero(batch.valid)
+        if len(valid):
+            columns = [batch.user_ids[valid].tolist()] + [
+                getattr(batch, field)[valid].tolist() for field in TARGET_FIELDS
+            ]
+            await session.execute(
+                _upsert_targets(func.now()),
+                [dict(zip(("user_id", *TARGET_FIELDS), row)) for row in zip(*columns)],
+            )
+            stored += len(valid)
+        invalid = batch.user_ids[~batch.valid].tolist()
+        if invalid:
+            await session.execute(
+                delete(UserTarget).where(
+                    UserTarget.user_id.in_(invalid),
+                    UserTarget.updated_at < func.now(),
+                )
+            )
+        await session.commit()
+
+    log.info("User targets stored: %s", stored)
+    return stored
@@ -1,9 +1,9 @@
 __all__ = (
     "camel_case_to_snake_case",
-    "map_to_schema",
+    "map_nutrients_to_schema",
     "templates",
 )
 
 from .case_converter import camel_case_to_snake_case
-from .product import map_to_schema
+from .product import map_nutrients_to_schema
 from .templates import templates
@@ -0,0 +1,327 @@
+from collections import deque
+from dataclasses import dataclass
+from typing import Iterable, Iterator
+
+from .text import normalize_title
+
+
+class _Node:
+    __slots__ = ("edges", "ids")
+
+    def __init__(self) -> None:
+        # первый символ ребра -> (метка ребра, дочерний узел)
+        self.edges: dict[str, tuple[str, "_Node"]] = {}
+        self.ids: set[int] = set()
+
+
+class RadixTrie:
+    """
+    Compressed prefix tree mapping string keys to sets of integer ids.
+
+    Chains of single-child nodes are merged into one labelled edge, so the
+    depth of the tree is bounded by the number of branching points rather than
+    by the key length.
+    """
+
+    __slots__ = ("_root",)
+
+    def __init__(self) -> None:
+        self._root = _Node()
+
+    def insert(self, key: str, item_id: int) -> None:
+        """
+        Adds `item_id` to the set stored under `key`.
+
+        :param key: The key to insert.
+        :param item_id: The id to associate with the key.
+        :return: None
+        """
+        node = self._root
+        rest = key
+        while rest:
+            edge = node.edges.get(rest[0])
+            if edge is None:
+                child = _Node()
+                node.edges[rest[0]] = (rest, child)
+                node = child
+                break
+
+            label, child = edge
+            common = _common_prefix_len(label, rest)
+            if common < len(label):
+                # Разделение ребра в точке расхождения
+                middle = _Node()
+                middle.edges[label[common]] = (label[common:], child)
+                node.edges[rest[0]] = (label[:common], middle)
+                child = middle
+
+            node = child
+            rest = rest[common:]
+
+        node.ids.add(item_id)
+
+    def discard(self, key: str, item_id: int) -> None:
+        """
+        Removes `item_id` from the set stored under `key` if it is present.
+
+        Empty nodes are left in place; they are dropped on the next full rebuild.
+
+        :param key: The key to remove the id from.
+        :param item_id: The id to remove.
+        :return: None
+        """
+        node = self._root
+        rest = key
+        while rest:
+            edge = node.edges.get(rest[0])
+            if edge is None or not rest.startswith(edge[0]):
+                return
+            rest = rest[len(edge[0]) :]
+            node = edge[1]
+        node.ids.discard(item_id)
+
+    def iter_prefix(self, prefix: str) -> Iterator[int]:
+        """
+        Yields ids stored under every key starting with `prefix`.
+
+        Nodes are visited breadth-first, so ids of shorter keys come first.
+        An id may be yielded more than once if it is stored under several keys.
+
+        :param prefix: The prefix to look up.
+        :return: An iterator over the matching ids.
+        """
+        node = self._find(prefix)
+        if node is None:
+            return
+
+        queue = deque((node,))
+        while queue:
+            current = queue.popleft()
+            yield from current.ids
+            queue.extend(child for _, child in current.edges.values())
+
+    def _find(self, prefix: str) -> _Node | None:
+        node = self._root
+        rest = prefix
+        while rest:
+            edge = node.edges.get(rest[0])
+            if edge is None:
+                return None
+            label, child = edge
+            if rest.startswith(label):
+                rest = rest[len(label) :]
+                node = child
+            elif label.startswith(rest):
+                # Префикс заканчивается посередине ребра
+                return child
+            else:
+                return None
+        return node
+
+
+@dataclass(slots=True, frozen=True)
+class IndexedProduct:
+    id: int
+    title: str
+    group_name: str
+    normalized: str
+
+
+class AutocompleteIndex:
+    """
+    In-memory autocomplete index over product titles and product group names.
+
+    Word-start suffixes of every normalized title are stored in a radix trie,
+    so a query matches both the beginning of a title and the beginning of any
+    word in it. Infix matches are served from a trigram postings list, and
+    group names are indexed the same way to suggest products of a matching
+    group. Lookups never touch the database; the index only finds matching
+    products, and the caller ranks them.
+    """
+
+    def __init__(self) -> None:
+        self._reset()
+        self.ready = False
+
+    def _reset(self) -> None:
+        self._products: dict[int, IndexedProduct] = {}
+        self._exact: dict[str, set[int]] = {}
+        self._titles = RadixTrie()
+        self._trigrams: dict[str, set[int]] = {}
+        self._groups = RadixTrie()
+        self._group_ids: dict[str, int] = {}
+        self._group_names: list[str] = []
+        self._group_members: list[set[int]] = []
+
+    def __len__(self) -> int:
+        return len(self._products)
+
+    def rebuild(self, rows: Iterable[tuple[int, str, str]]) -> None:
+        """
+        Replaces the contents of the index.
+
+        :param rows: `(product_id, title, group_name)` tuples for the whole
+                     catalog.
+        :return: None
+        """
+        fresh = AutocompleteIndex()
+        for product_id, title, group_name in rows:
+            fresh.upsert(product_id, title, group_name)
+
+        self.__dict__.update(fresh.__dict__)
+        self.ready = True
+
+    def upsert(self, product_id: int, title: str, group_name: str) -> None:
+        """
+        Adds a product to the index or replaces its previous entry.
+
+        :param product_id: The product id.
+        :param title: The product title.
+        :param group_name: The name of the product group.
+        :return: None
+        """
+        self.remove(product_id)
+
+        entry = IndexedProduct(
+            id=product_id,
+            title=title,
+            group_name=group_name,
+            normalized=normalize_title(title),
+        )
+        self._products[product_id] = entry
+        self._exact.setdefault(entry.normalized, set()).add(product_id)
+        for key in _word_suffixes(entry.normalized):
+            self._titles.insert(key, product_id)
+        for trigram in _trigrams(entry.normalized):
+            self._trigrams.setdefault(trigram, set()).add(product_id)
+
+        group_key = normalize_title(group_name)
+        group_id = self._group_ids.get(group_key)
+        if group_id is None:
+            group_id = len(self._group_names)
+            self._group_ids[group_key] = group_id
+            self._group_names.append(group_key)
+            self._group_members.append(set())
+            for key in _word_suffixes(group_key):
+                self._groups.insert(key, group_id)
+        self._group_members[group_id].add(product_id)
+
+    def remove(self, product_id: int) -> None:
+        """
+        Removes a product from the index if it is present.
+
+        :param product_id: The product id.
+        :return: None
+        """
+        entry = self._products.pop(product_id, None)
+        if entry is None:
+            return
+
+        same_title = self._exact.get(entry.normalized)
+        if same_title is not None:
+            same_title.discard(product_id)
+            if not same_title:
+                del self._exact[entry.normalized]
+        for key in _word_suffixes(entry.normalized):
+            self._titles.discard(key, product_id)
+        for trigram in _trigrams(entry.normalized):
+            postings = self._trigrams.get(trigram)
+            if postings is not None:
+                postings.discard(product_id)
+                if not postings:
+                    del self._trigrams[trigram]
+
+        group_id = self._group_ids.get(normalize_title(entry.group_name))
+        if group_id is not None:
+            self._group_members[group_id].discard(product_id)
+
+    def get(self, product_id: int) -> IndexedProduct | None:
+        """
+        Returns the indexed product with the given id.
+
+        :param product_id: The product id.
+        :return: The product, or None if it is not indexed.
+        """
+        return self._products.get(product_id)
+
+    def exact(self, query: str) -> IndexedProduct | None:
+        """
+        Returns the product whose normalized title equals the query.
+
+        :param query: The search query.
+        :return: The matching product, or None if there is none.
+        """
+        ids = self._exact.get(normalize_title(query))
+        if not ids:
+            return None
+        return self._products[min(ids)]
+
+    def match(self, query: str, limit: int = 5) -> set[int]:
+        """
+        Returns the ids of every product matching the query.
+
+        Products having a word that starts with the query and infix matches
+        are all returned, so the caller ranks the full set. Products of a
+        matching group are added only when fewer than `limit` titles match.
+
+        :param query: The search query.
+        :param limit: The number of suggestions the caller needs.
+        :return: The ids of the matching products.
+        """
+        normalized = normalize_title(query)
+        if not normalized:
+            return set()
+
+        candidates = set(self._titles.iter_prefix(normalized))
+        candidates.update(self._infix_matches(normalized))
+        if len(candidates) < limit:
+            for group_id in self._groups.iter_prefix(normalized):
+                candidates.update(self._group_members[group_id])
+        return candidates
+
+    def _infix_matches(self, normalized: str) -> set[int]:
+        query_trigrams = _trigrams(normalized)
+        if not query_trigrams:
+            return set()
+
+        postings = []
+        for trigram in query_trigrams:
+            ids = self._trigrams.get(trigram)
+            if not ids:
+                return set()
+            postings.append(ids)
+        postings.sort(key=len)
+
+        matches = set(postings[0])
+        for ids in postings[1:]:
+            matches &= ids
+            if not matches:
+                return matches
+
+        # Триграммы дают надмножество — проверяем реальное вхождение
+        return {
+            product_id
+            for product_id in matches
+            if normalized in self._products[product_id].normalized
+        }
+
+
+def _common_prefix_len(a: str, b: str) -> int:
+    length = min(len(a), len(b))
+    for i in range(length):
+        if a[i] != b[i]:
+            return i
+    return length
+
+
+def _word_suffixes(normalized: str) -> list[str]:
+    suffixes = [normalized]
+    for i, char in enumerate(normalized):
+        if char == " " and i + 1 < len(normalized):
+            suffixes.append(normalized[i + 1 :])
+    return suffixes
+
+
+def _trigrams(normalized: str) -> set[str]:
+    return {normalized[i : i + 3] for i in range(len(normalized) - 2)}
+
@@ -0,0 +1,264 @@
+import re
+import zlib
+from typing import Mapping
+
+import numpy as np
+
+from src.app.core.utils.nutrient_dispatch import (
+    CARBS,
+    ENERGY_VALUE,
+    FATS,
+    FIBER,
+    OP_APPEND,
+    OP_SET,
+    PROTEINS,
+    SUGAR,
+    NutrientRoute,
+)
+
+GENDERS = ("female", "male")
+# Нижние границы возрастных групп, лет; младшие считаются по первой группе
+AGE_BANDS = (18, 30, 45, 65)
+
+# Суточная энергия по группам при средней активности, ккал: используется,
+# пока у пользователя нет рассчитанного TDEE
+REFERENCE_ENERGY = {
+    "female": (2200.0, 2150.0, 2100.0, 1900.0),
+    "male": (2800.0, 2700.0, 2600.0, 2300.0),
+}
+
+# Нормы, пропорциональные калорийности: доля энергии и ккал в единице нутриента
+_ENERGY_SHARES = {
+    ENERGY_VALUE: (1.0, 1.0),
+    FATS: (0.30, 9.0),
+    CARBS: (0.55, 4.0),
+    SUGAR: (0.10, 4.0),
+}
+
+# Остальные нормы (по МР 2.3.1.0253-21, округлённо): единица, значения для
+# женщин и для мужчин по возрастным группам
+_SLOT_VALUES = {
+    PROTEINS: ("г", (60, 60, 60, 60), (75, 75, 75, 68)),
+    FIBER: ("г", (20, 20, 20, 20), (20, 20, 20, 20)),
+}
+_NAMED_VALUES = (
+    (r"витамин c(?!\w)|аскорбин", "мг", (100,) * 4, (100,) * 4),
+    (r"витамин a(?!\w)|ретинол", "мкг", (800,) * 4, (900,) * 4),
+    (r"витамин d(?!\w)|кальциферол", "мкг", (15, 15, 15, 20), (15, 15, 15, 20)),
+    (r"витамин e(?!\w)|токоферол", "мг", (15,) * 4, (15,) * 4),
+    (r"витамин k(?!\w)|филлохинон", "мкг", (120,) * 4, (120,) * 4),
+    (r"витамин b1(?!\d)|тиамин", "мг", (1.5,) * 4, (1.5,) * 4),
+    (r"витамин b2(?!\d)|рибофлавин", "мг", (1.8,) * 4, (1.8,) * 4),
+    (r"витамин b3(?!\d)|витамин pp(?!\w)|ниацин", "мг", (20,) * 4, (20,) * 4),
+    (r"витамин b5(?!\d)|пантотен", "мг", (5,) * 4, (5,) * 4),
+    (r"витамин b6(?!\d)|пиридоксин", "мг", (2,) * 4, (2,) * 4),
+    (r"витамин b7(?!\d)|витамин h(?!\w)|биотин", "мкг", (50,) * 4, (50,) * 4),
+    (r"витамин b9(?!\d)|фолат|фолиев", "мкг", (400,) * 4, (400,) * 4),
+    (r"витамин b12(?!\d)|кобаламин", "мкг", (3,) * 4, (3,) * 4),
+    (r"кальций", "мг", (1000, 1000, 1000, 1200), (1000, 1000, 1000, 1200)),
+    (r"фосфор", "мг", (700,) * 4, (700,) * 4),
+    (r"магний", "мг", (420,) * 4, (420,) * 4),
+    (r"калий", "мг", (3500,) * 4, (3500,) * 4),
+    (r"натрий", "мг", (1300,) * 4, (1300,) * 4),
+    (r"хлор", "мг", (2300,) * 4, (2300,) * 4),
+    (r"железо", "мг", (18, 18, 18, 10), (10,) * 4),
+    (r"цинк", "мг", (12,) * 4, (12,) * 4),
+    (r"йод", "мкг", (150,) * 4, (150,) * 4),
+    (r"медь", "мг", (1,) * 4, (1,) * 4),
+    (r"марганец", "мг", (2,) * 4, (2,) * 4),
+    (r"селен", "мкг", (55,) * 4, (70,) * 4),
+    (r"хром", "мкг", (50,) * 4, (50,) * 4),
+    (r"молибден", "мкг", (70,) * 4, (70,) * 4),
+    (r"фтор", "мг", (4,) * 4, (4,) * 4),
+)
+_NAMED_PATTERNS = [
+    (re.compile(rf"(?<!\w)(?:{pattern})"), unit, female, male)
+    for pattern, unit, female, male in _NAMED_VALUES
+]
+
+# Меняется вместе с таблицами норм и входит в ETag страницы продукта
+REFERENCE_VERSION = zlib.crc32(
+    repr(
+        (REFERENCE_ENERGY, _ENERGY_SHARES, _SLOT_VALUES, _NAMED_VALUES, AGE_BANDS)
+    ).encode()
+)
+
+# Ключи скалярных слотов в разметке страницы продукта
+SLOT_KEYS = {
+    ENERGY_VALUE: "energy_value",
+    PROTEINS: "proteins",
+    FATS: "fats",
+    CARBS: "carbs",
+    FIBER: "fiber",
+    SUGAR: "sugar",
+}
+
+# Единицы в миллиграммах
+_UNIT_MG = {"г": 1000.0, "мг": 1.0, "мкг": 0.001}
+# Кириллические буквы в названиях витаминов, которые пишут вместо латинских
+_VITAMIN_LETTERS = str.maketrans("авсдекнр", "abcdekhp")
+_VITAMIN_NAME = re.compile(r"витамин\s+(\w+)")
+
+
+def _normalize_name(name: str) -> str:
+    name = name.lower().replace("ё", "е")
+    return _VITAMIN_NAME.sub(
+        lambda m: f"витамин {m.group(1).translate(_VITAMIN_LETTERS)}", name
+    )
+
+
+def _unit_factor(unit: str, reference_unit: str) -> float | None:
+    # Множитель, переводящий норму в единицы нутриента в каталоге
+    unit, reference_unit = unit.strip().lower(), reference_unit.lower()
+    if unit == reference_unit:
+        return 1.0
+    if unit in _UNIT_MG and reference_unit in _UNIT_MG:
+        return _UNIT_MG[reference_unit] / _UNIT_MG[unit]
+    return None
+
+
+def age_band(age: int) -> int:
+    """
+    Returns the index of the age band of the given age.
+
+    :param age: The age in years.
+    :return: The index in `AGE_BANDS`.
+    """
+    return max(int(np.searchsorted(AGE_BANDS, age, side="right")) - 1, 0)
+
+
+class DailyValueTable:
+    """
+    In-memory daily value reference vectors.
+
+    One row per (gender, age band), one column per catalog nutrient that has
+    a daily value. A daily value is `fixed + per_kcal * energy`, so the
+    requirements that follow the energy value (energy itself, fats,
+    carbohydrates, sugar) are scaled to the user's TDEE within the same
+    vectorized expression. Columns are looked up by nutrient id in a dense
+    array (-1 for nutrients without a daily value), and `keys` holds the key
+    of every column in the product page markup: the slot name for
+    macronutrients and the nutrient name for vitamins and minerals.
+    """
+
+    def __init__(self) -> None:
+        self.ready = False
+        self.keys = np.zeros(0, dtype=object)
+        self._columns = np.zeros(0, dtype=np.int64)
+        rows = len(GENDERS) * len(AGE_BANDS)
+        self._fixed = np.zeros((rows, 0))
+        self._per_kcal = np.zeros((rows, 0))
+        self._energy = np.array(
+            [REFERENCE_ENERGY[gender] for gender in GENDERS], dtype=np.float64
+        ).ravel()
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def rebuild(self, routes: Mapping[int, NutrientRoute | None]) -> None:
+        """
+        Matches the catalog nutrients to the reference values.
+
+        :param routes: The nutrient dictionary, see `NutrientDispatch.routes`.
+        :return: None
+        """
+        nutrient_ids, keys, fixed, per_kcal = [], [], [], []
+        for nutrient_id, route in routes.items():
+            if route is None:
+                continue
+            matched = self._match(route)
+            if matched is None:
+                continue
+            key, factor, values, shares = matched
+            nutrient_ids.append(nutrient_id)
+            keys.append(key)
+            fixed.append(np.asarray(values, dtype=np.float64).ravel() * factor)
+            per_kcal.append(np.full(len(self._energy), shares * factor))
+
+        fresh = DailyValueTable()
+        size = max(nutrient_ids, default=-1) + 1
+        fresh._columns = np.full(size, -1, dtype=np.int64)
+        fresh._columns[nutrient_ids] = np.arange(len(nutrient_ids))
+        fresh.keys = np.array(keys, dtype=object)
+        if nutrient_ids:
+            fresh._fixed = np.column_stack(fixed)
+            fresh._per_kcal = np.column_stack(per_kcal)
+
+        self.__dict__.update(fresh.__dict__)
+        self.ready = True
+
+    def profile_row(self, gender: str | None, age: int | None) -> int | None:
+        """
+        Returns the reference row of a user profile.
+
+        :param gender: The gender of the user.
+        :param age: The age of the user.
+        :return: The row index, or None if the profile lacks the fields.
+        """
+        if gender not in GENDERS or not age or age <= 0:
+            return None
+        return GENDERS.index(gender) * len(AGE_BANDS) + age_band(age)
+
+    def overlay(
+        self,
+        nutrient_ids: np.ndarray,
+        amounts: np.ndarray,
+        row: int,
+        energy: float | None = None,
+    ) -> dict[str, float]:
+        """
+        Expresses nutrient amounts as percentages of the daily values.
+
+        :param nutrient_ids: The nutrient ids.
+        :param amounts: The amounts of the nutrients, aligned with the ids.
+        :param row: The reference row, see `profile_row`.
+        :param energy: The daily energy of the user (TDEE); the reference
+                       energy of the row if not known.
+        :return: The percentages by markup key, rounded to integers, for the
+                 nonzero amounts that have a daily value.
+        """
+        nutrient_ids = np.asarray(nutrient_ids, dtype=np.int64)
+        inside = (nutrient_ids >= 0) & (nutrient_ids < len(self._columns))
+        columns = np.full(len(nutrient_ids), -1, dtype=np.int64)
+        columns[inside] = self._columns[nutrient_ids[inside]]
+        known = (columns >= 0) & (amounts > 0)
+        columns = columns[known]
+
+        if energy is None:
+            energy = self._energy[row]
+        daily = self._fixed[row, columns] + self._per_kcal[row, columns] * energy
+        percents = np.round(amounts[known] / daily * 100.0)
+        return dict(zip(self.keys[columns].tolist(), percents.tolist()))
+
+    def _match(
+        self,
+        route: NutrientRoute,
+    ) -> tuple[str, float, np.ndarray, float] | None:
+        # Норма нутриента: ключ в разметке, перевод единиц, значения по строкам
+        # (без учёта энергии) и доля на ккал
+        op, slot, name, unit = route
+        zeros = np.zeros(len(self._energy))
+        if op == OP_SET and slot in _ENERGY_SHARES:
+            share, kcal_per_unit = _ENERGY_SHARES[slot]
+            # Энергия сравнивается только в ккал, остальное — в граммах
+            factor = _unit_factor(unit, "ккал" if slot == ENERGY_VALUE else "г")
+            if factor is None:
+                return None
+            return SLOT_KEYS[slot], factor, zeros, share / kcal_per_unit
+        if op == OP_SET and slot in _SLOT_VALUES:
+            reference_unit, female, male = _SLOT_VALUES[slot]
+            factor = _unit_factor(unit, reference_unit)
+            if factor is None:
+                return None
+            return SLOT_KEYS[slot], factor, np.array((female, male)), 0.0
+        if op != OP_APPEND:
+            return None
+
+        normalized = _normalize_name(name)
+        for pattern, reference_unit, female, male in _NAMED_PATTERNS:
+            if pattern.search(normalized):
+                factor = _unit_factor(unit, reference_unit)
+                if factor is None:
+                    return None
+                return name, factor, np.array((female, male)), 0.0
+        return None
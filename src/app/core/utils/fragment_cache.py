@@ -0,0 +1,46 @@
+from collections import OrderedDict
+from typing import Generic, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class FragmentCache(Generic[T]):
+    """
+    Bounded in-process LRU cache of rendered template fragments.
+
+    Keys carry the versions of everything the fragment is rendered from, so
+    entries are never invalidated explicitly: stale ones are simply no longer
+    requested and get evicted by newer ones.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._entries: OrderedDict[Hashable, T] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> T | None:
+        """
+        Returns a cached fragment and marks it as recently used.
+
+        :param key: The fragment key.
+        :return: The fragment, or None on a miss.
+        """
+        fragment = self._entries.get(key)
+        if fragment is not None:
+            self._entries.move_to_end(key)
+        return fragment
+
+    def set(self, key: Hashable, fragment: T) -> None:
+        """
+        Stores a fragment, evicting the least recently used one when full.
+
+        :param key: The fragment key.
+        :param fragment: The rendered fragment.
+        :return: None
+        """
+        self._entries[key] = fragment
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
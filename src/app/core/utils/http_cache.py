@@ -0,0 +1,100 @@
+import hashlib
+from email.utils import formatdate
+
+from fastapi import Request, Response, status
+
+# Политики кэширования ответов
+CACHE_NO_STORE = "no-store, no-cache, must-revalidate, max-age=0"
+# Страница зависит от пользователя: браузер хранит её, но сверяет ETag
+CACHE_PRIVATE_REVALIDATE = "private, no-cache"
+CACHE_PUBLIC_REVALIDATE = "public, no-cache"
+
+# Политики по префиксу пути для ответов, не задавших Cache-Control сами
+CACHE_POLICIES_BY_PREFIX = (("/static/", CACHE_PUBLIC_REVALIDATE),)
+
+
+def cache_policy_for_path(path: str) -> str:
+    """
+    Returns the default `Cache-Control` of responses under the given path.
+
+    :param path: The request path.
+    :return: The `Cache-Control` header value.
+    """
+    for prefix, policy in CACHE_POLICIES_BY_PREFIX:
+        if path.startswith(prefix):
+            return policy
+    return CACHE_NO_STORE
+
+
+def make_etag(*parts: object) -> str:
+    """
+    Builds a strong ETag from everything the representation depends on.
+
+    :param parts: The values the response body is derived from.
+    :return: The quoted ETag.
+    """
+    digest = hashlib.blake2b(
+        "\x1f".join(map(str, parts)).encode(),
+        digest_size=16,
+    ).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    Checks `If-None-Match` of a request against the current ETag.
+
+    The comparison is weak, as required for `If-None-Match`.
+
+    :param request: The incoming request object.
+    :param etag: The current ETag of the representation.
+    :return: True if the client already has the representation.
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(
+        candidate.strip().removeprefix("W/") == etag for candidate in header.split(",")
+    )
+
+
+def http_date(timestamp: float) -> str:
+    """
+    Formats a Unix timestamp for `Last-Modified`.
+
+    :param timestamp: The Unix timestamp.
+    :return: The IMF-fixdate string.
+    """
+    return formatdate(timestamp, usegmt=True)
+
+
+def validator_headers(
+    etag: str,
+    last_modified: float,
+    cache_control: str = CACHE_PRIVATE_REVALIDATE,
+) -> dict[str, str]:
+    """
+    Builds the caching headers of a representation.
+
+    :param etag: The ETag of the representation.
+    :param last_modified: The Unix timestamp of the last change.
+    :param cache_control: The `Cache-Control` policy of the route.
+    :return: The headers.
+    """
+    return {
+        "ETag": etag,
+        "Last-Modified": http_date(last_modified),
+        "Cache-Control": cache_control,
+    }
+
+
+def not_modified(headers: dict[str, str]) -> Response:
+    """
+    Builds a 304 response carrying the validators of the representation.
+
+    :param headers: The headers from `validator_headers`.
+    :return: The empty 304 response.
+    """
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
@@ -0,0 +1,220 @@
+from typing import Iterable, NamedTuple
+
+from src.app.models import NutrientCategory
+from src.app.schemas.product import (
+    AminoAcids,
+    CarbsDetail,
+    CarbsSchema,
+    FatsDetail,
+    FatsSchema,
+    MineralsSchema,
+    NutrientBase,
+    OtherSchema,
+    PolyunsaturatedFats,
+    ProductDetailResponse,
+    ProteinsSchema,
+    VitaminLikeSchema,
+    VitaminsSchema,
+)
+
+# Операции над слотами ответа
+OP_SET = 0
+OP_ADD = 1
+OP_APPEND = 2
+
+# Скалярные слоты ProductDetailResponse
+(
+    PROTEINS,
+    FATS,
+    CARBS,
+    WATER,
+    ENERGY_VALUE,
+    ESSENTIAL_AMINO,
+    COND_ESSENTIAL_AMINO,
+    NONESSENTIAL_AMINO,
+    SATURATED,
+    CHOLESTEROL,
+    MONOUNSATURATED,
+    POLYUNSATURATED,
+    OMEGA3,
+    OMEGA6,
+    FIBER,
+    SUGAR,
+) = range(16)
+SCALAR_SLOTS = 16
+
+# Списочные слоты ProductDetailResponse
+VITAMINS, VITAMIN_LIKE, MINERALS_MACRO, MINERALS_MICRO, OTHER = range(5)
+LIST_SLOTS = 5
+
+_LIST_SLOT_BY_CATEGORY = {
+    NutrientCategory.VITAMINS: VITAMINS,
+    NutrientCategory.VITAMIN_LIKE: VITAMIN_LIKE,
+    NutrientCategory.MINERALS_MACRO: MINERALS_MACRO,
+    NutrientCategory.MINERALS_MICRO: MINERALS_MICRO,
+    NutrientCategory.OTHER: OTHER,
+}
+
+_ADD_SLOT_BY_CATEGORY = {
+    NutrientCategory.ESSENTIAL_AMINO: ESSENTIAL_AMINO,
+    NutrientCategory.COND_ESSENTIAL_AMINO: COND_ESSENTIAL_AMINO,
+    NutrientCategory.NONESSENTIAL_AMINO: NONESSENTIAL_AMINO,
+    NutrientCategory.MONOUNSATURATED_FATS: MONOUNSATURATED,
+}
+
+# Подстроки названий, различающие нутриенты внутри одной категории
+_SET_SLOTS_BY_NAME = {
+    NutrientCategory.MACRO: (
+        ("белки", PROTEINS),
+        ("жиры", FATS),
+        ("углеводы", CARBS),
+        ("вода", WATER),
+    ),
+    NutrientCategory.POLYUNSATURATED_FATS: (
+        ("полиненасыщенные", POLYUNSATURATED),
+        ("омега-3", OMEGA3),
+        ("омега-6", OMEGA6),
+    ),
+    NutrientCategory.CARBS: (
+        ("клетчатка", FIBER),
+        ("сахар", SUGAR),
+    ),
+}
+
+
+class NutrientRoute(NamedTuple):
+    op: int
+    slot: int
+    name: str
+    unit: str
+
+
+def route_nutrient(
+    name: str, unit: str, category: NutrientCategory
+) -> NutrientRoute | None:
+    """
+    Decides where the amount of a nutrient goes in `ProductDetailResponse`.
+
+    :param name: The nutrient name.
+    :param unit: The nutrient unit.
+    :param category: The nutrient category.
+    :return: The route, or None if the nutrient is not shown.
+    """
+    lowered = name.lower()
+
+    if category == NutrientCategory.ENERGY_VALUE:
+        return NutrientRoute(OP_SET, ENERGY_VALUE, name, unit)
+    if category == NutrientCategory.SATURATED_FATS:
+        if "холестерин" in lowered:
+            return NutrientRoute(OP_SET, CHOLESTEROL, name, unit)
+        return NutrientRoute(OP_ADD, SATURATED, name, unit)
+    if category in _ADD_SLOT_BY_CATEGORY:
+        return NutrientRoute(OP_ADD, _ADD_SLOT_BY_CATEGORY[category], name, unit)
+    if category in _LIST_SLOT_BY_CATEGORY:
+        return NutrientRoute(OP_APPEND, _LIST_SLOT_BY_CATEGORY[category], name, unit)
+
+    for needle, slot in _SET_SLOTS_BY_NAME.get(category, ()):
+        if needle in lowered:
+            return NutrientRoute(OP_SET, slot, name, unit)
+    return None
+
+
+class NutrientDispatch:
+    """
+    Process-wide nutrient dictionary: nutrient id -> route in the response.
+
+    The table is built once from the `Nutrient` table, so name matching runs
+    per nutrient instead of per product nutrient, and products can be mapped
+    from bare `(nutrient_id, amount)` pairs. `version` is the catalog version
+    the table was loaded at. Nutrients missing from the table (added after the
+    last load) make `ensure_nutrient_dispatch` reload it.
+    """
+
+    def __init__(self) -> None:
+        self.routes: dict[int, NutrientRoute | None] = {}
+        self.version: int | None = None
+
+    def __len__(self) -> int:
+        return len(self.routes)
+
+    def load(
+        self,
+        nutrients: Iterable[tuple[int, str, str, NutrientCategory]],
+        version: int | None = None,
+    ) -> None:
+        """
+        Replaces the table with the routes of the given nutrients.
+
+        :param nutrients: `(id, name, unit, category)` rows.
+        :param version: The catalog version the rows were read at.
+        :return: None
+        """
+        self.routes = {
+            nutrient_id: route_nutrient(name, unit, category)
+            for nutrient_id, name, unit, category in nutrients
+        }
+        self.version = version
+
+
+def build_detail_response(
+    product_id: int,
+    title: str,
+    group_name: str,
+    scalars: list[float],
+    lists: list[list[NutrientBase]],
+) -> ProductDetailResponse:
+    """
+    Assembles `ProductDetailResponse` from the accumulated slots.
+
+    :param product_id: The product id.
+    :param title: The product title.
+    :param group_name: The product group name.
+    :param scalars: The values of the scalar slots.
+    :param lists: The nutrients of the list slots.
+    :return: The response object.
+    """
+    return ProductDetailResponse(
+        id=product_id,
+        title=title,
+        group_name=group_name,
+        proteins=ProteinsSchema(
+            total=scalars[PROTEINS],
+            amino_acids=AminoAcids(
+                essential=scalars[ESSENTIAL_AMINO],
+                cond_essential=scalars[COND_ESSENTIAL_AMINO],
+                nonessential=scalars[NONESSENTIAL_AMINO],
+            ),
+        ),
+        fats=FatsSchema(
+            total=scalars[FATS],
+            breakdown=FatsDetail(
+                saturated=scalars[SATURATED],
+                monounsaturated=scalars[MONOUNSATURATED],
+                polyunsaturated=PolyunsaturatedFats(
+                    total=scalars[POLYUNSATURATED],
+                    omega3=scalars[OMEGA3],
+                    omega6=scalars[OMEGA6],
+                ),
+                cholesterol=scalars[CHOLESTEROL],
+            ),
+        ),
+        carbs=CarbsSchema(
+            total=scalars[CARBS],
+            breakdown=CarbsDetail(
+                fiber=scalars[FIBER],
+                sugar=scalars[SUGAR],
+            ),
+        ),
+        energy_value=scalars[ENERGY_VALUE],
+        water=scalars[WATER],
+        vitamins=VitaminsSchema(vits=lists[VITAMINS]),
+        vitamin_like=VitaminLikeSchema(vitslk=lists[VITAMIN_LIKE]),
+        minerals=MineralsSchema(
+            macro=lists[MINERALS_MACRO],
+            micro=lists[MINERALS_MICRO],
+        ),
+        other=OtherSchema(oths=lists[OTHER]),
+    )
+
+
+nutrient_dispatch = NutrientDispatch()
@@ -0,0 +1,304 @@
+from typing import Iterable, NamedTuple
+
+import numpy as np
+
+# Начальная ёмкость матрицы по продуктам при пустом каталоге
+_MIN_CAPACITY = 64
+
+
+class NutrientRange(NamedTuple):
+    nutrient_id: int
+    min: float | None = None
+    max: float | None = None
+
+
+class NutrientMatch(NamedTuple):
+    product_id: int
+    value: float | None
+
+
+class NutrientMatrix:
+    """
+    In-memory columnar nutrient matrix: one float32 row per nutrient, one
+    column per product.
+
+    The amounts of a nutrient across the whole catalog are contiguous, so a
+    range filter is a single vectorized comparison and a sort key is a single
+    slice. Missing amounts are stored as zeros, like in `ProductDetailResponse`;
+    a parallel boolean matrix tells them apart from amounts stored as zero.
+    Product columns freed by `remove` are reused by `upsert`; `live` marks the
+    columns that hold a product.
+    """
+
+    def __init__(self) -> None:
+        self.ready = False
+        self.energy_nutrient_id: int | None = None
+        self._nutrients: dict[int, int] = {}
+        self._products: dict[int, int] = {}
+        self._free: list[int] = []
+        self._size = 0
+        self._amounts = np.zeros((0, _MIN_CAPACITY), dtype=np.float32)
+        self._stored = np.zeros((0, _MIN_CAPACITY), dtype=bool)
+        self._product_ids = np.zeros(_MIN_CAPACITY, dtype=np.int64)
+        self.live = np.zeros(_MIN_CAPACITY, dtype=bool)
+
+    def __len__(self) -> int:
+        return len(self._products)
+
+    def __contains__(self, product_id: int) -> bool:
+        return product_id in self._products
+
+    def rebuild(
+        self,
+        rows: Iterable[tuple[int, int, float]],
+        energy_nutrient_id: int | None = None,
+    ) -> None:
+        """
+        Replaces the contents of the matrix.
+
+        :param rows: `(product_id, nutrient_id, amount)` tuples for the whole
+                     catalog.
+        :param energy_nutrient_id: The id of the energy value nutrient (kcal).
+        :return: None
+        """
+        triples = np.array(list(rows), dtype=np.float64).reshape(-1, 3)
+        product_ids, product_index = np.unique(
+            triples[:, 0].astype(np.int64), return_inverse=True
+        )
+        nutrient_ids, nutrient_index = np.unique(
+            triples[:, 1].astype(np.int64), return_inverse=True
+        )
+
+        fresh = NutrientMatrix()
+        capacity = max(_MIN_CAPACITY, len(product_ids))
+        fresh._amounts = np.zeros((len(nutrient_ids), capacity), dtype=np.float32)
+        fresh._amounts[nutrient_index, product_index] = triples[:, 2]
+        fresh._stored = np.zeros(fresh._amounts.shape, dtype=bool)
+        fresh._stored[nutrient_index, product_index] = True
+        fresh._product_ids = np.zeros(capacity, dtype=np.int64)
+        fresh._product_ids[: len(product_ids)] = product_ids
+        fresh.live = np.zeros(capacity, dtype=bool)
+        fresh.live[: len(product_ids)] = True
+        fresh._size = len(product_ids)
+        fresh._nutrients = {int(n): i for i, n in enumerate(nutrient_ids)}
+        fresh._products = {int(p): i for i, p in enumerate(product_ids)}
+        fresh.energy_nutrient_id = energy_nutrient_id
+
+        self.__dict__.update(fresh.__dict__)
+        self.ready = True
+
+    def upsert(self, product_id: int, amounts: Iterable[tuple[int, float]]) -> None:
+        """
+        Adds a product to the matrix or replaces its amounts.
+
+        :param product_id: The product id.
+        :param amounts: `(nutrient_id, amount)` pairs of the product.
+        :return: None
+        """
+        amounts = list(amounts)
+        self._add_nutrients(nutrient_id for nutrient_id, _ in amounts)
+
+        column = self._products.get(product_id)
+        if column is None:
+            column = self._allocate()
+            self._products[product_id] = column
+            self._product_ids[column] = product_id
+            self.live[column] = True
+
+        self._amounts[:, column] = 0.0
+        self._stored[:, column] = False
+        for nutrient_id, amount in amounts:
+            self._amounts[self._nutrients[nutrient_id], column] = amount
+            self._stored[self._nutrients[nutrient_id], column] = True
+
+    def remove(self, product_id: int) -> None:
+        """
+        Removes a product from the matrix if it is present.
+
+        :param product_id: The product id.
+        :return: None
+        """
+        column = self._products.pop(product_id, None)
+        if column is None:
+            return
+        self.live[column] = False
+        self._amounts[:, column] = 0.0
+        self._stored[:, column] = False
+        self._free.append(column)
+
+    def product_vectors(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the nutrient amounts of every product as row vectors.
+
+        :return: The product ids and a products x nutrients copy of the amounts.
+        """
+        columns = np.flatnonzero(self.live)
+        return self._product_ids[columns], self._amounts[:, columns].T.copy()
+
+    def product_amounts(
+        self,
+        product_ids: list[int],
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Returns the nutrient amounts of the given products as column vectors.
+
+        Products missing from the matrix get zero columns.
+
+        :param product_ids: The product ids.
+        :return: The nutrient ids, one per row, a nutrients x products float64
+                 copy of the amounts per 100 g and a mask of the same shape
+                 marking the amounts the products have stored.
+        """
+        columns = [self._products.get(product_id, -1) for product_id in product_ids]
+        amounts = np.zeros((len(self._nutrients), len(columns)), dtype=np.float64)
+        stored = np.zeros(amounts.shape, dtype=bool)
+        known = [i for i, column in enumerate(columns) if column >= 0]
+        amounts[:, known] = self._amounts[:, [columns[i] for i in known]]
+        stored[:, known] = self._stored[:, [columns[i] for i in known]]
+        return np.fromiter(self._nutrients, dtype=np.int64), amounts, stored
+
+    def nutrient_rows(self, nutrient_ids: list[int]) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the amounts of the given nutrients across the whole catalog.
+
+        :param nutrient_ids: The nutrient ids.
+        :return: The product ids and a nutrients x products float64 copy of
+                 the amounts per 100 g; nutrients no product has are zero rows.
+        """
+        columns = np.flatnonzero(self.live)
+        amounts = np.stack(
+            [self._column(nutrient_id)[columns] for nutrient_id in nutrient_ids]
+        ).astype(np.float64)
+        return self._product_ids[columns], amounts
+
+    def query(
+        self,
+        ranges: Iterable[NutrientRange],
+        sort_by: int | None = None,
+        per_energy: bool = False,
+        descending: bool = True,
+        limit: int = 20,
+    ) -> tuple[int, list[NutrientMatch]]:
+        """
+        Filters products by nutrient ranges and returns the top of the matches.
+
+        Ranges are inclusive and combined with AND. Only the `limit` best
+        matches are ordered: they are selected with `argpartition`, so the cost
+        of the query is linear in the catalog size whatever the number of
+        matches. The returned products are ordered by the value, then by id.
+
+        :param ranges: The nutrient amount ranges per 100 g.
+        :param sort_by: The id of the nutrient to sort by, None to sort by
+                        product id.
+        :param per_energy: Whether to sort by the amount per 100 kcal; products
+                           without energy value are excluded.
+        :param descending: Whether the largest values come first.
+        :param limit: The maximum number of returned products.
+        :raises ValueError: If `per_energy` is set but the energy value
+                            nutrient is unknown.
+        :return: The number of matching products and the top `limit` of them
+                 with their sort values.
+        """
+        mask = self.live.copy()
+        for nutrient_id, low, high in ranges:
+            amounts = self._column(nutrient_id)
+            if low is not None:
+                mask &= amounts >= low
+            if high is not None:
+                mask &= amounts <= high
+
+        key = None
+        if sort_by is not None:
+            key = self._column(sort_by)
+            if per_energy:
+                if self.energy_nutrient_id is None:
+                    raise ValueError("Energy value nutrient is unknown")
+                energy = self._column(self.energy_nutrient_id)
+                mask &= energy > 0
+
+        candidates = np.flatnonzero(mask)
+        total = len(candidates)
+        if key is None:
+            values = None
+            order = self._product_ids[candidates]
+        else:
+            values = key[candidates]
+            if per_energy:
+                values = values * np.float32(100) / energy[candidates]
+            order = -values if descending else values
+
+        if total > limit:
+            # Граница top-N; равные ей значения берутся все, чтобы при
+            # совпадениях выбор по id не зависел от argpartition
+            kth = order[np.argpartition(order, limit - 1)[limit - 1]]
+            top = np.flatnonzero(order <= kth)
+        else:
+            top = np.arange(total)
+        # Полная сортировка только выбранных, с id как вторым ключом
+        top = top[np.lexsort((self._product_ids[candidates[top]], order[top]))]
+        top = top[:limit]
+
+        product_ids = self._product_ids[candidates[top]].tolist()
+        if values is None:
+            return total, [
+                NutrientMatch(product_id, None) for product_id in product_ids
+            ]
+        return total, [
+            NutrientMatch(product_id, value)
+            for product_id, value in zip(product_ids, values[top].tolist())
+        ]
+
+    def _column(self, nutrient_id: int) -> np.ndarray:
+        row = self._nutrients.get(nutrient_id)
+        if row is None:
+            # Нутриента нет ни у одного продукта — количество везде нулевое
+            return np.zeros(len(self.live), dtype=np.float32)
+        return self._amounts[row]
+
+    def _add_nutrients(self, nutrient_ids: Iterable[int]) -> None:
+        missing = {n for n in nutrient_ids if n not in self._nutrients}
+        if not missing:
+            return
+        for nutrient_id in sorted(missing):
+            self._nutrients[nutrient_id] = len(self._nutrients)
+        self._amounts = np.vstack(
+            (
+                self._amounts,
+                np.zeros((len(missing), self._amounts.shape[1]), dtype=np.float32),
+            )
+        )
+        self._stored = np.vstack(
+            (self._stored, np.zeros((len(missing), self._stored.shape[1]), bool))
+        )
+
+    def _allocate(self) -> int:
+        if self._free:
+            return self._free.pop()
+
+        capacity = len(self.live)
+        if self._size == capacity:
+            # Удвоение ёмкости, чтобы добавление продуктов по одному оставалось
+            # амортизированно дешёвым
+            grown = capacity * 2
+            self._amounts = np.hstack(
+                (
+                    self._amounts,
+                    np.zeros((self._amounts.shape[0], grown - capacity), np.float32),
+                )
+            )
+            self._stored = np.hstack(
+                (
+                    self._stored,
+                    np.zeros((self._stored.shape[0], grown - capacity), bool),
+                )
+            )
+            self._product_ids = np.concatenate(
+                (self._product_ids, np.zeros(grown - capacity, dtype=np.int64))
+            )
+            self.live = np.concatenate(
+                (self.live, np.zeros(grown - capacity, dtype=bool))
+            )
+
+        column = self._size
+        self._size += 1
+        return column
@@ -1,6 +1,8 @@
 from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.app.core.utils.text import normalize_title
 from src.app.models import PendingProduct
 
 
@@ -11,12 +13,16 @@ async def check_pending_exists(
     """
     Check if a pending product with the given name exists in the database.
 
+    Names are compared by their normalized form using the unique index.
+
     :param session: AsyncSession
     :param name: str
     :return: bool
     """
     result = await session.execute(
-        select(PendingProduct).where(PendingProduct.name.ilike(name))
+        select(PendingProduct.id).where(
+            PendingProduct.normalized_name == normalize_title(name)
+        )
     )
     return result.scalar() is not None
 
@@ -28,10 +34,15 @@ async def create_pending_product(
     """
     Creates a new pending product in the database.
 
+    A product whose normalized name is already queued is silently skipped.
+
     :param session: AsyncSession
     :param name: str
     :return: None
     """
-    new_pending = PendingProduct(name=name)
-    session.add(new_pending)
+    await session.execute(
+        insert(PendingProduct)
+        .values(name=name)
+        .on_conflict_do_nothing(index_elements=[PendingProduct.normalized_name])
+    )
     await session.commit()
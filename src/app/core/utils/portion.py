@@ -0,0 +1,77 @@
+import numpy as np
+
+# Количества в каталоге указаны на 100 г продукта
+BASE_GRAMS = 100.0
+# Основа «на 100 ккал»
+BASE_KCAL = 100.0
+# Масштабированные количества округляются, чтобы убрать хвосты float32
+PORTION_DECIMALS = 6
+
+
+def scale_portions(amounts: np.ndarray, grams: np.ndarray) -> np.ndarray:
+    """
+    Scales nutrient amounts per 100 g to portions.
+
+    Every product is a column of `amounts`, so the whole batch is scaled with
+    a single broadcast multiply.
+
+    :param amounts: The nutrients x products matrix of amounts per 100 g.
+    :param grams: The portion weight of every product in grams.
+    :return: The nutrients x products matrix of amounts per portion.
+    """
+    return np.round(amounts * (grams / BASE_GRAMS), PORTION_DECIMALS)
+
+
+def grams_per_energy(energy: np.ndarray, kcal: float = BASE_KCAL) -> np.ndarray:
+    """
+    Returns the weight of the products holding the given energy value.
+
+    :param energy: The energy value of every product in kcal per 100 g.
+    :param kcal: The energy value of the portion.
+    :return: The portion weights in grams; NaN for products without energy
+             value.
+    """
+    grams = np.full(len(energy), np.nan)
+    positive = energy > 0
+    grams[positive] = kcal * BASE_GRAMS / energy[positive]
+    return grams
+
+
+def scale_amounts(amounts: dict[str, float], grams: float) -> dict[str, float]:
+    """
+    Scales a sparse nutrient vector per 100 g to a portion.
+
+    :param amounts: The amounts per 100 g by nutrient id.
+    :param grams: The portion weight in grams.
+    :return: The nonzero amounts per portion by nutrient id.
+    """
+    scaled = scale_portions(np.fromiter(amounts.values(), dtype=np.float64), grams)
+    return {
+        nutrient_id: amount
+        for nutrient_id, amount in zip(amounts, scaled.tolist())
+        if amount
+    }
+
+
+def add_amounts(
+    totals: dict[str, float],
+    amounts: dict[str, float],
+    sign: float = 1.0,
+) -> dict[str, float]:
+    """
+    Adds (or subtracts) a sparse nutrient vector to running totals.
+
+    :param totals: The running totals by nutrient id.
+    :param amounts: The amounts to add by nutrient id.
+    :param sign: 1 to add the amounts, -1 to subtract them.
+    :return: The new totals; nutrients that dropped to zero are left out.
+    """
+    merged = dict(totals)
+    for nutrient_id, amount in amounts.items():
+        value = round(merged.get(nutrient_id, 0.0) + sign * amount, PORTION_DECIMALS)
+        # Остаток от округлений после вычитания отбрасывается
+        if value > 0:
+            merged[nutrient_id] = value
+        else:
+            merged.pop(nutrient_id, None)
+    return merged
@@ -1,107 +1,53 @@
+from typing import Iterable
+
 from src.app.core.logger import get_logger
-from src.app.models import Product, NutrientCategory
+from src.app.core.utils.nutrient_dispatch import (
+    LIST_SLOTS,
+    OP_ADD,
+    OP_SET,
+    SCALAR_SLOTS,
+    build_detail_response,
+    nutrient_dispatch,
+)
 from src.app.schemas.product import NutrientBase, ProductDetailResponse
 
 log = get_logger("product_utils")
 
 
-def map_to_schema(product: Product) -> ProductDetailResponse:
+def map_nutrients_to_schema(
+    product_id: int,
+    title: str,
+    group_name: str,
+    nutrients: Iterable[tuple[int, float]],
+) -> ProductDetailResponse:
     """
-    Maps a `Product` object to a `ProductDetailResponse` object.
+    Maps bare product nutrient amounts to a `ProductDetailResponse` object.
 
-    Iterates over the product's nutrient associations and maps the nutrient
-    amounts to the corresponding fields in the response object.
+    Names, units and categories come from the process-wide `nutrient_dispatch`
+    dictionary, so the caller only loads `(nutrient_id, amount)` pairs and must
+    make sure the dictionary knows every nutrient id. Unknown ids are skipped.
 
-    :param product: The product to map.
+    :param product_id: The product id.
+    :param title: The product title.
+    :param group_name: The product group name.
+    :param nutrients: The `(nutrient_id, amount)` pairs of the product.
     :return: The mapped response object.
     """
-    response = ProductDetailResponse(
-        id=product.id,
-        title=product.title,
-        group_name=product.product_groups.name,
-    )
-    # log.info("Mapping product %s to schema", product.title)
-    for assoc in product.nutrient_associations:
-        nutrient = assoc.nutrients
-        amount = assoc.amount
-        unit = nutrient.unit
-
-        # Обработка макронутриентов
-        if nutrient.category == NutrientCategory.MACRO:
-            if "белки" in nutrient.name.lower():
-                response.proteins.total = amount
-            elif "жиры" in nutrient.name.lower():
-                response.fats.total = amount
-            elif "углеводы" in nutrient.name.lower():
-                response.carbs.total = amount
-            elif "вода" in nutrient.name.lower():
-                response.water = amount
-
-        elif nutrient.category == NutrientCategory.ENERGY_VALUE:
-            response.energy_value = amount
-
-        # Обработка аминокислот
-        elif nutrient.category == NutrientCategory.ESSENTIAL_AMINO:
-            response.proteins.amino_acids.essential += amount
-
-        elif nutrient.category == NutrientCategory.COND_ESSENTIAL_AMINO:
-            response.proteins.amino_acids.cond_essential += amount
-
-        elif nutrient.category == NutrientCategory.NONESSENTIAL_AMINO:
-            response.proteins.amino_acids.nonessential += amount
-
-        # Обработка жиров
-        elif nutrient.category == NutrientCategory.SATURATED_FATS:
-            if "холестерин" in nutrient.name.lower():
-                response.fats.breakdown.cholesterol = amount
-            else:
-                response.fats.breakdown.saturated += amount
-
-        elif nutrient.category == NutrientCategory.MONOUNSATURATED_FATS:
-            response.fats.breakdown.monounsaturated += amount
-
-        elif nutrient.category == NutrientCategory.POLYUNSATURATED_FATS:
-            if "полиненасыщенные" in nutrient.name.lower():
-                response.fats.breakdown.polyunsaturated.total = amount
-            elif "омега-3" in nutrient.name.lower():
-                response.fats.breakdown.polyunsaturated.omega3 = amount
-            elif "омега-6" in nutrient.name.lower():
-                response.fats.breakdown.polyunsaturated.omega6 = amount
-
-        # Обработка углеводов
-        elif nutrient.category == NutrientCategory.CARBS:
-            if "клетчатка" in nutrient.name.lower():
-                response.carbs.breakdown.fiber = amount
-            elif "сахар" in nutrient.name.lower():
-                response.carbs.breakdown.sugar = amount
-
-        # Витамины
-        elif nutrient.category == NutrientCategory.VITAMINS:
-            response.vitamins.vits.append(
-                NutrientBase(name=nutrient.name, amount=amount, unit=unit)
-            )
-
-        # Витаминоподобные
-        elif nutrient.category == NutrientCategory.VITAMIN_LIKE:
-            response.vitamin_like.vitslk.append(
-                NutrientBase(name=nutrient.name, amount=amount, unit=unit)
-            )
-
-        # Минералы
-        elif nutrient.category == NutrientCategory.MINERALS_MACRO:
-            response.minerals.macro.append(
-                NutrientBase(name=nutrient.name, amount=amount, unit=unit)
-            )
-
-        elif nutrient.category == NutrientCategory.MINERALS_MICRO:
-            response.minerals.micro.append(
-                NutrientBase(name=nutrient.name, amount=amount, unit=unit)
-            )
-
-        # Прочие нутриенты
-        elif nutrient.category == NutrientCategory.OTHER:
-            response.other.oths.append(
-                NutrientBase(name=nutrient.name, amount=amount, unit=unit)
-            )
-
-    return response
+    scalars = [0.0] * SCALAR_SLOTS
+    lists: list[list[NutrientBase]] = [[] for _ in range(LIST_SLOTS)]
+    routes = nutrient_dispatch.routes
+
+    for nutrient_id, amount in nutrients:
+        route = routes.get(nutrient_id)
+        if route is None:
+            continue
+
+        op, slot, name, unit = route
+        if op == OP_SET:
+            scalars[slot] = amount
+        elif op == OP_ADD:
+            scalars[slot] += amount
+        else:
+            lists[slot].append(NutrientBase(name=name, amount=amount, unit=unit))
+
+    return build_detail_response(product_id, title, group_name, scalars, lists)
@@ -0,0 +1,71 @@
+import base64
+import binascii
+import hashlib
+from typing import NamedTuple
+
+import orjson
+
+from src.app.core.utils.text import normalize_title
+
+
+class SearchCursor(NamedTuple):
+    catalog_version: int
+    ranking_version: int
+    rank: float
+    product_id: int
+
+
+def _query_digest(query: str) -> str:
+    return hashlib.blake2b(normalize_title(query).encode(), digest_size=8).hexdigest()
+
+
+def encode_search_cursor(query: str, cursor: SearchCursor) -> str:
+    """
+    Encodes the position after the last row of a search page.
+
+    The cursor is opaque to clients: a URL-safe base64 of the catalog version
+    and the ranking generation the page was ranked against, the `(rank, id)`
+    keyset of the last row and a digest of the query it belongs to.
+
+    :param query: The search query of the page.
+    :param cursor: The position to encode.
+    :return: The cursor string.
+    """
+    payload = orjson.dumps(
+        {
+            "v": cursor.catalog_version,
+            "g": cursor.ranking_version,
+            "r": cursor.rank,
+            "i": cursor.product_id,
+            "q": _query_digest(query),
+        }
+    )
+    return base64.urlsafe_b64encode(payload).rstrip(b"=").decode()
+
+
+def decode_search_cursor(query: str, value: str) -> SearchCursor:
+    """
+    Decodes a cursor produced by `encode_search_cursor`.
+
+    :param query: The search query the cursor is used with.
+    :param value: The cursor string.
+    :raises ValueError: If the cursor is malformed or belongs to another query.
+    :return: The decoded position.
+    """
+    try:
+        payload = orjson.loads(
+            base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+        )
+        cursor = SearchCursor(
+            int(payload["v"]),
+            int(payload["g"]),
+            float(payload["r"]),
+            int(payload["i"]),
+        )
+        digest = payload["q"]
+    except (binascii.Error, orjson.JSONDecodeError, KeyError, TypeError, ValueError):
+        raise ValueError("Malformed search cursor")
+
+    if digest != _query_digest(query):
+        raise ValueError("Search cursor belongs to another query")
+    return cursor
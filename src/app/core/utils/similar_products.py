@@ -0,0 +1,131 @@
+from typing import NamedTuple
+
+import numpy as np
+
+
+class SimilarProduct(NamedTuple):
+    product_id: int
+    similarity: float
+
+
+class SimilarProductsIndex:
+    """
+    In-memory nearest-neighbour index over product nutrient profiles.
+
+    Every product is a float32 vector of its nutrient amounts, each nutrient
+    divided by its root mean square over the catalog (so milligrams of
+    vitamins weigh as much as grams of macronutrients) and the vector scaled
+    to unit length. Cosine similarity to all products is then a single
+    matrix-vector product, and the top-k is selected with `argpartition`,
+    ties at its boundary broken by product id.
+    The index is immutable: it is rebuilt as a whole on catalog changes and
+    swapped in.
+    """
+
+    def __init__(self) -> None:
+        self.ready = False
+        # Версия каталога, с которой индекс согласован
+        self.version: int | None = None
+        self._rows: dict[int, int] = {}
+        self._product_ids = np.zeros(0, dtype=np.int64)
+        self._group_ids = np.zeros(0, dtype=np.int64)
+        self._order = np.zeros(0, dtype=np.int64)
+        self._vectors = np.zeros((0, 0), dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def rebuild(
+        self,
+        product_ids: np.ndarray,
+        amounts: np.ndarray,
+        group_ids: np.ndarray,
+        version: int | None = None,
+    ) -> None:
+        """
+        Replaces the contents of the index.
+
+        :param product_ids: The product ids, one per row of `amounts`.
+        :param amounts: The products x nutrients matrix of amounts.
+        :param group_ids: The product group ids, one per row of `amounts`.
+        :param version: The catalog version the amounts were read at.
+        :return: None
+        """
+        vectors = np.array(amounts, dtype=np.float32, order="C")
+        scale = np.sqrt(np.mean(np.square(vectors), axis=0))
+        scale[scale == 0] = 1.0
+        vectors /= scale
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        vectors /= norms
+
+        fresh = SimilarProductsIndex()
+        fresh._vectors = vectors
+        fresh._product_ids = np.asarray(product_ids, dtype=np.int64)
+        fresh._group_ids = np.asarray(group_ids, dtype=np.int64)
+        fresh._rows = {int(p): i for i, p in enumerate(fresh._product_ids)}
+        fresh._order = np.argsort(fresh._product_ids)
+        fresh.version = version
+
+        self.__dict__.update(fresh.__dict__)
+        self.ready = True
+
+    def product_groups(self, product_ids: np.ndarray) -> np.ndarray:
+        """
+        Returns the group ids of the given products.
+
+        :param product_ids: The product ids.
+        :return: The group id of every product; -1 for products not indexed.
+        """
+        product_ids = np.asarray(product_ids, dtype=np.int64)
+        groups = np.full(len(product_ids), -1, dtype=np.int64)
+        if not len(self._order):
+            return groups
+        indexed = self._product_ids[self._order]
+        positions = np.minimum(np.searchsorted(indexed, product_ids), len(indexed) - 1)
+        found = indexed[positions] == product_ids
+        groups[found] = self._group_ids[self._order[positions[found]]]
+        return groups
+
+    def similar(
+        self,
+        product_id: int,
+        limit: int = 5,
+        same_group: bool = False,
+    ) -> list[SimilarProduct]:
+        """
+        Returns the products closest in nutrient profile to the given one.
+
+        :param product_id: The product id.
+        :param limit: The maximum number of returned products.
+        :param same_group: Whether to return only products of the same group.
+        :return: The neighbours, most similar first and by product id among
+                 equal scores; empty if the product is not indexed or has no
+                 nutrients.
+        """
+        row = self._rows.get(product_id)
+        if row is None or not self._vectors[row].any():
+            return []
+
+        scores = self._vectors @ self._vectors[row]
+        scores[row] = -np.inf
+        if same_group:
+            scores[self._group_ids != self._group_ids[row]] = -np.inf
+
+        limit = min(limit, len(scores) - 1)
+        if limit <= 0:
+            return []
+        order = -scores
+        # Граница top-k; равные ей значения берутся все, чтобы при совпадениях
+        # выбор по id не зависел от argpartition
+        kth = order[np.argpartition(order, limit - 1)[limit - 1]]
+        top = np.flatnonzero(order <= kth)
+        top = top[np.lexsort((self._product_ids[top], order[top]))][:limit]
+
+        return [
+            SimilarProduct(product_id, similarity)
+            for product_id, similarity in zip(
+                self._product_ids[top].tolist(), scores[top].tolist()
+            )
+            if similarity > -np.inf
+        ]
@@ -1,3 +1,37 @@
+import hashlib
+from functools import cache
+
 from fastapi.templating import Jinja2Templates
+from jinja2 import meta
 
 templates = Jinja2Templates(directory="src/app/templates")
+
+
+@cache
+def template_version(name: str) -> str:
+    """
+    Computes the version of a template and of every template it references.
+
+    Used in ETags of rendered pages, so a deploy that changes the markup
+    invalidates pages cached by browsers.
+
+    :param name: The template name.
+    :return: The hex digest of the template sources.
+    """
+    digest = hashlib.blake2b(digest_size=8)
+    pending, seen = [name], set()
+    while pending:
+        current = pending.pop()
+        if current in seen:
+            continue
+        seen.add(current)
+        source, _, _ = templates.env.loader.get_source(templates.env, current)
+        digest.update(source.encode())
+        pending.extend(
+            referenced
+            for referenced in meta.find_referenced_templates(
+                templates.env.parse(source)
+            )
+            if referenced is not None
+        )
+    return digest.hexdigest()
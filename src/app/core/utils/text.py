@@ -0,0 +1,35 @@
+import re
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_title(value: str) -> str:
+    """
+    Normalizes a product title or search query for equality and prefix lookups.
+
+    The value is lowercased, "ё" is folded into "е" and every run of whitespace
+    is collapsed into a single space.
+
+    >>> normalize_title("  Крупа   гречневая ЁЖ ")
+    'крупа гречневая еж'
+
+    :param value: The raw title or query string.
+    :return: The normalized string.
+    """
+    return _WHITESPACE_RE.sub(" ", value.lower().replace("ё", "е")).strip()
+
+
+def normalize_title_sql(column: str) -> str:
+    """
+    Returns the SQL expression mirroring `normalize_title` for a column.
+
+    It is used for the generated normalized columns, so the database keeps them
+    up to date on every write, including writes made outside the application.
+
+    :param column: The name of the column to normalize.
+    :return: The SQL expression.
+    """
+    return (
+        f"btrim(regexp_replace(replace(lower({column}), 'ё', 'е'), "
+        r"'\s+', ' ', 'g'))"
+    )
@@ -1,8 +1,72 @@
+import zlib
+from typing import Iterable, NamedTuple
+
+import numpy as np
+
 from src.app.schemas.user import UserAccount
 from src.app.core.logger import get_logger
 
 log = get_logger("user_service")
 
+# Коэффициенты физической активности по уровням профиля (группы МР 2.3.1.0253-21)
+KFA_FACTORS = {"1": 1.4, "2": 1.6, "3": 1.9, "4": 2.2, "5": 2.5}
+
+# Цель -> (поправка калорийности, доли энергии белков, жиров и углеводов)
+GOAL_TARGETS = {
+    "Снижение веса": (0.85, 0.25, 0.30, 0.45),
+    "Поддержание веса": (1.0, 0.20, 0.30, 0.50),
+    "Увеличение веса": (1.15, 0.20, 0.25, 0.55),
+}
+DEFAULT_GOAL = "Поддержание веса"
+
+# Энергия одного грамма белков, жиров и углеводов, ккал
+KCAL_PER_GRAM_PROTEIN = 4.0
+KCAL_PER_GRAM_FAT = 9.0
+KCAL_PER_GRAM_CARBS = 4.0
+
+
+# Допустимые значения профиля, как в calculate_bmr и calculate_tdee
+MAX_AGE = 120
+MAX_WEIGHT = 500.0
+MAX_HEIGHT = 300.0
+MIN_KFA = 1.0
+MAX_KFA = 2.5
+
+# Меняется вместе с таблицами расчёта норм: при смене хранимые нормы
+# пересчитываются
+TARGETS_VERSION = zlib.crc32(
+    repr(
+        (
+            KFA_FACTORS,
+            GOAL_TARGETS,
+            DEFAULT_GOAL,
+            (KCAL_PER_GRAM_PROTEIN, KCAL_PER_GRAM_FAT, KCAL_PER_GRAM_CARBS),
+            (MAX_AGE, MAX_WEIGHT, MAX_HEIGHT, MIN_KFA, MAX_KFA),
+        )
+    ).encode()
+)
+
+# Коды пола в пакетном расчёте
+GENDER_UNKNOWN, GENDER_FEMALE, GENDER_MALE = -1, 0, 1
+_GENDER_CODES = {"female": GENDER_FEMALE, "male": GENDER_MALE}
+# Номера целей в пакетном расчёте — строки GOAL_TARGETS по порядку
+_GOAL_CODES = {goal: i for i, goal in enumerate(GOAL_TARGETS)}
+_GOAL_TABLE = np.array(list(GOAL_TARGETS.values()))
+
+# (user_id, gender, age, weight, height, kfa, goal)
+ProfileRow = tuple[
+    int, str | None, int | None, float | None, float | None, str | None, str | None
+]
+
+
+class NutritionTargets(NamedTuple):
+    bmr: float
+    tdee: float
+    energy: float
+    proteins: float
+    fats: float
+    carbs: float
+
 
 def calculate_bmr(user: UserAccount) -> float:
     """
@@ -64,7 +128,9 @@ def calculate_tdee(user: UserAccount) -> float:
 
     The TDEE is the total number of calories the body needs daily to function. It
     is calculated by multiplying the Basal Metabolic Rate (BMR) by the user's
-    activity level factor (kfa).
+    activity level factor (kfa). The profile stores the activity level
+    ("1"-"5"), which is mapped to its factor with `KFA_FACTORS`; any other
+    value is taken as the factor itself.
 
     :param user: A UserAccount object with required fields (gender, age, weight, height, kfa).
     :return: The calculated TDEE as a float.
@@ -79,9 +145,9 @@ def calculate_tdee(user: UserAccount) -> float:
         raise ValueError("Activity factor (kfa) is required for TDEE calculation.")
 
     try:
-        kfa = float(
-            user.kfa
-        )  # Используем float вместо int для поддержки дробных значений
+        # Уровень активности переводится в коэффициент; иначе используем float
+        # вместо int для поддержки дробных значений
+        kfa = KFA_FACTORS.get(user.kfa) or float(user.kfa)
     except ValueError as e:
         log.error(
             "Ошибка значения kfa: %s",
@@ -103,3 +169,145 @@ def calculate_tdee(user: UserAccount) -> float:
     tdee = bmr * kfa
     log.debug(f"Calculated TDEE for user (bmr={bmr}, kfa={kfa}): {tdee}")
     return tdee
+
+
+def calculate_targets(user: UserAccount) -> NutritionTargets:
+    """
+    Calculates the daily energy and macronutrient targets of the given user.
+
+    The energy target is the TDEE adjusted for the user's goal (weight loss,
+    maintenance or gain; maintenance if the goal is not set), and it is split
+    between proteins, fats and carbohydrates in the proportions of the goal.
+
+    :param user: A UserAccount object with required fields (gender, age, weight, height, kfa).
+    :return: The BMR, the TDEE, the energy target in kcal and the protein, fat
+             and carbohydrate targets in grams.
+    :raises ValueError: If required fields are missing or invalid.
+    """
+    bmr = calculate_bmr(user)
+    tdee = calculate_tdee(user)
+    factor, proteins, fats, carbs = GOAL_TARGETS.get(
+        user.goal, GOAL_TARGETS[DEFAULT_GOAL]
+    )
+    energy = tdee * factor
+    return NutritionTargets(
+        bmr=bmr,
+        tdee=tdee,
+        energy=energy,
+        proteins=energy * proteins / KCAL_PER_GRAM_PROTEIN,
+        fats=energy * fats / KCAL_PER_GRAM_FAT,
+        carbs=energy * carbs / KCAL_PER_GRAM_CARBS,
+    )
+
+
+class ProfileArrays(NamedTuple):
+    """
+    Profile fields of many users as columns; missing numbers are NaN.
+
+    `gender` holds the `GENDER_*` codes, `kfa` the activity factor and
+    `goal` the row of the goal in `GOAL_TARGETS`.
+    """
+
+    user_ids: np.ndarray
+    gender: np.ndarray
+    age: np.ndarray
+    weight: np.ndarray
+    height: np.ndarray
+    kfa: np.ndarray
+    goal: np.ndarray
+
+
+class NutritionTargetsBatch(NamedTuple):
+    """
+    `NutritionTargets` of many users as columns.
+
+    `valid` marks the users whose profile passed validation; the targets of
+    the others are NaN.
+    """
+
+    user_ids: np.ndarray
+    valid: np.ndarray
+    bmr: np.ndarray
+    tdee: np.ndarray
+    energy: np.ndarray
+    proteins: np.ndarray
+    fats: np.ndarray
+    carbs: np.ndarray
+
+
+def profile_arrays(
+    rows: Iterable[ProfileRow],
+) -> ProfileArrays:
+    """
+    Converts profile rows to columns for `calculate_targets_batch`.
+
+    :param rows: `(user_id, gender, age, weight, height, kfa, goal)` tuples,
+                 as selected from the `users` table.
+    :return: The profile columns.
+    """
+    columns = list(zip(*rows))
+    user_ids, gender, age, weight, height, kfa, goal = columns or ((),) * 7
+    default_goal = _GOAL_CODES[DEFAULT_GOAL]
+    return ProfileArrays(
+        user_ids=np.array(user_ids, dtype=np.int64),
+        gender=np.array(
+            [_GENDER_CODES.get(g, GENDER_UNKNOWN) for g in gender], dtype=np.int8
+        ),
+        age=np.array(age, dtype=np.float64),
+        weight=np.array(weight, dtype=np.float64),
+        height=np.array(height, dtype=np.float64),
+        kfa=np.array([KFA_FACTORS.get(k, np.nan) for k in kfa], dtype=np.float64),
+        goal=np.array([_GOAL_CODES.get(g, default_goal) for g in goal], dtype=np.int8),
+    )
+
+
+def calculate_targets_batch(profiles: ProfileArrays) -> NutritionTargetsBatch:
+    """
+    Calculates `NutritionTargets` for many users at once.
+
+    The formulas and the limits are those of `calculate_bmr`,
+    `calculate_tdee` and `calculate_targets`, applied to whole columns:
+    validation is a boolean mask instead of an exception per user and the
+    gender term is selected with a mask, so the cost per user is a few array
+    operations without any Python-level work or logging.
+
+    :param profiles: The profile columns, see `profile_arrays`.
+    :return: The targets of every user; NaN where the profile is incomplete
+             or invalid.
+    """
+    age, weight, height, kfa = (
+        profiles.age,
+        profiles.weight,
+        profiles.height,
+        profiles.kfa,
+    )
+    # Сравнения с NaN ложны, поэтому незаполненные поля отсекаются теми же условиями
+    valid = (
+        (profiles.gender != GENDER_UNKNOWN)
+        & (age > 0)
+        & (age <= MAX_AGE)
+        & (weight > 0)
+        & (weight <= MAX_WEIGHT)
+        & (height > 0)
+        & (height <= MAX_HEIGHT)
+        & (kfa >= MIN_KFA)
+        & (kfa <= MAX_KFA)
+    )
+
+    bmr = 10 * weight + 6.25 * height - 5 * age
+    bmr += np.where(profiles.gender == GENDER_MALE, 5.0, -161.0)
+    bmr[~valid] = np.nan
+    tdee = bmr * kfa
+
+    factor, proteins, fats, carbs = _GOAL_TABLE[profiles.goal].T
+    energy = tdee * factor
+    return NutritionTargetsBatch(
+        user_ids=profiles.user_ids,
+        valid=valid,
+        bmr=bmr,
+        tdee=tdee,
+        energy=energy,
+        proteins=energy * proteins / KCAL_PER_GRAM_PROTEIN,
+        fats=energy * fats / KCAL_PER_GRAM_FAT,
+        carbs=energy * carbs / KCAL_PER_GRAM_CARBS,
+    )
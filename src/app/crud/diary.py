@@ -0,0 +1,287 @@
+import datetime as dt
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.app.core.logger import get_logger
+from src.app.core.services.nutrient import ensure_nutrient_dispatch
+from src.app.core.services.product import load_product_amounts
+from src.app.core.utils import map_nutrients_to_schema
+from src.app.core.utils.portion import BASE_GRAMS, add_amounts, scale_amounts
+from src.app.models import DiaryDay, DiaryEntry, Product, User, UserTarget
+from src.app.schemas.diary import (
+    DiaryDayResponse,
+    DiaryEntryCreate,
+    DiaryEntryResponse,
+    DiaryEntryUpdate,
+)
+from src.app.schemas.product import NutrientTotals
+
+log = get_logger("diary_crud")
+
+
+async def _apply_to_day(
+    session: AsyncSession,
+    user_id: int,
+    day: dt.date,
+    removed: dict[str, float] | None = None,
+    added: dict[str, float] | None = None,
+) -> None:
+    # Строка итогов создаётся первой записью дня и блокируется до конца
+    # транзакции, так что параллельные записи одного дня не теряют изменений
+    await session.execute(
+        insert(DiaryDay)
+        .values(user_id=user_id, day=day, entries=0, totals={})
+        .on_conflict_do_nothing(index_elements=["user_id", "day"])
+    )
+    rollup = await session.scalar(
+        select(DiaryDay)
+        .where(DiaryDay.user_id == user_id, DiaryDay.day == day)
+        .with_for_update()
+    )
+
+    totals = rollup.totals
+    if removed is not None:
+        rollup.entries -= 1
+        totals = add_amounts(totals, removed, -1.0)
+    if added is not None:
+        rollup.entries += 1
+        totals = add_amounts(totals, added)
+    rollup.totals = totals if rollup.entries else {}
+
+
+async def _get_entry(
+    session: AsyncSession,
+    user_id: int,
+    entry_id: int,
+) -> tuple[DiaryEntry, str | None]:
+    row = (
+        await session.execute(
+            select(DiaryEntry, Product.title)
+            .outerjoin(Product, Product.id == DiaryEntry.product_id)
+            .where(DiaryEntry.id == entry_id, DiaryEntry.user_id == user_id)
+            .with_for_update(of=DiaryEntry)
+        )
+    ).one_or_none()
+    if row is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={
+                "message": "Запись дневника не найдена",
+                "details": {"entry_id": entry_id},
+            },
+        )
+    return row.DiaryEntry, row.title
+
+
+def _entry_response(entry: DiaryEntry, title: str | None) -> DiaryEntryResponse:
+    return DiaryEntryResponse(
+        id=entry.id,
+        product_id=entry.product_id,
+        title=title,
+        grams=entry.grams,
+        eaten_at=entry.eaten_at,
+        day=entry.day,
+    )
+
+
+def _db_error(user_id: int, e: SQLAlchemyError) -> HTTPException:
+    log.error("Ошибка БД при изменении дневника пользователя %s: %s", user_id, e)
+    return HTTPException(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        detail={
+            "field": "Diary",
+            "message": "Внутренняя ошибка сервера",
+        },
+    )
+
+
+async def add_diary_entry(
+    session: AsyncSession,
+    user_id: int,
+    data: DiaryEntryCreate,
+) -> DiaryEntryResponse:
+    """
+    Logs an eaten product and adds it to the totals of its day.
+
+    The nutrient amounts of the portion are computed once and stored with the
+    entry, and the rollup row of the day is updated in the same transaction.
+
+    :param session: The current database session.
+    :param user_id: The ID of the user.
+    :param data: The product, the weight in grams and the time it was eaten.
+    :return: The created entry.
+    :raises HTTPException: If the product is not found or a database error
+                           occurs.
+    """
+    try:
+        title, per_100g = await load_product_amounts(session, data.product_id)
+        amounts = scale_amounts(per_100g, data.grams)
+        entry = DiaryEntry(
+            user_id=user_id,
+            product_id=data.product_id,
+            grams=data.grams,
+            eaten_at=data.eaten_at,
+            day=data.eaten_at.date(),
+            amounts=amounts,
+        )
+        session.add(entry)
+        await _apply_to_day(session, user_id, entry.day, added=amounts)
+        await session.commit()
+    except SQLAlchemyError as e:
+        await session.rollback()
+        raise _db_error(user_id, e)
+
+    return _entry_response(entry, title)
+
+
+async def update_diary_entry(
+    session: AsyncSession,
+    user_id: int,
+    entry_id: int,
+    data: DiaryEntryUpdate,
+) -> DiaryEntryResponse:
+    """
+    Changes the weight or the time of a diary entry and updates the totals.
+
+    The stored amounts of the entry are rescaled to the new weight, so the
+    totals stay consistent with what was added even if the product has changed
+    in the catalog since. An entry moved to another day is subtracted from the
+    old day and added to the new one.
+
+    :param session: The current database session.
+    :param user_id: The ID of the user.
+    :param entry_id: The ID of the entry.
+    :param data: The new weight and/or time.
+    :return: The updated entry.
+    :raises HTTPException: If the entry is not found or a database error
+                           occurs.
+    """
+    try:
+        entry, title = await _get_entry(session, user_id, entry_id)
+        old_day, old_amounts = entry.day, entry.amounts
+
+        if data.grams is not None and data.grams != entry.grams:
+            # Сохранённый вклад пересчитывается пропорционально весу, без
+            # обращения к каталогу
+            entry.amounts = scale_amounts(
+                old_amounts, data.grams / entry.grams * BASE_GRAMS
+            )
+            entry.grams = data.grams
+        if data.eaten_at is not None:
+            entry.eaten_at = data.eaten_at
+            entry.day = data.eaten_at.date()
+
+        if entry.day == old_day:
+            await _apply_to_day(session, user_id, old_day, old_amounts, entry.amounts)
+        else:
+            # Строки дней блокируются в одном порядке, чтобы не было взаимных
+            # блокировок между параллельными переносами
+            changes = sorted(
+                ((old_day, old_amounts, None), (entry.day, None, entry.amounts)),
+                key=lambda change: change[0],
+            )
+            for day, removed, added in changes:
+                await _apply_to_day(session, user_id, day, removed, added)
+        await session.commit()
+    except SQLAlchemyError as e:
+        await session.rollback()
+        raise _db_error(user_id, e)
+
+    return _entry_response(entry, title)
+
+
+async def delete_diary_entry(
+    session: AsyncSession,
+    user_id: int,
+    entry_id: int,
+) -> None:
+    """
+    Deletes a diary entry and subtracts it from the totals of its day.
+
+    :param session: The current database session.
+    :param user_id: The ID of the user.
+    :param entry_id: The ID of the entry.
+    :return: None
+    :raises HTTPException: If the entry is not found or a database error
+                           occurs.
+    """
+    try:
+        entry, _ = await _get_entry(session, user_id, entry_id)
+        await _apply_to_day(session, user_id, entry.day, removed=entry.amounts)
+        await session.delete(entry)
+        await session.commit()
+    except SQLAlchemyError as e:
+        await session.rollback()
+        raise _db_error(user_id, e)
+
+
+async def get_diary_entries(
+    session: AsyncSession,
+    user_id: int,
+    day: dt.date,
+) -> list[DiaryEntryResponse]:
+    """
+    Lists the entries of a diary day in the order they were eaten.
+
+    :param session: The current database session.
+    :param user_id: The ID of the user.
+    :param day: The diary day.
+    :return: The entries of the day.
+    """
+    result = await session.execute(
+        select(DiaryEntry, Product.title)
+        .outerjoin(Product, Product.id == DiaryEntry.product_id)
+        .where(DiaryEntry.user_id == user_id, DiaryEntry.day == day)
+        .order_by(DiaryEntry.eaten_at, DiaryEntry.id)
+    )
+    return [_entry_response(entry, title) for entry, title in result.tuples()]
+
+
+async def get_diary_day(
+    session: AsyncSession,
+    user_id: int,
+    day: dt.date,
+) -> DiaryDayResponse:
+    """
+    Returns the nutrient totals of a diary day against the user's target.
+
+    The totals are read from the rollup row of the day together with the
+    stored targets of the user in one query, whatever the number of entries;
+    the target is the TDEE of the profile.
+
+    :param session: The current database session.
+    :param user_id: The ID of the user.
+    :param day: The diary day.
+    :return: The totals of the day; empty if nothing was logged.
+    """
+    row = (
+        await session.execute(
+            select(UserTarget.tdee, DiaryDay.entries, DiaryDay.totals)
+            .select_from(User)
+            .outerjoin(UserTarget, UserTarget.user_id == User.id)
+            .outerjoin(
+                DiaryDay,
+                and_(DiaryDay.user_id == User.id, DiaryDay.day == day),
+            )
+            .where(User.id == user_id)
+        )
+    ).one()
+
+    target_energy = round(row.tdee, 1) if row.tdee is not None else None
+
+    totals = {
+        int(nutrient_id): amount for nutrient_id, amount in (row.totals or {}).items()
+    }
+    await ensure_nutrient_dispatch(session, None, totals)
+    detail = map_nutrients_to_schema(0, "", "", totals.items())
+
+    return DiaryDayResponse(
+        day=day,
+        entries=row.entries or 0,
+        target_energy=target_energy,
+        totals=NutrientTotals.model_validate(detail),
+    )
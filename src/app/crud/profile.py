@@ -4,8 +4,10 @@ from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.app.core.logger import get_logger
-from src.app.models import User
-from src.app.schemas.user import UserResponse, UserProfile, UserAccount
+from src.app.core.services.user_targets import save_user_targets
+from src.app.core.utils.user_profile import calculate_targets
+from src.app.models import User, UserTarget
+from src.app.schemas.user import UserResponse, UserProfile, UserAccount, UserTargets
 
 log = get_logger("profile_crud")
 
@@ -22,14 +24,19 @@ async def get_user_profile(
     :return: The user's profile information.
     :raises HTTPException: If the user is not found in the database.
     """
-    stmt = select(User).filter(
-        User.id == user_id,
-        User.is_active == True,
+    # Суточные нормы читаются тем же запросом, что и профиль
+    stmt = (
+        select(User, UserTarget)
+        .outerjoin(UserTarget, UserTarget.user_id == User.id)
+        .filter(
+            User.id == user_id,
+            User.is_active == True,
+        )
     )
     try:
         result = await session.execute(stmt)
-        user = result.scalar_one_or_none()
-        if user is None:
+        row = result.one_or_none()
+        if row is None:
             log.error(
                 "User not found in db for user_id: %s",
                 user_id,
@@ -41,7 +48,11 @@ async def get_user_profile(
                     "user_id": user_id,
                 },
             )
-        return UserAccount.model_construct(**user.__dict__)
+        user, targets = row
+        return UserAccount.model_construct(
+            **user.__dict__,
+            targets=UserTargets.model_validate(targets) if targets else None,
+        )
 
     except SQLAlchemyError as e:
         log.error("Ошибка БД при получении пользователя: %s", e)
@@ -63,6 +74,10 @@ async def update_user_profile(
     """
     Updates the current authenticated user's profile information in the database.
 
+    The nutrition targets (BMR, TDEE, energy and macronutrients by goal) are
+    recalculated from the updated profile and stored in the same transaction;
+    they are removed if the profile does not pass validation.
+
     :param data_in: The updated user profile information.
     :param current_user: The authenticated user whose profile is to be updated.
     :param session: The current database session.
@@ -94,10 +109,21 @@ async def update_user_profile(
                     "message": "При обновлении профиля произошла ошибка",
                 },
             )
+        try:
+            targets = calculate_targets(
+                UserAccount.model_construct(**updated_user.__dict__)
+            )
+        except ValueError as e:
+            log.warning("Суточные нормы не рассчитаны для %s: %s", current_user.id, e)
+            targets = None
+        await save_user_targets(session, current_user.id, targets)
         await session.commit()
         # log.info("User updated with name: %s", current_user.username)
 
-        return UserAccount.model_construct(**updated_user.__dict__)
+        return UserAccount.model_construct(
+            **updated_user.__dict__,
+            targets=UserTargets(**targets._asdict()) if targets else None,
+        )
 
     except SQLAlchemyError as e:
         log.error(
@@ -0,0 +1,407 @@
+from fastapi import HTTPException, status
+from sqlalchemy import delete, func, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.app.core.logger import get_logger
+from src.app.core.services.catalog import get_nutrient_version
+from src.app.core.services.nutrient import ensure_nutrient_dispatch
+from src.app.core.services.product import load_product_amounts
+from src.app.core.utils import map_nutrients_to_schema
+from src.app.core.utils.portion import BASE_GRAMS, add_amounts, scale_amounts
+from src.app.models import Product, ProductNutrient, Recipe, RecipeIngredient
+from src.app.schemas.recipe import (
+    MAX_RECIPE_INGREDIENTS,
+    RecipeCreate,
+    RecipeIngredientResponse,
+    RecipeResponse,
+    RecipeSummary,
+    RecipeUpdate,
+)
+
+log = get_logger("recipe_crud")
+
+# Название «группы» в нутриентах порции рецепта
+RECIPE_GROUP_NAME = "Рецепт"
+
+
+async def _recompute_totals(session: AsyncSession, recipe: Recipe) -> None:
+    # Полный пересчёт одной агрегацией по ингредиентам в базе
+    result = await session.execute(
+        select(
+            ProductNutrient.nutrient_id,
+            func.sum(ProductNutrient.amount * RecipeIngredient.grams / BASE_GRAMS),
+        )
+        .join(
+            RecipeIngredient,
+            RecipeIngredient.product_id == ProductNutrient.product_id,
+        )
+        .where(RecipeIngredient.recipe_id == recipe.id)
+        .group_by(ProductNutrient.nutrient_id)
+    )
+    recipe.totals = add_amounts(
+        {}, {str(nutrient_id): amount for nutrient_id, amount in result.tuples()}
+    )
+    recipe.total_grams = await session.scalar(
+        select(func.coalesce(func.sum(RecipeIngredient.grams), 0.0)).where(
+            RecipeIngredient.recipe_id == recipe.id
+        )
+    )
+    recipe.nutrient_version = get_nutrient_version()
+
+
+async def _get_recipe(
+    session: AsyncSession,
+    user_id: int,
+    recipe_id: int,
+    for_update: bool = False,
+) -> Recipe:
+    stmt = select(Recipe).where(Recipe.id == recipe_id, Recipe.user_id == user_id)
+    if for_update:
+        # Заблокированная строка перечитывается, даже если рецепт уже в сессии
+        stmt = stmt.with_for_update().execution_options(populate_existing=True)
+    recipe = await session.scalar(stmt)
+    if recipe is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={
+                "message": "Рецепт не найден",
+                "details": {"recipe_id": recipe_id},
+            },
+        )
+    return recipe
+
+
+async def _recipe_response(session: AsyncSession, recipe: Recipe) -> RecipeResponse:
+    result = await session.execute(
+        select(RecipeIngredient.product_id, Product.title, RecipeIngredient.grams)
+        .join(Product, Product.id == RecipeIngredient.product_id)
+        .where(RecipeIngredient.recipe_id == recipe.id)
+        .order_by(RecipeIngredient.id)
+    )
+    ingredients = [
+        RecipeIngredientResponse(product_id=product_id, title=title, grams=grams)
+        for product_id, title, grams in result.tuples()
+    ]
+
+    # Порция — доля `1 / servings` итогов: масштаб к BASE_GRAMS / servings граммам
+    per_serving = scale_amounts(recipe.totals, BASE_GRAMS / recipe.servings)
+    nutrients = {
+        int(nutrient_id): amount for nutrient_id, amount in per_serving.items()
+    }
+    await ensure_nutrient_dispatch(session, None, nutrients)
+
+    return RecipeResponse(
+        id=recipe.id,
+        title=recipe.title,
+        servings=recipe.servings,
+        total_grams=round(recipe.total_grams, 2),
+        serving_grams=round(recipe.total_grams / recipe.servings, 2),
+        ingredients=ingredients,
+        per_serving=map_nutrients_to_schema(
+            recipe.id, recipe.title, RECIPE_GROUP_NAME, nutrients.items()
+        ),
+    )
+
+
+async def _apply_ingredient_delta(
+    session: AsyncSession,
+    recipe: Recipe,
+    per_100g: dict[str, float],
+    delta: float,
+) -> None:
+    if recipe.nutrient_version != get_nutrient_version():
+        # Итоги посчитаны по другим нутриентам продуктов — дельта к ним неприменима
+        await session.flush()
+        await _recompute_totals(session, recipe)
+        return
+
+    recipe.totals = add_amounts(recipe.totals, scale_amounts(per_100g, delta))
+    recipe.total_grams = max(recipe.total_grams + delta, 0.0)
+
+
+def _db_error(user_id: int, e: SQLAlchemyError) -> HTTPException:
+    log.error("Ошибка БД при изменении рецепта пользователя %s: %s", user_id, e)
+    return HTTPException(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        detail={
+            "field": "Recipe",
+            "message": "Внутренняя ошибка сервера",
+        },
+    )
+
+
+async def create_recipe(
+    session: AsyncSession,
+    user_id: int,
+    data: RecipeCreate,
+) -> RecipeResponse:
+    """
+    Saves a recipe and computes its nutrient totals.
+
+    Ingredients repeating a product are merged.
+
+    :param session: The current database session.
+    :param user_id: The ID of the user.
+    :param data: The title, the number of servings and the ingredients.
+    :return: The created recipe.
+    :raises HTTPException: If a product is not found or a database error
+                           occurs.
+    """
+    grams: dict[int, float] = {}
+    for ingredient in data.ingredients:
+        grams[ingredient.product_id] = (
+            grams.get(ingredient.product_id, 0.0) + ingredient.grams
+        )
+
+    try:
+        found = await session.scalars(select(Product.id).where(Product.id.in_(grams)))
+        missing = set(grams) - set(found)
+        if missing:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail={
+                    "message": "Продукт не найден",
+                    "details": {"product_ids": sorted(missing)},
+                },
+            )
+
+        recipe = Recipe(
+            user_id=user_id,
+            title=data.title,
+            servings=data.servings,
+            totals={},
+            total_grams=0.0,
+        )
+        session.add(recipe)
+        await session.flush()
+        session.add_all(
+            RecipeIngredient(recipe_id=recipe.id, product_id=product_id, grams=weight)
+            for product_id, weight in grams.items()
+        )
+        await session.flush()
+        await _recompute_totals(session, recipe)
+        await session.commit()
+    except SQLAlchemyError as e:
+        await session.rollback()
+        raise _db_error(user_id, e)
+
+    return await _recipe_response(session, recipe)
+
+
+async def get_recipe(
+    session: AsyncSession,
+    user_id: int,
+    recipe_id: int,
+) -> RecipeResponse:
+    """
+    Returns a recipe with the nutrients of one serving.
+
+    The nutrients come from the totals stored on the recipe; they are
+    recomputed from the ingredients only if product nutrients have changed
+    (the nutrients version of the catalog) since they were computed.
+
+    :param session: The current database session.
+    :param user_id: The ID of the user.
+    :param recipe_id: The ID of the recipe.
+    :return: The recipe.
+    :raises HTTPException: If the recipe is not found.
+    """
+    recipe = await _get_recipe(session, user_id, recipe_id)
+    if recipe.nutrient_version != get_nutrient_version():
+        try:
+            recipe = await _get_recipe(session, user_id, recipe_id, for_update=True)
+            if recipe.nutrient_version != get_nutrient_version():
+                await _recompute_totals(session, recipe)
+            await session.commit()
+        except SQLAlchemyError as e:
+            await session.rollback()
+            raise _db_error(user_id, e)
+
+    return await _recipe_response(session, recipe)
+
+
+async def get_recipes(
+    session: AsyncSession,
+    user_id: int,
+) -> list[RecipeSummary]:
+    """
+    Lists the recipes of a user.
+
+    :param session: The current database session.
+    :param user_id: The ID of the user.
+    :return: The recipes, newest first.
+    """
+    result = await session.execute(
+        select(Recipe.id, Recipe.title, Recipe.servings)
+        .where(Recipe.user_id == user_id)
+        .order_by(Recipe.id.desc())
+    )
+    return [
+        RecipeSummary(id=recipe_id, title=title, servings=servings)
+        for recipe_id, title, servings in result.tuples()
+    ]
+
+
+async def update_recipe(
+    session: AsyncSession,
+    user_id: int,
+    recipe_id: int,
+    data: RecipeUpdate,
+) -> RecipeResponse:
+    """
+    Renames a recipe or changes its number of servings.
+
+    :param session: The current database session.
+    :param user_id: The ID of the user.
+    :param recipe_id: The ID of the recipe.
+    :param data: The new title and/or number of servings.
+    :return: The updated recipe.
+    :raises HTTPException: If the recipe is not found or a database error
+                           occurs.
+    """
+    try:
+        recipe = await _get_recipe(session, user_id, recipe_id, for_update=True)
+        if data.title is not None:
+            recipe.title = data.title
+        if data.servings is not None:
+            recipe.servings = data.servings
+        await session.commit()
+    except SQLAlchemyError as e:
+        await session.rollback()
+        raise _db_error(user_id, e)
+
+    return await get_recipe(session, user_id, recipe_id)
+
+
+async def delete_recipe(
+    session: AsyncSession,
+    user_id: int,
+    recipe_id: int,
+) -> None:
+    """
+    Deletes a recipe with its ingredients.
+
+    :param session: The current database session.
+    :param user_id: The ID of the user.
+    :param recipe_id: The ID of the recipe.
+    :return: None
+    :raises HTTPException: If the recipe is not found or a database error
+                           occurs.
+    """
+    try:
+        recipe = await _get_recipe(session, user_id, recipe_id, for_update=True)
+        await session.delete(recipe)
+        await session.commit()
+    except SQLAlchemyError as e:
+        await session.rollback()
+        raise _db_error(user_id, e)
+
+
+async def set_recipe_ingredient(
+    session: AsyncSession,
+    user_id: int,
+    recipe_id: int,
+    product_id: int,
+    grams: float,
+) -> RecipeResponse:
+    """
+    Adds an ingredient to a recipe or changes its weight.
+
+    Only the delta of the ingredient (its amounts per 100 g times the change
+    of weight) is applied to the stored totals. If the totals were computed
+    at another catalog version, they are recomputed instead.
+
+    :param session: The current database session.
+    :param user_id: The ID of the user.
+    :param recipe_id: The ID of the recipe.
+    :param product_id: The ID of the ingredient product.
+    :param grams: The new weight of the ingredient.
+    :return: The updated recipe.
+    :raises HTTPException: If the recipe or the product is not found, the
+                           recipe is full or a database error occurs.
+    """
+    try:
+        recipe = await _get_recipe(session, user_id, recipe_id, for_update=True)
+        _, per_100g = await load_product_amounts(session, product_id)
+        ingredient = await session.scalar(
+            select(RecipeIngredient).where(
+                RecipeIngredient.recipe_id == recipe_id,
+                RecipeIngredient.product_id == product_id,
+            )
+        )
+
+        if ingredient is None:
+            count = await session.scalar(
+                select(func.count())
+                .select_from(RecipeIngredient)
+                .where(RecipeIngredient.recipe_id == recipe_id)
+            )
+            if count >= MAX_RECIPE_INGREDIENTS:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail={
+                        "message": "Слишком много ингредиентов",
+                        "details": {"max_ingredients": MAX_RECIPE_INGREDIENTS},
+                    },
+                )
+            ingredient = RecipeIngredient(
+                recipe_id=recipe_id, product_id=product_id, grams=0.0
+            )
+            session.add(ingredient)
+
+        delta = grams - ingredient.grams
+        ingredient.grams = grams
+        await _apply_ingredient_delta(session, recipe, per_100g, delta)
+        await session.commit()
+    except SQLAlchemyError as e:
+        await session.rollback()
+        raise _db_error(user_id, e)
+
+    return await _recipe_response(session, recipe)
+
+
+async def remove_recipe_ingredient(
+    session: AsyncSession,
+    user_id: int,
+    recipe_id: int,
+    product_id: int,
+) -> RecipeResponse:
+    """
+    Removes an ingredient from a recipe, subtracting it from the totals.
+
+    :param session: The current database session.
+    :param user_id: The ID of the user.
+    :param recipe_id: The ID of the recipe.
+    :param product_id: The ID of the ingredient product.
+    :return: The updated recipe.
+    :raises HTTPException: If the recipe or the ingredient is not found or a
+                           database error occurs.
+    """
+    try:
+        recipe = await _get_recipe(session, user_id, recipe_id, for_update=True)
+        grams = await session.scalar(
+            delete(RecipeIngredient)
+            .where(
+                RecipeIngredient.recipe_id == recipe_id,
+                RecipeIngredient.product_id == product_id,
+            )
+            .returning(RecipeIngredient.grams)
+        )
+        if grams is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail={
+                    "message": "Ингредиент не найден",
+                    "details": {"recipe_id": recipe_id, "product_id": product_id},
+                },
+            )
+
+        _, per_100g = await load_product_amounts(session, product_id)
+        await _apply_ingredient_delta(session, recipe, per_100g, -grams)
+        await session.commit()
+    except SQLAlchemyError as e:
+        await session.rollback()
+        raise _db_error(user_id, e)
+
+    return await _recipe_response(session, recipe)
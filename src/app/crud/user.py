@@ -6,7 +6,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
 from src.app.core.logger import get_logger
-from src.app.models import User
+from src.app.models import User, UserTarget
 from src.app.schemas.user import UserCreate, UserResponse
 from src.app.core.utils.auth import get_password_hash
 
@@ -38,11 +38,20 @@ async def _get_user_by_filter(
     :raises HTTPException: If a database error or unexpected error occurs.
     """
     try:
-        stmt = select(User).filter(filter_condition, User.is_active == True)
+        # TDEE читается тем же запросом: по нему строится процент суточной
+        # нормы на страницах продуктов
+        stmt = (
+            select(User, UserTarget.tdee)
+            .outerjoin(UserTarget, UserTarget.user_id == User.id)
+            .filter(filter_condition, User.is_active == True)
+        )
         result = await session.execute(stmt)
-        user = result.scalar_one_or_none()
+        row = result.one_or_none()
+        if row is None:
+            return None
 
-        return UserResponse.model_validate(user) if user else None
+        user, tdee = row
+        return UserResponse.model_validate(user).model_copy(update={"tdee": tdee})
 
     except SQLAlchemyError as e:
         log.error(
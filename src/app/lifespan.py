@@ -1,4 +1,5 @@
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 
 from fastapi import FastAPI
 from tenacity import retry, stop_after_attempt, wait_fixed
@@ -7,6 +8,12 @@ from src.app.core import broker
 from src.app.core import db_helper
 from src.app.core.logger import get_logger
 from src.app.core.redis import init_redis, close_redis
+from src.app.core.services.catalog import listen_catalog_changes
+from src.app.core.services.diet_plan import (
+    shutdown_diet_plan_pool,
+    start_diet_plan_pool,
+)
+from src.app.tasks.user_targets import schedule_user_targets_refresh
 
 log = get_logger("lifespan")
 
@@ -23,11 +30,23 @@ async def check_rabbitmq():
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await init_redis()
+    catalog_listener = None
     if not broker.is_worker_process:
         await check_rabbitmq()
+        await schedule_user_targets_refresh()
+        # Слушатель подписывается на изменения каталога до построения индексов
+        catalog_ready = asyncio.Event()
+        catalog_listener = asyncio.create_task(listen_catalog_changes(catalog_ready))
+        await catalog_ready.wait()
+        await start_diet_plan_pool()
     try:
         yield
     finally:
+        if catalog_listener is not None:
+            catalog_listener.cancel()
+            with suppress(asyncio.CancelledError):
+                await catalog_listener
+        shutdown_diet_plan_pool()
         await close_redis()
         await db_helper.dispose()
         if not broker.is_worker_process:
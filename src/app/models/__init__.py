@@ -1,7 +1,15 @@
 from .base import Base
 from .user import User
+from .diary_day import DiaryDay
+from .diary_entry import DiaryEntry
+from .household_measure import HouseholdMeasure
 from .pending_product import PendingProduct
 from .product import Product
+from .product_alias import ProductAlias
 from .product_group import ProductGroup
 from .product_nutrient import ProductNutrient
+from .recipe import Recipe
+from .recipe_ingredient import RecipeIngredient
+from .search_query_stat import SearchQueryStat
+from .user_target import UserTarget
 from .nutrient import Nutrient, NutrientCategory
@@ -0,0 +1,21 @@
+import datetime as dt
+
+from sqlalchemy import ForeignKey, UniqueConstraint
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+from .mixins.int_id_pk import IntIdPkMixin
+
+
+class DiaryDay(IntIdPkMixin, Base):
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"),
+    )
+    day: Mapped[dt.date]
+
+    # Нарастающие итоги записей дня, обновляются вместе с каждой записью
+    entries: Mapped[int] = mapped_column(default=0)
+    totals: Mapped[dict[str, float]] = mapped_column(JSONB, default=dict)
+
+    __table_args__ = (UniqueConstraint("user_id", "day"),)
@@ -0,0 +1,29 @@
+import datetime as dt
+
+from sqlalchemy import DateTime, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+from .mixins.int_id_pk import IntIdPkMixin
+
+
+class DiaryEntry(IntIdPkMixin, Base):
+    __tablename__ = "diary_entries"
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"),
+    )
+    # Удаление продукта из каталога не трогает итоги: вклад записи сохранён в ней
+    product_id: Mapped[int | None] = mapped_column(
+        ForeignKey("products.id", ondelete="SET NULL"),
+    )
+    grams: Mapped[float]
+    eaten_at: Mapped[dt.datetime] = mapped_column(DateTime(timezone=True))
+    # День дневника — дата приёма пищи в часовом поясе пользователя
+    day: Mapped[dt.date]
+    # Вклад записи в итоги дня (id нутриента -> количество); он вычитается при
+    # изменении и удалении записи, даже если продукт в каталоге уже изменился
+    amounts: Mapped[dict[str, float]] = mapped_column(JSONB)
+
+    __table_args__ = (Index("idx_diary_entries_user_day", "user_id", "day"),)
@@ -0,0 +1,24 @@
+from sqlalchemy import ForeignKey, String, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+from .mixins.int_id_pk import IntIdPkMixin
+
+
+class HouseholdMeasure(IntIdPkMixin, Base):
+    # Общие меры (ложка, стакан) не привязаны к продукту; мера продукта,
+    # например «штука» яблока, переопределяет общую с тем же названием
+    product_id: Mapped[int | None] = mapped_column(
+        ForeignKey("products.id", ondelete="CASCADE"),
+        index=True,
+    )
+    name: Mapped[str] = mapped_column(String(30))
+    grams: Mapped[float]
+
+    __table_args__ = (
+        UniqueConstraint(
+            "product_id",
+            "name",
+            postgresql_nulls_not_distinct=True,
+        ),
+    )
@@ -1,14 +1,20 @@
 import datetime as dt
 
-from sqlalchemy import String
+from sqlalchemy import Computed, String
 from sqlalchemy.orm import Mapped, mapped_column
 
+from src.app.core.utils.text import normalize_title_sql
 from .base import Base
 from .mixins.int_id_pk import IntIdPkMixin
 
 
 class PendingProduct(Base, IntIdPkMixin):
     name: Mapped[str] = mapped_column(String(40), nullable=False)
+    # Дубликаты в очереди отсекаются уникальным индексом по этому полю
+    normalized_name: Mapped[str] = mapped_column(
+        Computed(normalize_title_sql("name"), persisted=True),
+        unique=True,
+    )
     created_at: Mapped[str] = mapped_column(
         default=dt.datetime.now(dt.UTC).strftime("%Y-%m-%d %H:%M:%S")
     )
@@ -1,7 +1,8 @@
-from sqlalchemy import ForeignKey, Index
+from sqlalchemy import Computed, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
+from src.app.core.utils.text import normalize_title_sql
 from .base import Base
 from .mixins.int_id_pk import IntIdPkMixin
 
@@ -9,8 +10,19 @@ from .mixins.int_id_pk import IntIdPkMixin
 class Product(IntIdPkMixin, Base):
     title: Mapped[str] = mapped_column(nullable=False)
     group_id: Mapped[int] = mapped_column(ForeignKey("product_groups.id"))
+    # Нормализованное название для точного поиска, вычисляется самой БД
+    normalized_title: Mapped[str] = mapped_column(
+        Computed(normalize_title_sql("title"), persisted=True),
+        index=True,
+    )
 
     search_vector: Mapped[TSVECTOR] = mapped_column(TSVECTOR())
+    # Затухающий счётчик просмотров, пересчитывается фоновой задачей
+    popularity: Mapped[float] = mapped_column(
+        default=0.0,
+        server_default="0",
+        index=True,
+    )
 
     product_groups: Mapped["ProductGroup"] = relationship(
         back_populates="products", lazy="joined"
@@ -28,9 +40,9 @@ class Product(IntIdPkMixin, Base):
             postgresql_using="gin",
         ),
         Index(
-            "idx_product_title_trgm",
-            title,
+            "idx_product_normalized_title_trgm",
+            normalized_title,
             postgresql_using="gin",
-            postgresql_ops={"title": "gin_trgm_ops"},
+            postgresql_ops={"normalized_title": "gin_trgm_ops"},
         ),
     )
@@ -0,0 +1,21 @@
+from sqlalchemy import Computed, ForeignKey, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.app.core.utils.text import normalize_title_sql
+from .base import Base
+from .mixins.int_id_pk import IntIdPkMixin
+
+
+class ProductAlias(IntIdPkMixin, Base):
+    __tablename__ = "product_aliases"
+
+    product_id: Mapped[int] = mapped_column(
+        ForeignKey("products.id", ondelete="CASCADE"),
+        index=True,
+    )
+    # Разговорное название или сокращение, например «гречка»
+    alias: Mapped[str] = mapped_column(String(100))
+    normalized_alias: Mapped[str] = mapped_column(
+        Computed(normalize_title_sql("alias"), persisted=True),
+        unique=True,
+    )
@@ -0,0 +1,22 @@
+from sqlalchemy import ForeignKey, String
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+from .mixins.int_id_pk import IntIdPkMixin
+
+
+class Recipe(IntIdPkMixin, Base):
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"),
+        index=True,
+    )
+    title: Mapped[str] = mapped_column(String(100))
+    servings: Mapped[int] = mapped_column(default=1)
+
+    # Сумма нутриентов всех ингредиентов (id нутриента -> количество) и версия
+    # нутриентов каталога, по которой она посчитана; при смене версии итоги
+    # пересчитываются
+    totals: Mapped[dict[str, float]] = mapped_column(JSONB, default=dict)
+    total_grams: Mapped[float] = mapped_column(default=0.0)
+    nutrient_version: Mapped[int] = mapped_column(default=0)
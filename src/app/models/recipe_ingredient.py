@@ -0,0 +1,17 @@
+from sqlalchemy import ForeignKey, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+from .mixins.int_id_pk import IntIdPkMixin
+
+
+class RecipeIngredient(IntIdPkMixin, Base):
+    recipe_id: Mapped[int] = mapped_column(
+        ForeignKey("recipes.id", ondelete="CASCADE"),
+    )
+    product_id: Mapped[int] = mapped_column(
+        ForeignKey("products.id", ondelete="CASCADE"),
+    )
+    grams: Mapped[float]
+
+    __table_args__ = (UniqueConstraint("recipe_id", "product_id"),)
@@ -0,0 +1,22 @@
+import datetime as dt
+
+from sqlalchemy import Integer, String, UniqueConstraint
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+from .mixins.int_id_pk import IntIdPkMixin
+
+
+class SearchQueryStat(IntIdPkMixin, Base):
+    day: Mapped[dt.date]
+    query: Mapped[str] = mapped_column(String(100))
+
+    # Счётчики по сэмплированным событиям поиска
+    frequency: Mapped[int] = mapped_column(default=0)
+    zero_results: Mapped[int] = mapped_column(default=0)
+    cache_hits: Mapped[int] = mapped_column(default=0)
+    latency_buckets: Mapped[list[int]] = mapped_column(ARRAY(Integer))
+    p95_latency_ms: Mapped[float] = mapped_column(default=0.0)
+
+    __table_args__ = (UniqueConstraint("day", "query"),)
@@ -0,0 +1,26 @@
+import datetime as dt
+
+from sqlalchemy import DateTime, ForeignKey, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class UserTarget(Base):
+    # Суточные нормы, рассчитанные по профилю; пересчитываются при его изменении
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    bmr: Mapped[float]
+    tdee: Mapped[float]
+    energy: Mapped[float]
+    proteins: Mapped[float]
+    fats: Mapped[float]
+    carbs: Mapped[float]
+    # Время чтения профиля, по которому рассчитаны нормы: более старый расчёт
+    # не перезаписывает более новый
+    updated_at: Mapped[dt.datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+    )
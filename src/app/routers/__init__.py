@@ -2,8 +2,10 @@ from fastapi import APIRouter
 
 from src.app.core.config import settings
 from src.app.routers.auth import router as auth_router
+from src.app.routers.diary import router as diary_router
 from src.app.routers.info import router as info_router
 from src.app.routers.product import router as product_router
+from src.app.routers.recipe import router as recipe_router
 from src.app.routers.security import router as security_router
 from src.app.routers.user import router as users_router
 
@@ -27,6 +29,14 @@ routers.include_router(
     users_router,
     prefix=settings.router.user,
 )
+routers.include_router(
+    diary_router,
+    prefix=settings.router.diary,
+)
+routers.include_router(
+    recipe_router,
+    prefix=settings.router.recipe,
+)
 routers.include_router(
     info_router,
 )
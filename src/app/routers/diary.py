@@ -0,0 +1,149 @@
+import datetime as dt
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, status
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.app.core import db_helper
+from src.app.core.exceptions import ExpiredTokenException
+from src.app.core.logger import get_logger
+from src.app.core.services.auth import get_current_auth_user
+from src.app.crud.diary import (
+    add_diary_entry,
+    delete_diary_entry,
+    get_diary_day,
+    get_diary_entries,
+    update_diary_entry,
+)
+from src.app.schemas.diary import (
+    DiaryDayResponse,
+    DiaryEntryCreate,
+    DiaryEntryResponse,
+    DiaryEntryUpdate,
+)
+from src.app.schemas.user import UserResponse
+
+router = APIRouter(
+    tags=["Diary"],
+    default_response_class=ORJSONResponse,
+)
+
+log = get_logger("diary_router")
+
+
+@router.post(
+    "/entries",
+    response_model=DiaryEntryResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_diary_entry(
+    data: DiaryEntryCreate,
+    user: Annotated[UserResponse, Depends(get_current_auth_user)],
+    db_session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
+):
+    """
+    Logs an eaten product in the current user's food diary.
+
+    The entry belongs to the day of `eaten_at` in its own time zone offset.
+
+    :param data: The product, the weight in grams and the time it was eaten.
+    :param user: The authenticated user object obtained from the dependency.
+    :param db_session: The current database db_session.
+    :return: The created `DiaryEntryResponse`.
+    :raises HTTPException: If the user is not authenticated or the product is
+                           not found.
+    """
+    if user is None:
+        raise ExpiredTokenException()
+
+    return await add_diary_entry(db_session, user.id, data)
+
+
+@router.patch("/entries/{entry_id}", response_model=DiaryEntryResponse)
+async def change_diary_entry(
+    entry_id: int,
+    data: DiaryEntryUpdate,
+    user: Annotated[UserResponse, Depends(get_current_auth_user)],
+    db_session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
+):
+    """
+    Changes the weight or the time of a diary entry.
+
+    :param entry_id: The ID of the entry.
+    :param data: The new weight and/or time.
+    :param user: The authenticated user object obtained from the dependency.
+    :param db_session: The current database db_session.
+    :return: The updated `DiaryEntryResponse`.
+    :raises HTTPException: If the user is not authenticated or the entry is
+                           not found.
+    """
+    if user is None:
+        raise ExpiredTokenException()
+
+    return await update_diary_entry(db_session, user.id, entry_id, data)
+
+
+@router.delete("/entries/{entry_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def remove_diary_entry(
+    entry_id: int,
+    user: Annotated[UserResponse, Depends(get_current_auth_user)],
+    db_session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
+):
+    """
+    Deletes a diary entry.
+
+    :param entry_id: The ID of the entry.
+    :param user: The authenticated user object obtained from the dependency.
+    :param db_session: The current database db_session.
+    :return: None
+    :raises HTTPException: If the user is not authenticated or the entry is
+                           not found.
+    """
+    if user is None:
+        raise ExpiredTokenException()
+
+    await delete_diary_entry(db_session, user.id, entry_id)
+
+
+@router.get("/{day}", response_model=DiaryDayResponse)
+async def read_diary_day(
+    day: dt.date,
+    user: Annotated[UserResponse, Depends(get_current_auth_user)],
+    db_session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
+):
+    """
+    Retrieves the nutrient totals of a diary day and the daily energy target.
+
+    :param day: The diary day (YYYY-MM-DD).
+    :param user: The authenticated user object obtained from the dependency.
+    :param db_session: The current database db_session.
+    :return: A `DiaryDayResponse` object.
+    :raises HTTPException: If the user is not authenticated.
+    """
+    if user is None:
+        raise ExpiredTokenException()
+
+    return await get_diary_day(db_session, user.id, day)
+
+
+@router.get("/{day}/entries", response_model=list[DiaryEntryResponse])
+async def read_diary_entries(
+    day: dt.date,
+    user: Annotated[UserResponse, Depends(get_current_auth_user)],
+    db_session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
+):
+    """
+    Lists the entries of a diary day.
+
+    :param day: The diary day (YYYY-MM-DD).
+    :param user: The authenticated user object obtained from the dependency.
+    :param db_session: The current database db_session.
+    :return: A list of `DiaryEntryResponse` objects in the order they were
+             eaten.
+    :raises HTTPException: If the user is not authenticated.
+    """
+    if user is None:
+        raise ExpiredTokenException()
+
+    return await get_diary_entries(db_session, user.id, day)
@@ -1,8 +1,16 @@
 from datetime import datetime
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, Request, Query, HTTPException, status
-from fastapi.responses import ORJSONResponse, HTMLResponse
+from fastapi import (
+    APIRouter,
+    Depends,
+    Request,
+    Query,
+    HTTPException,
+    WebSocket,
+    status,
+)
+from fastapi.responses import ORJSONResponse, HTMLResponse, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.app.core import db_helper
@@ -12,9 +20,44 @@ from src.app.core.utils.pending_product import (
     check_pending_exists,
     create_pending_product,
 )
-from src.app.core.services.product import handle_product_search, handle_product_details
+from src.app.core.services.popularity import record_product_view
+from src.app.core.services.daily_value import product_daily_values
+from src.app.core.services.product_details import get_product_details_meta
+from src.app.core.services.product import (
+    get_product_details_batch_payload,
+    get_product_page_fragment,
+    handle_batch_product_search,
+    handle_nutrient_filter,
+    handle_paginated_product_search,
+    handle_product_portions,
+    handle_product_portions_batch,
+    handle_similar_products,
+    product_page_headers,
+)
+from src.app.core.services.search_cache import cached_product_search
+from src.app.core.services.search_stream import serve_search_stream
 from src.app.core.utils import templates
-from src.app.schemas.product import UnifiedProductResponse, PendingProductCreate
+from src.app.core.utils.http_cache import etag_matches, not_modified
+from src.app.schemas.product import (
+    DEFAULT_SEARCH_PAGE_SIZE,
+    DEFAULT_SIMILAR_PRODUCTS,
+    MAX_MEASURE_NAME_LENGTH,
+    MAX_PORTION_COUNT,
+    MAX_PORTION_GRAMS,
+    MAX_SEARCH_PAGE_SIZE,
+    MAX_SIMILAR_PRODUCTS,
+    NutrientFilterResponse,
+    PendingProductCreate,
+    PortionDetailResponse,
+    PortionSpec,
+    ProductDetailResponse,
+    ProductDetailsBatch,
+    ProductNutrientFilter,
+    ProductSearchBatch,
+    ProductSearchPage,
+    SimilarProductItem,
+    UnifiedProductResponse,
+)
 from src.app.schemas.user import UserResponse
 
 log = get_logger("product_router")
@@ -43,8 +86,196 @@ async def search_products(
     :param confirmed: A boolean flag indicating whether to skip suggestions.
     :return: A `UnifiedProductResponse` object with the search results.
     """
+    payload = await cached_product_search(session, query, confirmed)
+
+    return Response(content=payload, media_type="application/json")
+
+
+@router.post("/search/batch", response_model=list[UnifiedProductResponse])
+async def search_products_batch(
+    data: ProductSearchBatch,
+    session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
+):
+    """
+    Searches for products for several queries at once.
+
+    This endpoint resolves every query of the batch with the same matching
+    rules as `/search` (without adding pending products), using one database
+    round trip for all of them.
+
+    :param data: The batch of search queries.
+    :param session: The current database session.
+    :return: A list of `UnifiedProductResponse` objects, one per query.
+    """
+
+    return await handle_batch_product_search(session, data.queries)
+
+
+@router.post(
+    "/details/batch",
+    response_model=dict[int, PortionDetailResponse | ProductDetailResponse],
+)
+async def get_product_details_batch(
+    data: ProductDetailsBatch,
+    session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
+):
+    """
+    Retrieves the details of several products at once.
+
+    Meal and recipe screens need the nutrients of many products; this endpoint
+    returns all of them in one JSON response instead of one detail page per
+    product, loading the products without a precomputed snapshot with a
+    single database query.
+
+    With `portion` (applied to every product) or `portions` (by product id)
+    the details are scaled to the portions, as in `/{product_id}/portion`.
+
+    :param data: The ids of the products (up to 50) and their portions.
+    :param session: The current database session.
+    :return: A JSON object mapping product ids to `ProductDetailResponse`
+             objects, or to `PortionDetailResponse` objects if portions are
+             given; unknown ids are left out.
+    """
+    if data.portion is not None or data.portions:
+        details = await handle_product_portions_batch(
+            session, data.ids, data.portion, data.portions
+        )
+        return ORJSONResponse(
+            {
+                str(product_id): detail.model_dump()
+                for product_id, detail in details.items()
+            }
+        )
+
+    payload = await get_product_details_batch_payload(session, data.ids)
+
+    return Response(content=payload, media_type="application/json")
+
+
+@router.get("/search/page", response_model=ProductSearchPage)
+async def search_products_page(
+    session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
+    query: str = Query(..., min_length=2, max_length=100),
+    cursor: str | None = Query(None, max_length=512),
+    limit: int = Query(DEFAULT_SEARCH_PAGE_SIZE, ge=1, le=MAX_SEARCH_PAGE_SIZE),
+):
+    """
+    Pages through all products matching a query.
+
+    Unlike `/search`, which returns the top five suggestions, this endpoint
+    returns the ranked results page by page. Pass `next_cursor` of a page as
+    `cursor` to get the next one; it is null on the last page.
+
+    :param session: The current database session.
+    :param query: The search query string. It must be at least 2 characters long.
+    :param cursor: The opaque cursor of the previous page.
+    :param limit: The page size.
+    :return: A `ProductSearchPage` object with the products and the next cursor.
+    """
+
+    return await handle_paginated_product_search(session, query, limit, cursor)
+
+
+@router.websocket("/search/ws")
+async def search_products_stream(websocket: WebSocket):
+    """
+    Streams search-as-you-type results over a WebSocket.
+
+    The client sends every typed query over the same connection instead of one
+    HTTP request per keystroke; a query superseded by a newer one is cancelled
+    on the server and gets no reply.
+
+    :param websocket: The WebSocket connection.
+    :return: None
+    """
+
+    await serve_search_stream(websocket)
+
+
+@router.post("/filter", response_model=NutrientFilterResponse)
+async def filter_products_by_nutrients(
+    data: ProductNutrientFilter,
+    session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
+):
+    """
+    Finds products by nutrient amounts.
+
+    Every range limits the amount of a nutrient per 100 g (both bounds are
+    inclusive and optional); the matches are sorted by the amount of the
+    `sort_by` nutrient, or by its amount per 100 kcal with `per_energy`,
+    and the top `limit` of them is returned along with their number.
+
+    :param data: The nutrient ranges, the sort key and the number of products.
+    :param session: The current database session.
+    :return: A `NutrientFilterResponse` object with the matching products.
+    """
+
+    return await handle_nutrient_filter(session, data)
+
+
+@router.get("/{product_id}/similar", response_model=list[SimilarProductItem])
+async def get_similar_products(
+    product_id: int,
+    session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
+    limit: int = Query(DEFAULT_SIMILAR_PRODUCTS, ge=1, le=MAX_SIMILAR_PRODUCTS),
+    same_group: bool = Query(False),
+):
+    """
+    Finds the products closest in nutrient profile to a product.
+
+    :param product_id: The ID of the product.
+    :param session: The current database session.
+    :param limit: The maximum number of returned products.
+    :param same_group: Whether to return only products of the same group.
+    :return: A list of `SimilarProductItem` objects, most similar first.
+    """
+
+    return await handle_similar_products(session, product_id, limit, same_group)
+
+
+@router.get("/{product_id}/portion", response_model=PortionDetailResponse)
+async def get_product_portion(
+    product_id: int,
+    session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
+    grams: float | None = Query(None, gt=0, le=MAX_PORTION_GRAMS),
+    measure: str | None = Query(None, min_length=1, max_length=MAX_MEASURE_NAME_LENGTH),
+    per_energy: bool = Query(False),
+    count: float = Query(1.0, gt=0, le=MAX_PORTION_COUNT),
+):
+    """
+    Retrieves the details of a product scaled to a portion.
+
+    The portion is given by at most one of `grams`, a household `measure`
+    (e.g. "стакан") or `per_energy` (100 kcal), multiplied by `count`;
+    without any of them it is 100 g, the basis of the catalog amounts.
+
+    :param product_id: The ID of the product.
+    :param session: The current database session.
+    :param grams: The portion weight in grams.
+    :param measure: The name of the household measure.
+    :param per_energy: Whether the portion is 100 kcal.
+    :param count: The number of grams, measures or 100 kcal portions.
+    :raises HTTPException: If the product is not found.
+    :return: A `PortionDetailResponse` object with the scaled details.
+    """
+    details = await handle_product_portions(
+        session,
+        {
+            product_id: PortionSpec(
+                grams=grams, measure=measure, per_energy=per_energy, count=count
+            )
+        },
+    )
+    if product_id not in details:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={
+                "message": "Продукт не найден",
+                "details": {"product_id": product_id},
+            },
+        )
 
-    return await handle_product_search(session, query, confirmed)
+    return details[product_id]
 
 
 @router.get("/{product_id}", response_class=HTMLResponse)
@@ -59,7 +290,14 @@ async def get_product_details(
     Retrieves the details of a product.
 
     This endpoint retrieves the details of a product and renders its information
-    using an HTML template.
+    using an HTML template. The page is revalidated by ETag: while the detail
+    snapshot is up to date, a matching `If-None-Match` gets a 304 and a HEAD
+    request gets the headers, both without loading the product or rendering
+    the template. Otherwise the cached product body is placed into the page
+    layout, so only the per-request parts are rendered. For a logged-in user
+    with gender and age in the profile, the page also carries the nutrients
+    as percentages of the user's daily needs, computed in memory and placed
+    into the cached body on the client.
 
     :param request: The incoming request object.
     :param product_id: The ID of the product to retrieve.
@@ -67,8 +305,21 @@ async def get_product_details(
     :param current_user: The authenticated user object obtained from the dependency.
     :return: A rendered HTML template with the product details.
     """
+    meta = await get_product_details_meta(product_id)
+    if meta is not None:
+        headers = product_page_headers(meta, current_user)
+        if request.method == "HEAD":
+            response = Response(headers=headers, media_type="text/html")
+            # Длина страницы неизвестна без рендеринга
+            del response.headers["content-length"]
+            return response
+        if etag_matches(request, headers["ETag"]):
+            await record_product_view(product_id)
+            return not_modified(headers)
 
-    product_data = await handle_product_details(session, product_id)
+    fragment, meta = await get_product_page_fragment(session, product_id, meta)
+    if request.method == "GET":
+        await record_product_view(product_id)
     # log.info("Rendering template")
     redis_session = request.scope.get("redis_session", {})
 
@@ -77,11 +328,14 @@ async def get_product_details(
         name="product_detail.html",
         context={
             "current_year": datetime.now().year,
-            "product": product_data,
+            "product_title": fragment.title,
+            "product_body": fragment.body,
+            "daily_values": product_daily_values(product_id, current_user),
             "user": current_user,
             "csrf_token": redis_session.get("csrf_token"),
             "csp_nonce": request.state.csp_nonce,
         },
+        headers=product_page_headers(meta, current_user),
     )
 
 
@@ -0,0 +1,198 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, status
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.app.core import db_helper
+from src.app.core.exceptions import ExpiredTokenException
+from src.app.core.logger import get_logger
+from src.app.core.services.auth import get_current_auth_user
+from src.app.crud.recipe import (
+    create_recipe,
+    delete_recipe,
+    get_recipe,
+    get_recipes,
+    remove_recipe_ingredient,
+    set_recipe_ingredient,
+    update_recipe,
+)
+from src.app.schemas.recipe import (
+    RecipeCreate,
+    RecipeIngredientGrams,
+    RecipeResponse,
+    RecipeSummary,
+    RecipeUpdate,
+)
+from src.app.schemas.user import UserResponse
+
+router = APIRouter(
+    tags=["Recipe"],
+    default_response_class=ORJSONResponse,
+)
+
+log = get_logger("recipe_router")
+
+
+@router.post("", response_model=RecipeResponse, status_code=status.HTTP_201_CREATED)
+async def create_user_recipe(
+    data: RecipeCreate,
+    user: Annotated[UserResponse, Depends(get_current_auth_user)],
+    db_session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
+):
+    """
+    Saves a recipe of the current user.
+
+    :param data: The title, the number of servings and the ingredients.
+    :param user: The authenticated user object obtained from the dependency.
+    :param db_session: The current database db_session.
+    :return: The created `RecipeResponse`.
+    :raises HTTPException: If the user is not authenticated or a product is
+                           not found.
+    """
+    if user is None:
+        raise ExpiredTokenException()
+
+    return await create_recipe(db_session, user.id, data)
+
+
+@router.get("", response_model=list[RecipeSummary])
+async def read_user_recipes(
+    user: Annotated[UserResponse, Depends(get_current_auth_user)],
+    db_session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
+):
+    """
+    Lists the recipes of the current user.
+
+    :param user: The authenticated user object obtained from the dependency.
+    :param db_session: The current database db_session.
+    :return: A list of `RecipeSummary` objects, newest first.
+    :raises HTTPException: If the user is not authenticated.
+    """
+    if user is None:
+        raise ExpiredTokenException()
+
+    return await get_recipes(db_session, user.id)
+
+
+@router.get("/{recipe_id}", response_model=RecipeResponse)
+async def read_user_recipe(
+    recipe_id: int,
+    user: Annotated[UserResponse, Depends(get_current_auth_user)],
+    db_session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
+):
+    """
+    Retrieves a recipe with its ingredients and the nutrients of one serving.
+
+    :param recipe_id: The ID of the recipe.
+    :param user: The authenticated user object obtained from the dependency.
+    :param db_session: The current database db_session.
+    :return: A `RecipeResponse` object.
+    :raises HTTPException: If the user is not authenticated or the recipe is
+                           not found.
+    """
+    if user is None:
+        raise ExpiredTokenException()
+
+    return await get_recipe(db_session, user.id, recipe_id)
+
+
+@router.patch("/{recipe_id}", response_model=RecipeResponse)
+async def change_user_recipe(
+    recipe_id: int,
+    data: RecipeUpdate,
+    user: Annotated[UserResponse, Depends(get_current_auth_user)],
+    db_session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
+):
+    """
+    Renames a recipe or changes its number of servings.
+
+    :param recipe_id: The ID of the recipe.
+    :param data: The new title and/or number of servings.
+    :param user: The authenticated user object obtained from the dependency.
+    :param db_session: The current database db_session.
+    :return: The updated `RecipeResponse`.
+    :raises HTTPException: If the user is not authenticated or the recipe is
+                           not found.
+    """
+    if user is None:
+        raise ExpiredTokenException()
+
+    return await update_recipe(db_session, user.id, recipe_id, data)
+
+
+@router.delete("/{recipe_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def remove_user_recipe(
+    recipe_id: int,
+    user: Annotated[UserResponse, Depends(get_current_auth_user)],
+    db_session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
+):
+    """
+    Deletes a recipe.
+
+    :param recipe_id: The ID of the recipe.
+    :param user: The authenticated user object obtained from the dependency.
+    :param db_session: The current database db_session.
+    :return: None
+    :raises HTTPException: If the user is not authenticated or the recipe is
+                           not found.
+    """
+    if user is None:
+        raise ExpiredTokenException()
+
+    await delete_recipe(db_session, user.id, recipe_id)
+
+
+@router.put("/{recipe_id}/ingredients/{product_id}", response_model=RecipeResponse)
+async def put_recipe_ingredient(
+    recipe_id: int,
+    product_id: int,
+    data: RecipeIngredientGrams,
+    user: Annotated[UserResponse, Depends(get_current_auth_user)],
+    db_session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
+):
+    """
+    Adds a product to a recipe or changes its weight.
+
+    :param recipe_id: The ID of the recipe.
+    :param product_id: The ID of the ingredient product.
+    :param data: The weight of the ingredient in grams.
+    :param user: The authenticated user object obtained from the dependency.
+    :param db_session: The current database db_session.
+    :return: The updated `RecipeResponse`.
+    :raises HTTPException: If the user is not authenticated, or the recipe or
+                           the product is not found.
+    """
+    if user is None:
+        raise ExpiredTokenException()
+
+    return await set_recipe_ingredient(
+        db_session, user.id, recipe_id, product_id, data.grams
+    )
+
+
+@router.delete(
+    "/{recipe_id}/ingredients/{product_id}",
+    response_model=RecipeResponse,
+)
+async def delete_recipe_ingredient(
+    recipe_id: int,
+    product_id: int,
+    user: Annotated[UserResponse, Depends(get_current_auth_user)],
+    db_session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
+):
+    """
+    Removes a product from a recipe.
+
+    :param recipe_id: The ID of the recipe.
+    :param product_id: The ID of the ingredient product.
+    :param user: The authenticated user object obtained from the dependency.
+    :param db_session: The current database db_session.
+    :return: The updated `RecipeResponse`.
+    :raises HTTPException: If the user is not authenticated, or the recipe or
+                           the ingredient is not found.
+    """
+    if user is None:
+        raise ExpiredTokenException()
+
+    return await remove_recipe_ingredient(db_session, user.id, recipe_id, product_id)
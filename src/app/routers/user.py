@@ -15,9 +15,11 @@ from src.app.core import db_helper
 from src.app.core.exceptions import ExpiredTokenException
 from src.app.core.logger import get_logger
 from src.app.core.services.auth import get_current_auth_user
+from src.app.core.services.diet_plan import handle_diet_plan
 from src.app.core.utils import templates
 from src.app.crud.profile import update_user_profile, get_user_profile
 from src.app.crud.user import choose_subscribe_status
+from src.app.schemas.diet_plan import DietPlanRequest, DietPlanResponse
 from src.app.schemas.user import UserProfile, UserResponse
 
 router = APIRouter(
@@ -126,6 +128,33 @@ async def update_profile(
     return {"message": "Profile updated successfully"}
 
 
+@router.post("/diet-plan", response_model=DietPlanResponse)
+async def get_diet_plan(
+    data_in: DietPlanRequest,
+    user: Annotated[UserResponse, Depends(get_current_auth_user)],
+    db_session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
+):
+    """
+    Builds a day's plan of products and weights for the user's targets.
+
+    The energy and macronutrient targets follow from the profile (BMR, activity
+    level and goal); the plan can be limited to or exclude given products and
+    product groups. The search has a fixed time budget and returns the best
+    plan found; `within_targets` tells whether it hits every target.
+
+    :param data_in: The number of products, the filters and the limits.
+    :param user: The authenticated user object obtained from the dependency.
+    :param db_session: The current database db_session.
+    :return: A `DietPlanResponse` with the plan and its totals.
+    :raises HTTPException: If the user is not authenticated, the profile is
+                           incomplete or no plan can be built.
+    """
+    if user is None:
+        raise ExpiredTokenException()
+
+    return await handle_diet_plan(db_session, user.id, data_in)
+
+
 @router.post("/unsubscribe")
 async def unsubscribe_email_notification(
     user: Annotated[UserResponse, Depends(get_current_auth_user)],
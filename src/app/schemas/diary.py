@@ -0,0 +1,36 @@
+import datetime as dt
+from typing import Annotated
+
+from annotated_types import Ge, Gt, Le
+from pydantic import AwareDatetime
+
+from .base import BaseSchema
+from .product import MAX_PORTION_GRAMS, NutrientTotals
+
+
+class DiaryEntryCreate(BaseSchema):
+    product_id: Annotated[int, Ge(1)]
+    grams: Annotated[float, Gt(0), Le(MAX_PORTION_GRAMS)]
+    # Смещение часового пояса обязательно: по нему определяется день дневника
+    eaten_at: AwareDatetime
+
+
+class DiaryEntryUpdate(BaseSchema):
+    grams: Annotated[float, Gt(0), Le(MAX_PORTION_GRAMS)] | None = None
+    eaten_at: AwareDatetime | None = None
+
+
+class DiaryEntryResponse(BaseSchema):
+    id: int
+    product_id: int | None
+    title: str | None = None
+    grams: float
+    eaten_at: dt.datetime
+    day: dt.date
+
+
+class DiaryDayResponse(BaseSchema):
+    day: dt.date
+    entries: int = 0
+    target_energy: float | None = None  # TDEE, если профиль заполнен
+    totals: NutrientTotals = NutrientTotals()
@@ -0,0 +1,43 @@
+from typing import Annotated
+
+from annotated_types import Ge, Gt, Le, MaxLen
+
+from .base import BaseSchema
+from .product import MAX_PORTION_GRAMS, ProductSuggestion
+
+MAX_PLAN_PRODUCTS = 10
+MAX_PLAN_FILTER_IDS = 200
+
+
+class DietPlanRequest(BaseSchema):
+    products: Annotated[int, Ge(2), Le(MAX_PLAN_PRODUCTS)] = 6
+    # Только эти продукты (пустой список — весь каталог) и исключения из них
+    include_products: Annotated[list[int], MaxLen(MAX_PLAN_FILTER_IDS)] = []
+    exclude_products: Annotated[list[int], MaxLen(MAX_PLAN_FILTER_IDS)] = []
+    include_groups: Annotated[list[int], MaxLen(MAX_PLAN_FILTER_IDS)] = []
+    exclude_groups: Annotated[list[int], MaxLen(MAX_PLAN_FILTER_IDS)] = []
+    max_per_group: Annotated[int, Ge(1), Le(MAX_PLAN_PRODUCTS)] = 2
+    max_grams: Annotated[float, Gt(0), Le(MAX_PORTION_GRAMS)] = 400.0
+
+
+class MacroTargets(BaseSchema):
+    energy: float
+    proteins: float
+    fats: float
+    carbs: float
+
+
+class DietPlanItem(ProductSuggestion):
+    grams: float
+    energy: float
+    proteins: float
+    fats: float
+    carbs: float
+
+
+class DietPlanResponse(BaseSchema):
+    target: MacroTargets
+    totals: MacroTargets
+    # Все значения в пределах допуска: калорийность ±5 %, БЖУ ±10 %
+    within_targets: bool
+    items: list[DietPlanItem]
@@ -1,5 +1,22 @@
+from typing import Annotated
+
+from annotated_types import Ge, Gt, Le, MaxLen, MinLen
+
 from .base import BaseSchema
 
+MAX_BATCH_SEARCH_QUERIES = 20
+MAX_BATCH_PRODUCT_DETAILS = 50
+DEFAULT_SEARCH_PAGE_SIZE = 20
+MAX_SEARCH_PAGE_SIZE = 50
+MAX_NUTRIENT_RANGES = 10
+DEFAULT_NUTRIENT_FILTER_LIMIT = 20
+MAX_NUTRIENT_FILTER_LIMIT = 50
+DEFAULT_SIMILAR_PRODUCTS = 6
+MAX_SIMILAR_PRODUCTS = 20
+MAX_PORTION_GRAMS = 10000
+MAX_PORTION_COUNT = 100
+MAX_MEASURE_NAME_LENGTH = 30
+
 
 # Базовые схемы
 class NutrientBase(BaseSchema):
@@ -83,6 +100,24 @@ class ProductDetailResponse(BaseSchema):
     other: OtherSchema = OtherSchema()
 
 
+# Итоги нутриентов без данных продукта — для дневника и рецептов
+class NutrientTotals(BaseSchema):
+    proteins: ProteinsSchema = ProteinsSchema()
+    fats: FatsSchema = FatsSchema()
+    carbs: CarbsSchema = CarbsSchema()
+    energy_value: float = 0.0
+    water: float = 0.0
+
+    vitamins: VitaminsSchema = VitaminsSchema()
+    vitamin_like: VitaminLikeSchema = VitaminLikeSchema()
+    minerals: MineralsSchema = MineralsSchema()
+    other: OtherSchema = OtherSchema()
+
+
+class PortionDetailResponse(ProductDetailResponse):
+    portion_grams: float
+
+
 class ProductSuggestion(BaseSchema):
     id: int
     title: str
@@ -93,6 +128,70 @@ class PendingProductCreate(BaseSchema):
     name: str
 
 
+class ProductSearchBatch(BaseSchema):
+    queries: Annotated[
+        list[Annotated[str, MinLen(2), MaxLen(100)]],
+        MinLen(1),
+        MaxLen(MAX_BATCH_SEARCH_QUERIES),
+    ]
+
+
+class PortionSpec(BaseSchema):
+    # Основа порции — одно из: граммы, бытовая мера, 100 ккал; по умолчанию 100 г
+    grams: Annotated[float, Gt(0), Le(MAX_PORTION_GRAMS)] | None = None
+    measure: Annotated[str, MinLen(1), MaxLen(MAX_MEASURE_NAME_LENGTH)] | None = None
+    per_energy: bool = False
+    count: Annotated[float, Gt(0), Le(MAX_PORTION_COUNT)] = 1.0
+
+
+class ProductDetailsBatch(BaseSchema):
+    ids: Annotated[
+        list[Annotated[int, Ge(1)]],
+        MinLen(1),
+        MaxLen(MAX_BATCH_PRODUCT_DETAILS),
+    ]
+    # Порция для всех продуктов и порции отдельных продуктов по id
+    portion: PortionSpec | None = None
+    portions: Annotated[
+        dict[int, PortionSpec],
+        MaxLen(MAX_BATCH_PRODUCT_DETAILS),
+    ] = {}
+
+
+class ProductSearchPage(BaseSchema):
+    items: list[ProductSuggestion] = []
+    next_cursor: str | None = None
+
+
+class NutrientRangeFilter(BaseSchema):
+    nutrient_id: int
+    min: float | None = None
+    max: float | None = None
+
+
+class ProductNutrientFilter(BaseSchema):
+    ranges: Annotated[list[NutrientRangeFilter], MaxLen(MAX_NUTRIENT_RANGES)] = []
+    sort_by: int | None = None  # id нутриента; без него — по id продукта
+    per_energy: bool = False  # сортировка по количеству на 100 ккал
+    descending: bool = True
+    limit: Annotated[int, Ge(1), Le(MAX_NUTRIENT_FILTER_LIMIT)] = (
+        DEFAULT_NUTRIENT_FILTER_LIMIT
+    )
+
+
+class NutrientFilterItem(ProductSuggestion):
+    value: float | None = None
+
+
+class NutrientFilterResponse(BaseSchema):
+    total: int = 0
+    items: list[NutrientFilterItem] = []
+
+
+class SimilarProductItem(ProductSuggestion):
+    similarity: float
+
+
 class UnifiedProductResponse(BaseSchema):
     exact_match: ProductDetailResponse | None = None
     suggestions: list[ProductSuggestion] = []
@@ -0,0 +1,51 @@
+from typing import Annotated
+
+from annotated_types import Ge, Gt, Le, MaxLen, MinLen
+
+from .base import BaseSchema
+from .product import MAX_PORTION_GRAMS, ProductDetailResponse
+
+MAX_RECIPE_INGREDIENTS = 50
+MAX_RECIPE_SERVINGS = 100
+
+
+class RecipeIngredientGrams(BaseSchema):
+    grams: Annotated[float, Gt(0), Le(MAX_PORTION_GRAMS)]
+
+
+class RecipeIngredientCreate(RecipeIngredientGrams):
+    product_id: Annotated[int, Ge(1)]
+
+
+class RecipeCreate(BaseSchema):
+    title: Annotated[str, MinLen(1), MaxLen(100)]
+    servings: Annotated[int, Ge(1), Le(MAX_RECIPE_SERVINGS)] = 1
+    ingredients: Annotated[
+        list[RecipeIngredientCreate],
+        MaxLen(MAX_RECIPE_INGREDIENTS),
+    ] = []
+
+
+class RecipeUpdate(BaseSchema):
+    title: Annotated[str, MinLen(1), MaxLen(100)] | None = None
+    servings: Annotated[int, Ge(1), Le(MAX_RECIPE_SERVINGS)] | None = None
+
+
+class RecipeIngredientResponse(BaseSchema):
+    product_id: int
+    title: str
+    grams: float
+
+
+class RecipeSummary(BaseSchema):
+    id: int
+    title: str
+    servings: int
+
+
+class RecipeResponse(RecipeSummary):
+    total_grams: float = 0.0
+    serving_grams: float = 0.0
+    ingredients: list[RecipeIngredientResponse] = []
+    # Нутриенты одной порции в том же виде, что и у продукта
+    per_serving: ProductDetailResponse
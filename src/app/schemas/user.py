@@ -19,6 +19,19 @@ class UserResponse(UserBase):
     id: int
     uid: str
     hashed_password: bytes | None = None
+    # Поля профиля для процента суточной нормы на страницах продуктов
+    gender: Literal["female", "male"] | None = None
+    age: int | None = None
+    tdee: float | None = None
+
+
+class UserTargets(BaseSchema):
+    bmr: float
+    tdee: float
+    energy: float
+    proteins: float
+    fats: float
+    carbs: float
 
 
 class UserAccount(UserBase):
@@ -29,6 +42,8 @@ class UserAccount(UserBase):
     kfa: str | None
     goal: str = Literal["Снижение веса", "Увеличение веса", "Поддержание веса"] | None
     created_at: str
+    # Суточные нормы из таблицы user_targets; None, если профиль не заполнен
+    targets: UserTargets | None = None
 
 
 class UserProfile(BaseSchema):
@@ -571,8 +571,43 @@ document.addEventListener("DOMContentLoaded", () => {
             let currentFocus = -1;
             let abortController = null;
             let lastSearchData = null;
+            let searchSocket = null;
+            let searchSeq = 0;
+
+            // Поиск по мере ввода идёт через одно WebSocket-соединение:
+            // устаревшие запросы отменяются на сервере
+            const openSearchSocket = () => {
+                if (!('WebSocket' in window)) return;
+                const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
+                searchSocket = new WebSocket(`${protocol}//${window.location.host}/product/search/ws`);
+
+                searchSocket.addEventListener('message', (event) => {
+                    const message = JSON.parse(event.data);
+                    if (message.seq !== searchSeq) return;
+                    if (message.error) {
+                        showError(errorId, 'Ошибка поиска: ' + message.error);
+                        return;
+                    }
+                    const data = message.result;
+                    lastSearchData = data;
+                    const items = data.exact_match ? [data.exact_match, ...data.suggestions] : data.suggestions || [];
+                    renderResults(items);
+                });
+                searchSocket.addEventListener('close', () => {
+                    searchSocket = null;
+                });
+            };
+
+            const streamSearch = (query) => {
+                if (searchSocket?.readyState !== WebSocket.OPEN) return false;
+                abortController?.abort();
+                searchSeq += 1;
+                searchSocket.send(JSON.stringify({ seq: searchSeq, query }));
+                return true;
+            };
 
             const performSearch = async (query, fromForm = false) => {
+                searchSeq += 1;
                 abortController?.abort();
                 abortController = new AbortController();
 
@@ -656,7 +691,10 @@ document.addEventListener("DOMContentLoaded", () => {
                     lastSearchData = null;
                     return;
                 }
-                setTimeout(() => performSearch(query), 300);
+                if (!searchSocket) openSearchSocket();
+                if (!streamSearch(query)) {
+                    setTimeout(() => performSearch(query), 300);
+                }
             });
 
             searchForm.addEventListener('submit', async (e) => {
@@ -821,6 +859,21 @@ document.addEventListener("DOMContentLoaded", () => {
         }
     };
 
+    // Процент суточной нормы на странице продукта: тело страницы общее для
+    // всех, проценты пользователя приходят отдельным JSON-блоком
+    const initDailyValues = () => {
+        const overlay = document.getElementById('dailyValueOverlay');
+        if (!overlay) return;
+
+        const percents = JSON.parse(overlay.textContent);
+        document.querySelectorAll('[data-dv]').forEach(el => {
+            const percent = percents[el.dataset.dv];
+            if (percent !== undefined) {
+                el.textContent = `(${percent}% нормы)`;
+            }
+        });
+    };
+
     // Инициализация
     initCsrfToken();
     initTheme();
@@ -832,6 +885,7 @@ document.addEventListener("DOMContentLoaded", () => {
     initTooltips();
     initCustomSelects();
     initNavigationButtons();
+    initDailyValues();
 
     // Обработка действия отписки из параметра URL
     const urlParams = new URLSearchParams(window.location.search);
@@ -1,3 +1,13 @@
-__all__ = ("send_welcome_email",)
+__all__ = (
+    "aggregate_search_stats",
+    "refresh_product_details",
+    "refresh_product_popularity",
+    "refresh_user_targets",
+    "send_welcome_email",
+)
 
+from .search_telemetry import aggregate_search_stats
+from .product_details import refresh_product_details
+from .product_popularity import refresh_product_popularity
+from .user_targets import refresh_user_targets
 from .welcome_email_notification import send_welcome_email
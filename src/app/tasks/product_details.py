@@ -0,0 +1,21 @@
+from typing import Annotated
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from taskiq import TaskiqDepends
+
+from src.app.core import broker
+from src.app.core import db_helper
+from src.app.core.logger import get_logger
+from src.app.core.services.product import rebuild_product_details
+
+log = get_logger("product_details_tasks")
+
+
+@broker.task(schedule=[{"cron": "* * * * *"}])
+async def refresh_product_details(
+    session: Annotated[AsyncSession, TaskiqDepends(db_helper.session_getter)],
+) -> None:
+    rebuilt = await rebuild_product_details(session)
+
+    if rebuilt:
+        log.info("Product details snapshots rebuilt: %s", rebuilt)
@@ -0,0 +1,20 @@
+from typing import Annotated
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from taskiq import TaskiqDepends
+
+from src.app.core import broker
+from src.app.core import db_helper
+from src.app.core.logger import get_logger
+from src.app.core.services.popularity import update_product_popularity
+
+log = get_logger("popularity_tasks")
+
+
+@broker.task(schedule=[{"cron": "*/15 * * * *"}])
+async def refresh_product_popularity(
+    session: Annotated[AsyncSession, TaskiqDepends(db_helper.session_getter)],
+) -> None:
+    viewed = await update_product_popularity(session)
+
+    log.info("Product popularity refreshed, viewed products: %s", viewed)
@@ -0,0 +1,20 @@
+from typing import Annotated
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from taskiq import TaskiqDepends
+
+from src.app.core import broker
+from src.app.core import db_helper
+from src.app.core.logger import get_logger
+from src.app.core.services.search_telemetry import aggregate_search_events
+
+log = get_logger("search_telemetry_tasks")
+
+
+@broker.task(schedule=[{"cron": "* * * * *"}])
+async def aggregate_search_stats(
+    session: Annotated[AsyncSession, TaskiqDepends(db_helper.session_getter)],
+) -> None:
+    processed = await aggregate_search_events(session)
+
+    log.info("Search events aggregated: %s", processed)
@@ -0,0 +1,46 @@
+from typing import Annotated
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from taskiq import TaskiqDepends
+
+from src.app.core import broker
+from src.app.core import db_helper
+from src.app.core.logger import get_logger
+from src.app.core.redis import redis_client
+from src.app.core.services.user_targets import backfill_user_targets
+from src.app.core.utils.user_profile import TARGETS_VERSION
+
+log = get_logger("user_targets_tasks")
+
+# Версия формул, по которой рассчитаны хранимые нормы
+USER_TARGETS_VERSION_KEY = "user_targets:version"
+
+
+# При развёртывании с новыми формулами и раз в сутки: пересчитывает нормы всех
+# пользователей
+@broker.task(schedule=[{"cron": "0 3 * * *"}])
+async def refresh_user_targets(
+    session: Annotated[AsyncSession, TaskiqDepends(db_helper.session_getter)],
+) -> None:
+    stored = await backfill_user_targets(session)
+
+    log.info("User targets backfilled, users with targets: %s", stored)
+
+
+async def schedule_user_targets_refresh() -> None:
+    """
+    Queues a recalculation of all nutrition targets after a deployment.
+
+    The stored targets are recalculated when the formulas version differs
+    from the one they were calculated with, including the first deployment
+    of the table. The version is swapped atomically, so only one application
+    process queues the task.
+
+    :return: None
+    """
+    previous = await redis_client.set(
+        USER_TARGETS_VERSION_KEY, TARGETS_VERSION, get=True
+    )
+    if previous != str(TARGETS_VERSION):
+        await refresh_user_targets.kiq()
+        log.info("User targets refresh queued, formulas version: %s", TARGETS_VERSION)
@@ -0,0 +1,338 @@
+"""
+Microbenchmark of the nutrient-id dispatch mappers against string matching.
+
+Maps every product of the catalog with the original string-matching
+`map_to_schema`, with its dispatch-table version over ORM objects and with
+`map_nutrients_to_schema` (bare `(nutrient_id, amount)` pairs, as loaded by
+the product services), checks that the results are identical and reports
+the best of several runs::
+
+    python -m src.benchmarks.map_to_schema
+    python -m src.benchmarks.map_to_schema --synthetic 20000
+
+The first form loads the catalog from the configured database, the second one
+generates products with the nutrient layout of the real catalog.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from types import SimpleNamespace
+
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+from src.app.core import db_helper
+from src.app.core.services.nutrient import build_nutrient_dispatch
+from src.app.core.utils import map_nutrients_to_schema
+from src.app.core.utils.nutrient_dispatch import (
+    LIST_SLOTS,
+    OP_ADD,
+    OP_SET,
+    SCALAR_SLOTS,
+    build_detail_response,
+    nutrient_dispatch,
+    route_nutrient,
+)
+from src.app.models import NutrientCategory, Product, ProductNutrient
+from src.app.schemas.product import NutrientBase, ProductDetailResponse
+
+_MISSING = object()
+
+
+def legacy_map_to_schema(product: Product) -> ProductDetailResponse:
+    """
+    The original string-matching `map_to_schema`, kept as the baseline.
+
+    :param product: The product to map.
+    :return: The mapped response object.
+    """
+    response = ProductDetailResponse(
+        id=product.id,
+        title=product.title,
+        group_name=product.product_groups.name,
+    )
+    for assoc in product.nutrient_associations:
+        nutrient = assoc.nutrients
+        amount = assoc.amount
+        unit = nutrient.unit
+
+        # Обработка макронутриентов
+        if nutrient.category == NutrientCategory.MACRO:
+            if "белки" in nutrient.name.lower():
+                response.proteins.total = amount
+            elif "жиры" in nutrient.name.lower():
+                response.fats.total = amount
+            elif "углеводы" in nutrient.name.lower():
+                response.carbs.total = amount
+            elif "вода" in nutrient.name.lower():
+                response.water = amount
+
+        elif nutrient.category == NutrientCategory.ENERGY_VALUE:
+            response.energy_value = amount
+
+        # Обработка аминокислот
+        elif nutrient.category == NutrientCategory.ESSENTIAL_AMINO:
+            response.proteins.amino_acids.essential += amount
+
+        elif nutrient.category == NutrientCategory.COND_ESSENTIAL_AMINO:
+            response.proteins.amino_acids.cond_essential += amount
+
+        elif nutrient.category == NutrientCategory.NONESSENTIAL_AMINO:
+            response.proteins.amino_acids.nonessential += amount
+
+        # Обработка жиров
+        elif nutrient.category == NutrientCategory.SATURATED_FATS:
+            if "холестерин" in nutrient.name.lower():
+                response.fats.breakdown.cholesterol = amount
+            else:
+                response.fats.breakdown.saturated += amount
+
+        elif nutrient.category == NutrientCategory.MONOUNSATURATED_FATS:
+            response.fats.breakdown.monounsaturated += amount
+
+        elif nutrient.category == NutrientCategory.POLYUNSATURATED_FATS:
+            if "полиненасыщенные" in nutrient.name.lower():
+                response.fats.breakdown.polyunsaturated.total = amount
+            elif "омега-3" in nutrient.name.lower():
+                response.fats.breakdown.polyunsaturated.omega3 = amount
+            elif "омега-6" in nutrient.name.lower():
+                response.fats.breakdown.polyunsaturated.omega6 = amount
+
+        # Обработка углеводов
+        elif nutrient.category == NutrientCategory.CARBS:
+            if "клетчатка" in nutrient.name.lower():
+                response.carbs.breakdown.fiber = amount
+            elif "сахар" in nutrient.name.lower():
+                response.carbs.breakdown.sugar = amount
+
+        # Витамины
+        elif nutrient.category == NutrientCategory.VITAMINS:
+            response.vitamins.vits.append(
+                NutrientBase(name=nutrient.name, amount=amount, unit=unit)
+            )
+
+        # Витаминоподобные
+        elif nutrient.category == NutrientCategory.VITAMIN_LIKE:
+            response.vitamin_like.vitslk.append(
+                NutrientBase(name=nutrient.name, amount=amount, unit=unit)
+            )
+
+        # Минералы
+        elif nutrient.category == NutrientCategory.MINERALS_MACRO:
+            response.minerals.macro.append(
+                NutrientBase(name=nutrient.name, amount=amount, unit=unit)
+            )
+
+        elif nutrient.category == NutrientCategory.MINERALS_MICRO:
+            response.minerals.micro.append(
+                NutrientBase(name=nutrient.name, amount=amount, unit=unit)
+            )
+
+        # Прочие нутриенты
+        elif nutrient.category == NutrientCategory.OTHER:
+            response.other.oths.append(
+                NutrientBase(name=nutrient.name, amount=amount, unit=unit)
+            )
+
+    return response
+
+
+def dispatch_map_to_schema(product: Product) -> ProductDetailResponse:
+    """
+    The dispatch-table `map_to_schema` over ORM objects.
+
+    Nutrients are routed by id through `nutrient_dispatch`, and nutrients
+    missing from the dictionary are routed from the loaded association and
+    remembered in it.
+
+    :param product: The product to map.
+    :return: The mapped response object.
+    """
+    scalars = [0.0] * SCALAR_SLOTS
+    lists: list[list[NutrientBase]] = [[] for _ in range(LIST_SLOTS)]
+    routes = nutrient_dispatch.routes
+
+    for assoc in product.nutrient_associations:
+        route = routes.get(assoc.nutrient_id, _MISSING)
+        if route is _MISSING:
+            nutrient = assoc.nutrients
+            route = routes[nutrient.id] = route_nutrient(
+                nutrient.name, nutrient.unit, nutrient.category
+            )
+        if route is None:
+            continue
+
+        op, slot, name, unit = route
+        if op == OP_SET:
+            scalars[slot] = assoc.amount
+        elif op == OP_ADD:
+            scalars[slot] += assoc.amount
+        else:
+            lists[slot].append(NutrientBase(name=name, amount=assoc.amount, unit=unit))
+
+    return build_detail_response(
+        product.id,
+        product.title,
+        product.product_groups.name,
+        scalars,
+        lists,
+    )
+
+
+# Нутриенты, похожие на справочник: (название, единица, категория)
+_SYNTHETIC_NUTRIENTS = [
+    ("Белки", "г", NutrientCategory.MACRO),
+    ("Жиры", "г", NutrientCategory.MACRO),
+    ("Углеводы", "г", NutrientCategory.MACRO),
+    ("Вода", "г", NutrientCategory.MACRO),
+    ("Энергетическая ценность", "ккал", NutrientCategory.ENERGY_VALUE),
+    ("Холестерин", "мг", NutrientCategory.SATURATED_FATS),
+    ("Полиненасыщенные жирные кислоты", "г", NutrientCategory.POLYUNSATURATED_FATS),
+    ("Омега-3 жирные кислоты", "г", NutrientCategory.POLYUNSATURATED_FATS),
+    ("Омега-6 жирные кислоты", "г", NutrientCategory.POLYUNSATURATED_FATS),
+    ("Пищевые волокна (клетчатка)", "г", NutrientCategory.CARBS),
+    ("Сахара общие", "г", NutrientCategory.CARBS),
+    *(
+        (f"Насыщенная кислота {i}", "г", NutrientCategory.SATURATED_FATS)
+        for i in range(6)
+    ),
+    *(
+        (f"Мононенасыщенная кислота {i}", "г", NutrientCategory.MONOUNSATURATED_FATS)
+        for i in range(4)
+    ),
+    *(
+        (f"Незаменимая аминокислота {i}", "г", NutrientCategory.ESSENTIAL_AMINO)
+        for i in range(9)
+    ),
+    *(
+        (
+            f"Условно незаменимая аминокислота {i}",
+            "г",
+            NutrientCategory.COND_ESSENTIAL_AMINO,
+        )
+        for i in range(3)
+    ),
+    *(
+        (f"Заменимая аминокислота {i}", "г", NutrientCategory.NONESSENTIAL_AMINO)
+        for i in range(6)
+    ),
+    *((f"Витамин {i}", "мг", NutrientCategory.VITAMINS) for i in range(13)),
+    *(
+        (f"Витаминоподобное вещество {i}", "мг", NutrientCategory.VITAMIN_LIKE)
+        for i in range(4)
+    ),
+    *((f"Макроэлемент {i}", "мг", NutrientCategory.MINERALS_MACRO) for i in range(7)),
+    *((f"Микроэлемент {i}", "мкг", NutrientCategory.MINERALS_MICRO) for i in range(10)),
+    *((f"Прочее вещество {i}", "г", NutrientCategory.OTHER) for i in range(3)),
+]
+
+
+def _synthetic_catalog(size: int) -> list:
+    rng = random.Random(42)
+    nutrients = [
+        SimpleNamespace(id=i, name=name, unit=unit, category=category)
+        for i, (name, unit, category) in enumerate(_SYNTHETIC_NUTRIENTS, start=1)
+    ]
+    nutrient_dispatch.load((n.id, n.name, n.unit, n.category) for n in nutrients)
+    group = SimpleNamespace(name="Синтетическая группа")
+    return [
+        SimpleNamespace(
+            id=product_id,
+            title=f"Продукт {product_id}",
+            product_groups=group,
+            nutrient_associations=[
+                SimpleNamespace(
+                    nutrient_id=n.id,
+                    nutrients=n,
+                    amount=round(rng.uniform(0, 100), 2),
+                )
+                for n in nutrients
+                if rng.random() < 0.8
+            ],
+        )
+        for product_id in range(1, size + 1)
+    ]
+
+
+async def _load_catalog() -> list[Product]:
+    async with db_helper.session_factory() as session:
+        await build_nutrient_dispatch(session)
+        result = await session.execute(
+            select(Product).options(
+                selectinload(Product.product_groups),
+                selectinload(Product.nutrient_associations).selectinload(
+                    ProductNutrient.nutrients
+                ),
+            )
+        )
+        products = list(result.unique().scalars())
+    await db_helper.dispose()
+    return products
+
+
+def _best_of(func, products: list, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for product in products:
+            func(product)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(products: list, repeat: int) -> None:
+    for product in products:
+        assert dispatch_map_to_schema(product) == legacy_map_to_schema(
+            product
+        ), product.id
+
+    # Строки в том виде, в каком их отдаёт облегчённая загрузка продуктов
+    rows = [
+        (
+            p.id,
+            p.title,
+            p.product_groups.name,
+            [(a.nutrient_id, a.amount) for a in p.nutrient_associations],
+        )
+        for p in products
+    ]
+    for product, row in zip(products, rows):
+        assert map_nutrients_to_schema(*row) == dispatch_map_to_schema(
+            product
+        ), product.id
+
+    associations = sum(len(p.nutrient_associations) for p in products)
+    legacy = _best_of(legacy_map_to_schema, products, repeat)
+    dispatch = _best_of(dispatch_map_to_schema, products, repeat)
+    pairs = _best_of(lambda row: map_nutrients_to_schema(*row), rows, repeat)
+
+    print(f"products: {len(products)}, product nutrients: {associations}")
+    for label, seconds in (
+        ("string matching", legacy),
+        ("dispatch table", dispatch),
+        ("id/amount pairs", pairs),
+    ):
+        print(
+            f"{label:>16}: {seconds * 1000:9.1f} ms total, "
+            f"{seconds / len(products) * 1e6:7.1f} us/product"
+        )
+    print(f"{'speedup':>16}: {legacy / dispatch:.2f}x / {legacy / pairs:.2f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--synthetic", type=int, metavar="N")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        products = _synthetic_catalog(args.synthetic)
+    else:
+        products = asyncio.run(_load_catalog())
+    run(products, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
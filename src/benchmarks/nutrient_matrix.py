@@ -0,0 +1,150 @@
+"""
+Microbenchmark of range-filter queries over the in-memory nutrient matrix.
+
+Loads the product nutrients into `NutrientMatrix`, checks the answers of a few
+typical queries against a plain Python scan and reports the best latency of
+several runs per query::
+
+    python -m src.benchmarks.nutrient_matrix
+    python -m src.benchmarks.nutrient_matrix --synthetic 50000
+
+The first form loads the catalog from the configured database, the second one
+generates products with the nutrient layout of the real catalog.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+import numpy as np
+from sqlalchemy import select
+
+from src.app.core import db_helper
+from src.app.core.services.nutrient import build_nutrient_dispatch
+from src.app.core.utils.nutrient_dispatch import (
+    ENERGY_VALUE,
+    FATS,
+    PROTEINS,
+    nutrient_dispatch,
+)
+from src.app.core.utils.nutrient_matrix import NutrientMatrix, NutrientRange
+from src.app.models import ProductNutrient
+from src.benchmarks.map_to_schema import _SYNTHETIC_NUTRIENTS
+
+
+def _synthetic_rows(size: int) -> list[tuple[int, int, float]]:
+    rng = random.Random(42)
+    nutrient_dispatch.load(
+        (i, name, unit, category)
+        for i, (name, unit, category) in enumerate(_SYNTHETIC_NUTRIENTS, start=1)
+    )
+    return [
+        (product_id, nutrient_id, round(rng.uniform(0, 100), 2))
+        for product_id in range(1, size + 1)
+        for nutrient_id in range(1, len(_SYNTHETIC_NUTRIENTS) + 1)
+        if rng.random() < 0.8
+    ]
+
+
+async def _load_rows() -> list[tuple[int, int, float]]:
+    async with db_helper.session_factory() as session:
+        await build_nutrient_dispatch(session)
+        result = await session.execute(
+            select(
+                ProductNutrient.product_id,
+                ProductNutrient.nutrient_id,
+                ProductNutrient.amount,
+            )
+        )
+        rows = list(result.tuples())
+    await db_helper.dispose()
+    return rows
+
+
+def _nutrient_id(slot: int) -> int:
+    return next(
+        nutrient_id
+        for nutrient_id, route in nutrient_dispatch.routes.items()
+        if route is not None and route.slot == slot
+    )
+
+
+def _scan(
+    amounts: dict[int, dict[int, float]],
+    ranges: list[NutrientRange],
+    sort_by: int,
+    energy: int | None,
+    limit: int,
+) -> tuple[int, list[int]]:
+    matches = []
+    for product_id, nutrients in amounts.items():
+        if all(
+            (low is None or nutrients.get(n, 0.0) >= low)
+            and (high is None or nutrients.get(n, 0.0) <= high)
+            for n, low, high in ranges
+        ):
+            key = nutrients.get(sort_by, 0.0)
+            if energy is not None:
+                if nutrients.get(energy, 0.0) <= 0:
+                    continue
+                key = key * 100 / nutrients[energy]
+            matches.append((-key, product_id))
+    matches.sort()
+    return len(matches), [product_id for _, product_id in matches[:limit]]
+
+
+def run(rows: list[tuple[int, int, float]], repeat: int) -> None:
+    protein, fat, energy = (_nutrient_id(s) for s in (PROTEINS, FATS, ENERGY_VALUE))
+
+    start = time.perf_counter()
+    matrix = NutrientMatrix()
+    matrix.rebuild(rows, energy)
+    build = time.perf_counter() - start
+
+    # Количества округляются до float32, как в матрице, чтобы сравнение было точным
+    amounts: dict[int, dict[int, float]] = {}
+    for product_id, nutrient_id, amount in rows:
+        amounts.setdefault(product_id, {})[nutrient_id] = float(np.float32(amount))
+
+    queries = {
+        "protein >= 20, fat <= 5 by protein/100 kcal": (
+            [NutrientRange(protein, 20, None), NutrientRange(fat, None, 5)],
+            protein,
+            True,
+        ),
+        "fat <= 10 by protein": ([NutrientRange(fat, None, 10)], protein, False),
+        "whole catalog by fat": ([], fat, False),
+    }
+
+    print(f"products: {len(matrix)}, product nutrients: {len(rows)}")
+    print(f"{'build':>44}: {build * 1000:9.1f} ms")
+    for label, (ranges, sort_by, per_energy) in queries.items():
+        total, matches = matrix.query(ranges, sort_by, per_energy, limit=20)
+        expected = _scan(amounts, ranges, sort_by, energy if per_energy else None, 20)
+        assert total == expected[0], label
+        assert [m.product_id for m in matches] == expected[1], label
+
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            matrix.query(ranges, sort_by, per_energy, limit=20)
+            best = min(best, time.perf_counter() - start)
+        print(f"{label:>44}: {best * 1000:9.3f} ms, {total} matches")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--synthetic", type=int, metavar="N")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        rows = _synthetic_rows(args.synthetic)
+    else:
+        rows = asyncio.run(_load_rows())
+    run(rows, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
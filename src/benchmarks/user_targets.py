@@ -0,0 +1,143 @@
+"""
+Microbenchmark of `calculate_targets_batch` against the per-user functions.
+
+Calculates the nutrition targets of every user once with `calculate_targets`
+on a `UserAccount` per user and once with `profile_arrays` and
+`calculate_targets_batch`, checks that the results agree and reports the best
+of several runs::
+
+    python -m src.benchmarks.user_targets
+    python -m src.benchmarks.user_targets --synthetic 100000
+
+The first form loads the profiles from the configured database, the second
+one generates them, with a share of incomplete and invalid profiles.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+import numpy as np
+from sqlalchemy import select
+
+from src.app.core import db_helper
+from src.app.core.utils.user_profile import (
+    GOAL_TARGETS,
+    KFA_FACTORS,
+    ProfileRow,
+    calculate_targets,
+    calculate_targets_batch,
+    profile_arrays,
+)
+from src.app.models import User
+from src.app.schemas.user import UserAccount
+
+
+def _synthetic_rows(size: int) -> list[ProfileRow]:
+    rng = random.Random(42)
+    goals = [*GOAL_TARGETS, None]
+    rows = []
+    for user_id in range(1, size + 1):
+        if rng.random() < 0.1:
+            # Незаполненный профиль
+            rows.append((user_id, None, None, None, None, None, None))
+            continue
+        rows.append(
+            (
+                user_id,
+                rng.choice(("female", "male")),
+                rng.randint(14, 90),
+                # Часть весов за пределами допустимого
+                round(rng.uniform(40, 520), 1),
+                round(rng.uniform(140, 210), 1),
+                rng.choice(list(KFA_FACTORS)),
+                rng.choice(goals),
+            )
+        )
+    return rows
+
+
+async def _load_rows() -> list[ProfileRow]:
+    async with db_helper.session_factory() as session:
+        result = await session.execute(
+            select(
+                User.id,
+                User.gender,
+                User.age,
+                User.weight,
+                User.height,
+                User.kfa,
+                User.goal,
+            )
+        )
+        rows = list(result.tuples())
+    await db_helper.dispose()
+    return rows
+
+
+def _scalar(rows: list[ProfileRow]) -> list[tuple | None]:
+    targets = []
+    for user_id, gender, age, weight, height, kfa, goal in rows:
+        user = UserAccount.model_construct(
+            gender=gender, age=age, weight=weight, height=height, kfa=kfa, goal=goal
+        )
+        try:
+            targets.append(tuple(calculate_targets(user)))
+        except ValueError:
+            targets.append(None)
+    return targets
+
+
+def _batch(rows: list[ProfileRow]):
+    return calculate_targets_batch(profile_arrays(rows))
+
+
+def _best_of(func, rows: list[ProfileRow], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(rows)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(rows: list[ProfileRow], repeat: int) -> None:
+    scalar = _scalar(rows)
+    batch = _batch(rows)
+    valid = np.array([targets is not None for targets in scalar])
+    assert (valid == batch.valid).all()
+    expected = np.array([targets for targets in scalar if targets is not None])
+    actual = np.column_stack(batch[2:])[batch.valid]
+    assert np.allclose(expected.reshape(actual.shape), actual)
+
+    scalar_time = _best_of(_scalar, rows, repeat)
+    batch_time = _best_of(_batch, rows, repeat)
+
+    print(f"users: {len(rows)}, valid profiles: {int(valid.sum())}")
+    for label, seconds in (
+        ("calculate_targets per user", scalar_time),
+        ("calculate_targets_batch", batch_time),
+    ):
+        print(
+            f"{label:>28}: {seconds * 1000:9.1f} ms, "
+            f"{seconds / max(len(rows), 1) * 1e6:7.3f} us/user"
+        )
+    print(f"{'speedup':>28}: {scalar_time / batch_time:9.1f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--synthetic", type=int, metavar="N")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        rows = _synthetic_rows(args.synthetic)
+    else:
+        rows = asyncio.run(_load_rows())
+    run(rows, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
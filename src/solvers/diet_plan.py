@@ -0,0 +1,229 @@
+"""
+Diet plan solver run in the worker processes of the diet plan pool.
+
+The module depends on numpy only and must not import the application
+package: a spawned worker imports it before solving its first plan, and
+importing `src.app` there would cost most of a request's time budget.
+"""
+
+import time
+from typing import NamedTuple
+
+import numpy as np
+
+# Допустимое отклонение от цели: по калорийности и по макронутриентам
+ENERGY_TOLERANCE = 0.05
+MACRO_TOLERANCE = 0.10
+# Вес калорийности в оценке плана относительно каждого макронутриента
+ENERGY_WEIGHT = 4.0
+# Шаг округления граммовок плана
+GRAMS_STEP = 5.0
+
+
+class PlanProblem(NamedTuple):
+    """
+    A diet plan problem; it is pickled to a worker process as is.
+
+    `amounts` holds energy, proteins, fats and carbohydrates per 100 g (one
+    row per candidate product) and `target` the same four daily values.
+    """
+
+    product_ids: np.ndarray
+    group_ids: np.ndarray
+    amounts: np.ndarray
+    target: np.ndarray
+    products: int
+    max_per_group: int
+    min_grams: float
+    max_grams: float
+    time_budget: float
+    seed: int = 0
+
+
+class PlanSolution(NamedTuple):
+    product_ids: list[int]
+    grams: list[float]
+    totals: list[float]
+    within_targets: bool
+    iterations: int
+
+
+def _tolerances() -> np.ndarray:
+    return np.array(
+        (ENERGY_TOLERANCE, MACRO_TOLERANCE, MACRO_TOLERANCE, MACRO_TOLERANCE)
+    )
+
+
+def _weights() -> np.ndarray:
+    return np.sqrt(np.array((ENERGY_WEIGHT, 1.0, 1.0, 1.0)))
+
+
+def _fit_grams(
+    shares: np.ndarray,
+    weights: np.ndarray,
+    min_grams: float,
+    max_grams: float,
+) -> np.ndarray:
+    # Взвешенные наименьшие квадраты с границами: переменные, вышедшие за
+    # границу, фиксируются на ней, и задача решается заново для остальных
+    k = shares.shape[0]
+    grams = np.full(k, min_grams)
+    free = np.ones(k, dtype=bool)
+    system = (shares * weights).T
+    for _ in range(k):
+        residual = weights - system[:, ~free] @ grams[~free]
+        solution = np.linalg.lstsq(system[:, free], residual, rcond=None)[0]
+        grams[free] = solution
+        clipped = free & ((grams < min_grams) | (grams > max_grams))
+        if not clipped.any():
+            break
+        grams = np.clip(grams, min_grams, max_grams)
+        free &= ~clipped
+        if not free.any():
+            break
+    grams = np.clip(grams, min_grams, max_grams)
+    return np.maximum(np.round(grams / GRAMS_STEP) * GRAMS_STEP, min_grams)
+
+
+def _score(deviation: np.ndarray, tolerances: np.ndarray) -> float:
+    # Штраф за выход за допуск и малый штраф за отклонение внутри него
+    excess = np.maximum(np.abs(deviation) - tolerances, 0.0)
+    weights = np.array((ENERGY_WEIGHT, 1.0, 1.0, 1.0))
+    return float(weights @ (excess**2) + 1e-3 * (weights @ deviation**2))
+
+
+def _sample(
+    rng: np.random.Generator,
+    group_ids: np.ndarray,
+    size: int,
+    max_per_group: int,
+    fixed: list[int] | None = None,
+) -> list[int] | None:
+    chosen = list(fixed or ())
+    groups: dict[int, int] = {}
+    for i in chosen:
+        groups[group_ids[i]] = groups.get(group_ids[i], 0) + 1
+    # Выборка с возвращением: повторы отсеиваются ниже, а стоимость не
+    # зависит от числа кандидатов
+    for i in rng.integers(len(group_ids), size=size * 8).tolist():
+        if len(chosen) == size:
+            break
+        if i in chosen or groups.get(group_ids[i], 0) >= max_per_group:
+            continue
+        chosen.append(i)
+        groups[group_ids[i]] = groups.get(group_ids[i], 0) + 1
+    if len(chosen) < size:
+        # Случайные попытки могли не найти редкие группы: жадный проход по
+        # перестановке всех кандидатов находит выборку, если она существует
+        taken = set(chosen)
+        for i in rng.permutation(len(group_ids)).tolist():
+            if len(chosen) == size:
+                break
+            if i in taken or groups.get(group_ids[i], 0) >= max_per_group:
+                continue
+            chosen.append(i)
+            taken.add(i)
+            groups[group_ids[i]] = groups.get(group_ids[i], 0) + 1
+    return chosen if len(chosen) == size else None
+
+
+def solve_diet_plan(problem: PlanProblem) -> PlanSolution:
+    """
+    Picks products and their weights so that a day hits the targets.
+
+    The search is a bounded local search: a set of `products` candidates is
+    sampled (at most `max_per_group` per product group), their weights are
+    fitted by bounded weighted least squares against the energy and
+    macronutrient targets, and then one product at a time is swapped for a
+    random candidate while that improves the plan. The search restarts from
+    a new sample when it gets stuck and stops at `time_budget` seconds, or as
+    soon as every value is within its tolerance.
+
+    :param problem: The candidates, the targets and the search limits.
+    :return: The best plan found; empty if there are not enough candidates.
+    """
+    deadline = time.monotonic() + problem.time_budget
+    rng = np.random.default_rng(problem.seed)
+    tolerances = _tolerances()
+    weights = _weights()
+    # Доля дневной цели, которую даёт один грамм продукта
+    shares = problem.amounts / 100.0 / problem.target
+
+    best: tuple[float, list[int], np.ndarray] | None = None
+    current: tuple[float, list[int], np.ndarray] | None = None
+    iterations = 0
+    stale = 0
+
+    def evaluate(chosen: list[int]) -> tuple[float, list[int], np.ndarray]:
+        grams = _fit_grams(
+            shares[chosen], weights, problem.min_grams, problem.max_grams
+        )
+        deviation = grams @ shares[chosen] - 1.0
+        return _score(deviation, tolerances), chosen, grams
+
+    while time.monotonic() < deadline:
+        iterations += 1
+        if current is None or stale >= 4 * problem.products:
+            chosen = _sample(
+                rng, problem.group_ids, problem.products, problem.max_per_group
+            )
+            if chosen is None:
+                break
+            current, stale = evaluate(chosen), 0
+        else:
+            # Замена одного продукта случайным кандидатом
+            position = int(rng.integers(problem.products))
+            kept = current[1][:position] + current[1][position + 1 :]
+            chosen = _sample(
+                rng, problem.group_ids, problem.products, problem.max_per_group, kept
+            )
+            candidate = evaluate(chosen) if chosen is not None else None
+            if candidate is not None and candidate[0] < current[0]:
+                current, stale = candidate, 0
+            else:
+                stale += 1
+
+        if best is None or current[0] < best[0]:
+            best = current
+            deviation = best[2] @ shares[best[1]] - 1.0
+            if np.all(np.abs(deviation) <= tolerances):
+                break
+
+    if best is None:
+        return PlanSolution([], [], [0.0] * 4, False, iterations)
+
+    _, chosen, grams = best
+    totals = grams @ (problem.amounts[chosen] / 100.0)
+    deviation = totals / problem.target - 1.0
+    order = np.argsort(-grams, kind="stable")
+    return PlanSolution(
+        product_ids=problem.product_ids[chosen][order].tolist(),
+        grams=grams[order].tolist(),
+        totals=totals.tolist(),
+        within_targets=bool(np.all(np.abs(deviation) <= tolerances)),
+        iterations=iterations,
+    )
+
+
+def warm_up() -> None:
+    """
+    Solves a trivial plan to initialize a fresh worker process.
+
+    Used as the initializer of the pool workers, so that the imports and the
+    first calls into numpy happen before the worker takes a real problem.
+
+    :return: None
+    """
+    solve_diet_plan(
+        PlanProblem(
+            product_ids=np.arange(2),
+            group_ids=np.arange(2),
+            amounts=np.array(((100.0, 10.0, 5.0, 10.0), (200.0, 5.0, 10.0, 20.0))),
+            target=np.array((300.0, 15.0, 15.0, 30.0)),
+            products=2,
+            max_per_group=1,
+            min_grams=10.0,
+            max_grams=200.0,
+            time_budget=0.01,
+        )
+    )